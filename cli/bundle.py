@@ -0,0 +1,249 @@
+"""
+Offline module bundles
+
+A bundle is one compressed tar archive holding cached modules, so a cache can
+be filled with no network (`cmakehub bundle create` / `cmakehub bundle import`):
+
+    bundle.json      manifest: {"bundle_version": 1, "created_at": ..., "modules": [
+                         {"name", "version", "repository", "path", "sha256", "size"}, ...]}
+    modules.json     index snapshot of the bundled modules, at the bundled versions
+    blobs/<sha256>   each distinct module file, once
+
+The members are written in this order, so an import reads the archive as a
+stream (tarfile mode "r|*"): blobs are decompressed straight into the content
+store and checked against their digest, then each module entry is linked to its
+blob. Imported entries reference no checkout; the loader and the CLI use them
+like any other materialized entry.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+from datetime import datetime
+
+from cli import cache_layout, cache_ledger, content_store
+from cli.file_lock import FileLock, get_lock_timeout
+from cli.fs_utils import open_atomic, write_atomic
+from cli.module import Module
+
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "bundle.json"
+INDEX_NAME = "modules.json"
+BLOBS_PREFIX = "blobs/"
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Archive suffix -> tarfile compression
+COMPRESSION = [
+    (".tar.gz", "gz"),
+    (".tgz", "gz"),
+    (".tar.xz", "xz"),
+    (".txz", "xz"),
+    (".tar.bz2", "bz2"),
+    (".tar", ""),
+]
+COMPRESS_LEVEL = 6
+
+
+def get_write_mode(path):
+    """tarfile mode for writing an archive, chosen by its suffix (gzip by default)"""
+    for suffix, compression in COMPRESSION:
+        if path.lower().endswith(suffix):
+            return f"w:{compression}" if compression else "w"
+    return "w:gz"
+
+
+def is_safe_relpath(path):
+    """Whether a manifest path stays inside the directory it is joined to"""
+    parts = path.replace("\\", "/").split("/")
+    if not path or os.path.isabs(path) or ":" in parts[0]:
+        return False
+    return all(part not in ("", ".", "..") for part in parts)
+
+
+def check_record(record):
+    """Reject manifest records that would write outside the cache"""
+    for field in ("name", "version", "path"):
+        value = record.get(field)
+        if not isinstance(value, str) or not is_safe_relpath(value):
+            raise ValueError(f"Invalid {field} in bundle manifest: {value!r}")
+    if "/" in record["name"] or "\\" in record["name"]:
+        raise ValueError(f"Invalid name in bundle manifest: {record['name']!r}")
+    if not DIGEST_RE.match(record.get("sha256") or ""):
+        raise ValueError(f"Invalid digest for {record['name']} in bundle manifest")
+
+
+def get_bundle_entry(cache_dirs, module, version):
+    """
+    Manifest record and module file of a cached module, from the first of
+    cache_dirs holding it intact; (None, None) if it is not cached.
+    """
+    cache_dir = cache_layout.find_entry(cache_dirs, module.name, version)
+    if cache_dir is None:
+        return None, None
+    entry_dir = cache_layout.get_entry_dir(cache_dir, module.name, version)
+    meta = cache_layout.read_entry_meta(entry_dir)
+    path = cache_layout.get_entry_file(cache_dir, entry_dir, meta)
+    record = {
+        "name": module.name,
+        "version": version,
+        "repository": meta.get("repository") or module.repository or "",
+        "path": meta.get("path") or module.path or "",
+        "sha256": meta.get("sha256") or content_store.file_sha256(path),
+        "size": os.path.getsize(path),
+    }
+    return record, path
+
+
+def add_member(tar, name, data):
+    """Add an in-memory file to an archive"""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_bundle(output, entries, index):
+    """
+    Write a bundle atomically. `entries` is [(manifest record, module file)],
+    `index` the index snapshot. Returns the number of distinct files stored.
+    """
+    manifest = {
+        "bundle_version": BUNDLE_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "modules": [record for record, _ in entries],
+    }
+    mode = get_write_mode(output)
+    options = {"compresslevel": COMPRESS_LEVEL} if mode in ("w:gz", "w:bz2") else {}
+
+    stored = set()
+    with open_atomic(output, "wb") as f, tarfile.open(fileobj=f, mode=mode, **options) as tar:
+        add_member(tar, MANIFEST_NAME, json.dumps(manifest, indent=2).encode("utf-8"))
+        add_member(tar, INDEX_NAME, json.dumps(index, indent=2, ensure_ascii=False).encode("utf-8"))
+        for record, path in entries:
+            if record["sha256"] in stored:
+                continue
+            stored.add(record["sha256"])
+            info = tarfile.TarInfo(BLOBS_PREFIX + record["sha256"])
+            info.size = record["size"]
+            info.mtime = int(os.path.getmtime(path))
+            info.mode = 0o644
+            with open(path, "rb") as source:
+                tar.addfile(info, source)
+    return len(stored)
+
+
+def add_blob_stream(cache_dir, stream, digest):
+    """
+    Copy a stream into the content store under its expected digest; returns
+    whether it was added (False if the store already holds the blob).
+    Raises ValueError if the contents do not match the digest.
+    """
+    blob_path = content_store.get_blob_path(cache_dir, digest)
+    if os.path.exists(blob_path):
+        return False
+
+    sha256 = hashlib.sha256()
+    with open_atomic(blob_path, "wb") as f:
+        for chunk in iter(lambda: stream.read(content_store.HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            f.write(chunk)
+        if sha256.hexdigest() != digest:
+            raise ValueError(f"File {digest[:12]} in the bundle does not match its digest")
+    return True
+
+
+def install_entry(cache_dir, record):
+    """
+    Link a module entry to its blob and write its metadata; returns False if
+    the cache already holds the same file for that version. Holds the lock of
+    the checkout a download of the module would use.
+    """
+    name, version, digest = record["name"], record["version"], record["sha256"]
+    entry_dir = cache_layout.get_entry_dir(cache_dir, name, version)
+    checkout_dir = cache_layout.get_checkout_dir(cache_dir, record["repository"], version)
+
+    with FileLock(cache_layout.get_checkout_lock_path(checkout_dir), timeout=get_lock_timeout()):
+        meta = cache_layout.read_entry_meta(entry_dir)
+        if meta and meta.get("sha256") == digest and cache_layout.is_entry_cached(cache_dir, name, version):
+            return False
+
+        blob_path = content_store.get_blob_path(cache_dir, digest)
+        if not os.path.exists(blob_path):
+            raise ValueError(f"The bundle has no file for {name} ({version})")
+        content_store.materialize(blob_path, os.path.join(entry_dir, *record["path"].split("/")))
+        module = Module(name, repository=record["repository"], path=record["path"])
+        cache_layout.write_entry_meta(
+            entry_dir, module, version, "", digest, content_store.file_fingerprint(blob_path)
+        )
+    cache_ledger.record_entry(cache_dir, name, version)
+    return True
+
+
+class ImportResult:
+    """What a bundle import restored"""
+
+    def __init__(self):
+        self.modules = []
+        self.imported = []
+        self.cached = []
+        self.blobs = 0
+        self.bytes = 0
+
+
+def open_bundle(source):
+    """Open a bundle for streaming reads; "-" reads it from standard input"""
+    if source == "-":
+        return tarfile.open(fileobj=sys.stdin.buffer, mode="r|*")
+    return tarfile.open(source, mode="r|*")
+
+
+def import_bundle(source, cache_dir, index_output=None):
+    """
+    Restore a bundle into a cache in one pass over the archive, writing its
+    index snapshot to index_output if given. Returns an ImportResult.
+    """
+    result = ImportResult()
+    manifest = None
+    expected = set()
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_ledger.ensure_started(cache_dir)
+
+    with open_bundle(source) as tar:
+        for member in tar:
+            if member.name == MANIFEST_NAME and manifest is None:
+                manifest = json.loads(tar.extractfile(member).read().decode("utf-8"))
+                if manifest.get("bundle_version") != BUNDLE_VERSION:
+                    raise ValueError(f"Unsupported bundle version: {manifest.get('bundle_version')}")
+                for record in manifest.get("modules", []):
+                    check_record(record)
+                expected = {record["sha256"] for record in manifest["modules"]}
+            elif manifest is None:
+                raise ValueError(f"Not a module bundle: expected {MANIFEST_NAME} first")
+            elif member.name == INDEX_NAME:
+                if index_output:
+                    write_atomic(index_output, tar.extractfile(member).read().decode("utf-8"))
+            elif member.name.startswith(BLOBS_PREFIX) and member.isfile():
+                digest = member.name[len(BLOBS_PREFIX):]
+                if digest not in expected:
+                    continue
+                if add_blob_stream(cache_dir, tar.extractfile(member), digest):
+                    result.blobs += 1
+                    result.bytes += member.size
+
+    if manifest is None:
+        raise ValueError(f"Not a module bundle: no {MANIFEST_NAME}")
+
+    for record in manifest["modules"]:
+        result.modules.append(record)
+        if install_entry(cache_dir, record):
+            result.imported.append(record)
+        else:
+            result.cached.append(record)
+    return result
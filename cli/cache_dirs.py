@@ -0,0 +1,42 @@
+"""
+Cache directory locations
+
+Only reads the environment, so commands that merely need to know where the
+cache is (e.g. to find the server socket) do not import the cache modules.
+"""
+
+import os
+
+
+def get_cache_dir():
+    """Get the CMakeHub cache directory"""
+    # Check environment variable first
+    if "CMH_CACHE_DIR" in os.environ:
+        return os.environ["CMH_CACHE_DIR"]
+
+    # Default locations
+    if os.name == "nt":  # Windows
+        cache_dir = os.path.join(os.environ.get("USERPROFILE", "~"), ".cmakehub", "cache")
+    else:  # Unix-like
+        cache_dir = os.path.join(os.environ.get("HOME", "~"), ".cmakehub", "cache")
+
+    return os.path.expanduser(cache_dir)
+
+
+def get_cache_layers():
+    """
+    Read-only cache layers searched after the cache directory, in order, from
+    CMH_CACHE_LAYERS (separated like PATH), e.g. a cache baked into a runner image
+    """
+    cache_dir = os.path.abspath(get_cache_dir())
+    layers = []
+    for layer in os.environ.get("CMH_CACHE_LAYERS", "").split(os.pathsep):
+        layer = os.path.expanduser(layer)
+        if layer and os.path.abspath(layer) != cache_dir and layer not in layers:
+            layers.append(layer)
+    return layers
+
+
+def get_cache_dirs():
+    """The writable cache directory followed by the read-only layers"""
+    return [get_cache_dir()] + get_cache_layers()
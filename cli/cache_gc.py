@@ -0,0 +1,407 @@
+"""
+Cache garbage collection for CMakeHub CLI
+
+`cmakehub cache gc` evicts module entries chosen by eviction policies, using
+the cache ledger (see cache_ledger) for sizes and last-use times; the loader
+records a use with one appended line per cache hit.
+
+Policies run in order over the entries the previous ones kept; each is a
+function (entries, options, now, checkouts) -> [(entry, reason), ...]
+registered in POLICIES under the option that enables it:
+
+    max_age        evict entries not used for longer than a TTL
+    keep_versions  keep only the N most recently used versions of each module
+    max_size       evict least recently used entries until the cache fits a budget
+
+Eviction is safe while builds are configuring:
+
+- entries used within the grace period are never evicted, and hits appended
+  to the ledger while gc runs are read before each eviction;
+- an entry is first moved into .trash/ with one rename, so a concurrent
+  cmakehub_use() sees either the whole entry or none (and downloads it again);
+- trash and unreferenced store blobs are deleted only once they are older
+  than the grace period;
+- an entry whose checkout is locked by a download in progress is kept.
+
+Every eviction is recorded in the ledger as it happens, so gc can be
+interrupted at any point and --limit bounds the work done per run.
+"""
+
+import os
+import shutil
+import time
+
+from cli import cache_layout, cache_ledger, content_store
+from cli.file_lock import FileLock
+
+TRASH_DIR = ".trash"
+DEFAULT_GRACE = 10 * 60
+
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+DURATION_UNITS = {"S": 1, "M": 60, "H": 3600, "D": 86400, "W": 7 * 86400}
+
+
+def parse_size(text):
+    """Bytes from "500M", "2G", "1.5T" or a plain number"""
+    text = text.strip().upper().rstrip("B").rstrip("I")
+    multiplier = SIZE_UNITS.get(text[-1:], 1)
+    if text[-1:] in SIZE_UNITS:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def parse_duration(text):
+    """Seconds from "30d", "12h", "45m", "90s", "2w" or a plain number of seconds"""
+    text = text.strip().upper()
+    multiplier = DURATION_UNITS.get(text[-1:], 1)
+    if text[-1:] in DURATION_UNITS:
+        text = text[:-1]
+    return float(text) * multiplier
+
+
+def last_used(entry):
+    return entry.last_used or entry.downloaded or 0
+
+
+def policy_max_age(entries, options, now, checkouts):
+    """Entries not used for longer than options["max_age"] seconds"""
+    cutoff = now - options["max_age"]
+    return [(entry, "unused for longer than the TTL") for entry in entries if last_used(entry) < cutoff]
+
+
+def policy_keep_versions(entries, options, now, checkouts):
+    """All but the options["keep_versions"] most recently used versions of each module"""
+    by_module = {}
+    for entry in entries:
+        by_module.setdefault(entry.module, []).append(entry)
+    evicted = []
+    for versions in by_module.values():
+        versions.sort(key=last_used, reverse=True)
+        evicted.extend((entry, "older version") for entry in versions[options["keep_versions"]:])
+    return evicted
+
+
+def policy_max_size(entries, options, now, checkouts):
+    """
+    Least recently used entries, until the entries and the checkouts they
+    reference fit in options["max_size"] bytes. A shared checkout is freed with
+    the last entry that references it.
+    """
+    references = {}
+    for entry in entries:
+        if entry.checkout:
+            references[entry.checkout] = references.get(entry.checkout, 0) + 1
+    total = sum(entry.size for entry in entries)
+    total += sum(checkouts.get(relpath, (0, 0))[0] for relpath in references)
+
+    evicted = []
+    for entry in sorted(entries, key=last_used):
+        if total <= options["max_size"]:
+            break
+        total -= entry.size
+        if entry.checkout:
+            references[entry.checkout] -= 1
+            if not references[entry.checkout]:
+                total -= checkouts.get(entry.checkout, (0, 0))[0]
+        evicted.append((entry, "least recently used over the size budget"))
+    return evicted
+
+
+# Option name -> policy, in the order they run
+POLICIES = [
+    ("max_age", policy_max_age),
+    ("keep_versions", policy_keep_versions),
+    ("max_size", policy_max_size),
+]
+
+
+def select_evictions(ledger, options, now, grace=DEFAULT_GRACE):
+    """
+    Run the enabled policies; returns [(entry, reason), ...] in eviction order.
+    Policies see every kept entry (recent versions count towards keep_versions,
+    recent sizes towards max_size), but entries used within the grace period
+    are never selected.
+    """
+    kept = sorted(ledger.entries.values(), key=lambda entry: (entry.module, entry.version))
+    cutoff = now - grace
+
+    selected = []
+    for name, policy in POLICIES:
+        if options.get(name) is None:
+            continue
+        chosen = [
+            (entry, reason)
+            for entry, reason in policy(kept, options, now, ledger.checkouts)
+            if last_used(entry) < cutoff
+        ]
+        evicted = {id(entry) for entry, _ in chosen}
+        selected.extend(chosen)
+        kept = [entry for entry in kept if id(entry) not in evicted]
+    return selected
+
+
+def get_trash_dir(cache_dir):
+    return os.path.join(cache_dir, TRASH_DIR)
+
+
+def move_to_trash(cache_dir, path, now):
+    """Atomically move a directory out of the cache; returns whether it existed"""
+    trash_dir = get_trash_dir(cache_dir)
+    os.makedirs(trash_dir, exist_ok=True)
+    name = os.path.relpath(path, cache_dir).replace(os.sep, "_")
+    try:
+        os.replace(path, os.path.join(trash_dir, f"{int(now)}-{os.getpid()}-{name}"))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def remove_empty_dir(path):
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def evict_entry(cache_dir, ledger, entry, now, dry_run=False):
+    """
+    Move an entry, and its checkout if no other entry references it, to the
+    trash and record it in the ledger. Returns the bytes freed.
+    """
+    if not dry_run:
+        entry_dir = cache_layout.get_entry_dir(cache_dir, entry.module, entry.version)
+        move_to_trash(cache_dir, entry_dir, now)
+        remove_empty_dir(os.path.dirname(entry_dir))
+        cache_ledger.append(cache_dir, "remove", module=entry.module, version=entry.version)
+    ledger.apply({"op": "remove", "module": entry.module, "version": entry.version})
+    freed = entry.size
+
+    if entry.checkout and entry.checkout not in ledger.references():
+        freed += evict_checkout(cache_dir, ledger, entry.checkout, now, dry_run)
+    return freed
+
+
+def evict_checkout(cache_dir, ledger, relpath, now, dry_run=False):
+    """Move a checkout and its sub-build to the trash; returns the bytes freed"""
+    if not dry_run:
+        trash_checkout(cache_dir, os.path.join(cache_dir, *relpath.split("/")), now)
+        cache_ledger.append(cache_dir, "remove_checkout", checkout=relpath)
+    freed = ledger.checkouts.get(relpath, (0, 0))[0]
+    ledger.apply({"op": "remove_checkout", "checkout": relpath})
+    return freed
+
+
+def orphan_checkouts(ledger, now, grace=DEFAULT_GRACE):
+    """Checkouts no entry references (e.g. left by a removed module), past the grace period"""
+    references = ledger.references()
+    return [
+        relpath
+        for relpath in sorted(ledger.checkouts)
+        if relpath not in references and (ledger.checkout_times.get(relpath) or 0) < now - grace
+    ]
+
+
+def empty_trash(cache_dir, now, grace=DEFAULT_GRACE):
+    """Delete trash older than the grace period; returns how many items were deleted"""
+    trash_dir = get_trash_dir(cache_dir)
+    try:
+        names = os.listdir(trash_dir)
+    except OSError:
+        return 0
+    deleted = 0
+    for name in names:
+        stamp = name.split("-", 1)[0]
+        if stamp.isdigit() and int(stamp) >= now - grace:
+            continue
+        path = os.path.join(trash_dir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+        deleted += 1
+    return deleted
+
+
+def prune_blobs(cache_dir, referenced, now, grace=DEFAULT_GRACE):
+    """
+    Delete store blobs whose digest is not in `referenced`. Linking a blob into
+    an entry updates its ctime, so blobs a download may be materializing right
+    now are kept.
+    """
+    removed = 0
+    for blob_path in content_store.iter_blobs(cache_dir):
+        if os.path.basename(blob_path) in referenced:
+            continue
+        try:
+            if os.stat(blob_path).st_ctime >= now - grace:
+                continue
+            os.remove(blob_path)
+        except OSError:
+            continue
+        removed += 1
+        remove_empty_dir(os.path.dirname(blob_path))
+    return removed
+
+
+def try_lock_checkout(cache_dir, relpath):
+    """Take a checkout's lock without waiting; returns the held FileLock, or None if busy"""
+    checkout_dir = os.path.join(cache_dir, *relpath.split("/"))
+    lock = FileLock(cache_layout.get_checkout_lock_path(checkout_dir))
+    return lock if lock.acquire(timeout=0) else None
+
+
+def lock_checkouts(cache_dir, checkout_dirs, timeout=None):
+    """
+    Take the lock of each checkout, waiting up to `timeout` for downloads in
+    progress; returns the held FileLocks, or raises TimeoutError holding none
+    """
+    locks = []
+    try:
+        for checkout_dir in checkout_dirs:
+            lock = FileLock(cache_layout.get_checkout_lock_path(checkout_dir))
+            if not lock.acquire(timeout=timeout):
+                relpath = os.path.relpath(checkout_dir, cache_dir).replace(os.sep, "/")
+                raise TimeoutError(f"Checkout {relpath} is still locked by a download in progress")
+            locks.append(lock)
+    except BaseException:
+        for lock in locks:
+            lock.release()
+        raise
+    return locks
+
+
+def trash_checkout(cache_dir, checkout_dir, now):
+    """Move a checkout and its sub-build to the trash"""
+    move_to_trash(cache_dir, checkout_dir, now)
+    move_to_trash(cache_dir, checkout_dir + cache_ledger.SUBBUILD_SUFFIX, now)
+    remove_empty_dir(os.path.dirname(checkout_dir))
+
+
+def stored_digests(cache_dir):
+    """Digests of the store blobs the module entries on disk refer to"""
+    return {meta.get("sha256") for _, _, _, meta in cache_layout.iter_entries(cache_dir)}
+
+
+def clear_module(cache_dir, module_name, timeout=None):
+    """
+    Move a module's entries to the trash (`cmakehub cache clear <module>`),
+    with the shared checkouts they point into that no other module uses.
+    The module's checkouts are locked first, as in clear_cache. Returns the
+    checkout directories removed.
+    """
+    now = time.time()
+    checkouts = sorted(cache_layout.get_module_checkouts(cache_dir, module_name))
+    locks = lock_checkouts(cache_dir, checkouts, timeout)
+    try:
+        in_use = {
+            cache_layout.get_entry_source_dir(cache_dir, entry_dir, meta)
+            for name, _, entry_dir, meta in cache_layout.iter_entries(cache_dir)
+            if name != module_name and meta.get("checkout")
+        }
+        removed = [checkout_dir for checkout_dir in checkouts if checkout_dir not in in_use]
+        move_to_trash(cache_dir, os.path.join(cache_dir, module_name), now)
+        for checkout_dir in removed:
+            trash_checkout(cache_dir, checkout_dir, now)
+        cache_ledger.record_removed(cache_dir, module_name, removed)
+    finally:
+        for lock in locks:
+            lock.release()
+
+    prune_blobs(cache_dir, stored_digests(cache_dir), now)
+    empty_trash(cache_dir, now)
+    return removed
+
+
+def clear_cache(cache_dir, module_names, timeout=None):
+    """
+    Move the given modules' entries and every shared checkout to the trash
+    (`cmakehub update --all`). Each checkout's lock is taken first, so
+    downloads in progress finish before anything moves; if one stays busy
+    past `timeout`, TimeoutError is raised and nothing is moved. Store blobs
+    and trash are then deleted like gc deletes them, past the grace period.
+    """
+    now = time.time()
+    checkouts = [
+        os.path.join(cache_dir, *relpath.split("/"))
+        for relpath in cache_ledger.iter_checkout_relpaths(cache_dir)
+    ]
+    locks = lock_checkouts(cache_dir, checkouts, timeout)
+    try:
+        for module_name in module_names:
+            move_to_trash(cache_dir, os.path.join(cache_dir, module_name), now)
+        for checkout_dir in checkouts:
+            trash_checkout(cache_dir, checkout_dir, now)
+        cache_ledger.reset(cache_dir)
+    finally:
+        for lock in locks:
+            lock.release()
+
+    # No entry refers to a blob any more, but a download may be linking one right now
+    prune_blobs(cache_dir, set(), now)
+    empty_trash(cache_dir, now)
+
+
+class GcResult:
+    """What a gc run did (or would do, for a dry run)"""
+
+    def __init__(self):
+        self.evicted = []
+        self.skipped = []
+        self.recent = 0
+        self.checkouts = []
+        self.freed = 0
+        self.blobs = 0
+        self.trash = 0
+
+
+def collect(cache_dir, ledger, offset, options, grace=DEFAULT_GRACE, limit=None, dry_run=False):
+    """
+    Evict what the policies select, at most `limit` entries. `offset` is the
+    ledger size `ledger` was read up to, so hits recorded since are seen.
+    A dry run only updates `ledger` in memory. Returns a GcResult.
+    """
+    now = time.time()
+    result = GcResult()
+    result.recent = sum(1 for entry in ledger.entries.values() if last_used(entry) >= now - grace)
+
+    for entry, reason in select_evictions(ledger, options, now, grace):
+        if limit is not None and len(result.evicted) >= limit:
+            break
+        if not dry_run:
+            # A build may have used the entry since the ledger was read
+            ledger, offset = cache_ledger.read_ledger(cache_dir, ledger, offset)
+        current = ledger.entries.get((entry.module, entry.version))
+        if current is None:
+            continue
+        if last_used(current) >= now - grace:
+            result.skipped.append(current)
+            continue
+        lock = None
+        if current.checkout and not dry_run:
+            lock = try_lock_checkout(cache_dir, current.checkout)
+            if lock is None:
+                result.skipped.append(current)
+                continue
+        try:
+            result.freed += evict_entry(cache_dir, ledger, current, now, dry_run)
+        finally:
+            if lock is not None:
+                lock.release()
+        result.evicted.append((current, reason))
+
+    for relpath in orphan_checkouts(ledger, now, grace):
+        lock = None if dry_run else try_lock_checkout(cache_dir, relpath)
+        if lock is None and not dry_run:
+            continue
+        try:
+            result.freed += evict_checkout(cache_dir, ledger, relpath, now, dry_run)
+        finally:
+            if lock is not None:
+                lock.release()
+        result.checkouts.append(relpath)
+
+    if not dry_run:
+        referenced = {entry.sha256 for entry in ledger.entries.values() if entry.sha256}
+        result.blobs = prune_blobs(cache_dir, referenced, now, grace)
+        result.trash = empty_trash(cache_dir, now, grace)
+    return result
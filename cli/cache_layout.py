@@ -0,0 +1,180 @@
+"""
+Module cache layout shared by the CLI and loader.cmake
+
+Repositories are checked out once per (repository, ref) under
+.repos/<repo key>/<ref>, where the key is the first 16 hex digits of the SHA-1
+of the repository URL. Each module keeps an entry in <module>/<version> whose
+.cmh_meta.json points into the shared checkout and records the SHA-256 of the
+module file; the file itself is a hardlink into the content store (see
+content_store). Entries written by older versions hold only the checkout
+reference, or a full clone of their own, and are still honoured.
+
+Downloads into a checkout hold its lock file, .repos/<repo key>/.<ref>.lock
+(see file_lock), and fill a temporary directory that is renamed into place
+once complete, so parallel configures never see a half-written checkout.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from cli import content_store
+from cli.fs_utils import write_atomic
+
+REPOS_DIR = ".repos"
+META_FILE = ".cmh_meta.json"
+CHECKOUT_MARKER = ".cmh_checkout.json"
+
+
+def repo_key(repository):
+    """Directory key for a repository URL (matches string(SHA1) in loader.cmake)"""
+    return hashlib.sha1(repository.encode("utf-8")).hexdigest()[:16]
+
+
+def get_checkout_relpath(repository, version):
+    """Cache-relative path of the shared checkout of one repository ref"""
+    return "/".join([REPOS_DIR, repo_key(repository), version])
+
+
+def get_checkout_dir(cache_dir, repository, version):
+    """Absolute path of the shared checkout of one repository ref"""
+    return os.path.join(cache_dir, *get_checkout_relpath(repository, version).split("/"))
+
+
+def get_checkout_lock_path(checkout_dir):
+    """Lock file serializing downloads into a checkout (matches loader.cmake)"""
+    parent, name = os.path.split(checkout_dir)
+    return os.path.join(parent, f".{name}.lock")
+
+
+def get_entry_dir(cache_dir, module_name, version):
+    """Directory of a module's cache entry"""
+    return os.path.join(cache_dir, module_name, version)
+
+
+def is_checkout_complete(checkout_dir):
+    """Whether a shared checkout finished downloading"""
+    return os.path.exists(os.path.join(checkout_dir, CHECKOUT_MARKER))
+
+
+def write_checkout_marker(checkout_dir, repository, version):
+    """Mark a shared checkout as complete"""
+    marker = {
+        "repository": repository,
+        "version": version,
+        "downloaded_at": datetime.now().isoformat(),
+    }
+    with open(os.path.join(checkout_dir, CHECKOUT_MARKER), "w") as f:
+        json.dump(marker, f, indent=2)
+
+
+def read_entry_meta(entry_dir):
+    """Read a module entry's metadata, or None if the entry is incomplete"""
+    try:
+        with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_entry_meta(entry_dir, module, version, checkout_relpath, digest=None, fingerprint=None):
+    """Write the .cmh_meta.json that marks a module entry as complete"""
+    os.makedirs(entry_dir, exist_ok=True)
+    metadata = {
+        "module": module.name,
+        "repository": module.repository or "",
+        "version": version,
+        "path": module.path or "",
+        "checkout": checkout_relpath,
+        "downloaded_at": datetime.now().isoformat(),
+    }
+    if digest:
+        metadata["sha256"] = digest
+        metadata.update(fingerprint or {})
+    # Readers do not take the checkout lock, so the metadata appears atomically
+    write_atomic(os.path.join(entry_dir, META_FILE), json.dumps(metadata, indent=2))
+
+
+def get_entry_source_dir(cache_dir, entry_dir, meta):
+    """Directory holding an entry's files: its shared checkout, or itself for legacy entries"""
+    checkout = meta.get("checkout") if meta else None
+    if checkout:
+        return os.path.join(cache_dir, *checkout.split("/"))
+    return entry_dir
+
+
+def get_entry_file(cache_dir, entry_dir, meta):
+    """Module file of an entry: its materialized copy, or the file in its checkout"""
+    path = meta.get("path", "").split("/")
+    entry_file = os.path.join(entry_dir, *path)
+    if meta.get("sha256") or not meta.get("checkout"):
+        return entry_file
+    return os.path.join(get_entry_source_dir(cache_dir, entry_dir, meta), *path)
+
+
+def is_entry_cached(cache_dir, module_name, version):
+    """Whether a module version is available in the cache and intact (a stat, not a re-hash)"""
+    entry_dir = get_entry_dir(cache_dir, module_name, version)
+    meta = read_entry_meta(entry_dir)
+    if meta is None:
+        return False
+    return content_store.is_intact(get_entry_file(cache_dir, entry_dir, meta), meta)
+
+
+def find_entry(cache_dirs, module_name, version):
+    """First of cache_dirs (the cache, then read-only layers) holding the entry intact, or None"""
+    for cache_dir in cache_dirs:
+        if is_entry_cached(cache_dir, module_name, version):
+            return cache_dir
+    return None
+
+
+def materialize_entry(cache_dir, module, version, checkout_relpath):
+    """
+    Add a module's file from its checkout to the content store, link it into
+    the module entry and write the entry metadata. The checkout's copy is
+    replaced by a link to the same blob, so each distinct file is stored once.
+    """
+    path = (module.path or "").split("/")
+    checkout_file = os.path.join(cache_dir, *checkout_relpath.split("/"), *path)
+    entry_dir = get_entry_dir(cache_dir, module.name, version)
+
+    digest = content_store.add_blob(cache_dir, checkout_file)
+    blob_path = content_store.get_blob_path(cache_dir, digest)
+    content_store.materialize(blob_path, checkout_file)
+    content_store.materialize(blob_path, os.path.join(entry_dir, *path))
+
+    fingerprint = content_store.file_fingerprint(blob_path)
+    write_entry_meta(entry_dir, module, version, checkout_relpath, digest, fingerprint)
+
+
+def iter_entries(cache_dir):
+    """Yield (module name, version, entry dir, meta) for every complete module entry"""
+    if not os.path.isdir(cache_dir):
+        return
+    for module_name in sorted(os.listdir(cache_dir)):
+        module_dir = os.path.join(cache_dir, module_name)
+        if module_name.startswith(".") or not os.path.isdir(module_dir):
+            continue
+        for version in sorted(os.listdir(module_dir)):
+            entry_dir = os.path.join(module_dir, version)
+            if not os.path.isdir(entry_dir):
+                continue
+            meta = read_entry_meta(entry_dir)
+            if meta is not None:
+                yield module_name, version, entry_dir, meta
+
+
+def get_module_checkouts(cache_dir, module_name):
+    """Shared checkout directories referenced by any version of a module"""
+    checkouts = set()
+    module_dir = os.path.join(cache_dir, module_name)
+    if not os.path.isdir(module_dir):
+        return checkouts
+    for version in os.listdir(module_dir):
+        entry_dir = os.path.join(module_dir, version)
+        meta = read_entry_meta(entry_dir)
+        if meta and meta.get("checkout"):
+            checkouts.add(get_entry_source_dir(cache_dir, entry_dir, meta))
+    return checkouts
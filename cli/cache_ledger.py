@@ -0,0 +1,439 @@
+"""
+Cache ledger shared by the CLI and loader.cmake
+
+.ledger.jsonl in the cache directory is an append-only log with one JSON
+event per line, so `cmakehub cache info` can report sizes, versions and usage
+without walking the cache:
+
+    {"op": "add", "module", "version", "checkout", "sha256", "file_size", "size", "files", "time"}
+    {"op": "checkout", "checkout", "size", "files", "time"}
+    {"op": "hit", "module", "version", "layer" (optional), "time"}
+    {"op": "miss", "module", "version", "time"}
+    {"op": "lookups", "hits": {layer: count}, "misses"}
+    {"op": "remove", "module", "version" (optional), "time"}
+    {"op": "remove_checkout", "checkout", "time"}
+
+Sizes follow one convention so they add up without double counting: a
+checkout record covers everything under the checkout and its -subbuild
+directory, and an entry record covers the files of the entry directory that
+are not hardlinks into its checkout (normally just .cmh_meta.json). Legacy
+entries holding a clone of their own count the whole clone.
+
+A hit with a "layer" was served from that read-only cache layer (see
+get_cache_layers in cli/cache_dirs.py); a miss is a use that found the
+module in no layer and downloaded it. "lookups" carries the totals of both
+through compaction.
+
+Events are only appended to an existing ledger. It is created, or rebuilt
+from the files on disk, by rescan(); a missing ledger means "unknown", never
+"empty". Appends and rewrites hold .ledger.lock, so a compaction cannot drop
+an event appended while it runs.
+"""
+
+import json
+import os
+import time
+
+from cli import cache_layout, content_store
+from cli.file_lock import FileLock, get_lock_timeout
+from cli.fs_utils import write_atomic
+
+LEDGER_FILE = ".ledger.jsonl"
+LEDGER_LOCK_FILE = ".ledger.lock"
+
+# Rewrite the ledger once it holds this many lines per live record
+COMPACT_RATIO = 4
+COMPACT_MIN_LINES = 256
+
+SUBBUILD_SUFFIX = "-subbuild"
+
+
+class LedgerEntry:
+    """What the ledger knows about one module version"""
+
+    __slots__ = ("module", "version", "checkout", "sha256", "file_size", "size", "files",
+                 "downloaded", "last_used", "hits")
+
+    def __init__(self, module, version):
+        self.module = module
+        self.version = version
+        self.checkout = None
+        self.sha256 = None
+        self.file_size = 0
+        self.size = 0
+        self.files = 0
+        self.downloaded = None
+        self.last_used = None
+        self.hits = 0
+
+    def to_event(self):
+        event = {"op": "add", "module": self.module, "version": self.version}
+        for field in ("checkout", "sha256", "file_size", "size", "files", "hits", "last_used"):
+            event[field] = getattr(self, field)
+        event["time"] = self.downloaded
+        return event
+
+
+class CacheLedger:
+    """State replayed from a ledger: entries by (module, version), checkouts by relpath"""
+
+    def __init__(self):
+        self.entries = {}
+        self.checkouts = {}
+        self.checkout_times = {}
+        # Uses served by each layer ("" is the writable cache), and downloads
+        self.layer_hits = {}
+        self.misses = 0
+        self.lines = 0
+
+    def apply(self, event):
+        op = event.get("op")
+        now = event.get("time")
+        if op == "add":
+            key = (event["module"], event["version"])
+            entry = self.entries.get(key) or LedgerEntry(*key)
+            entry.checkout = event.get("checkout") or None
+            entry.sha256 = event.get("sha256") or None
+            entry.file_size = event.get("file_size") or 0
+            entry.size = event.get("size") or 0
+            entry.files = event.get("files") or 0
+            entry.downloaded = now
+            # Compacted and rescanned records carry the usage they replace
+            entry.hits = event.get("hits", entry.hits)
+            entry.last_used = event.get("last_used", entry.last_used) or now
+            self.entries[key] = entry
+        elif op == "checkout":
+            self.checkouts[event["checkout"]] = (event.get("size") or 0, event.get("files") or 0)
+            self.checkout_times[event["checkout"]] = now
+        elif op == "hit":
+            layer = event.get("layer") or ""
+            self.layer_hits[layer] = self.layer_hits.get(layer, 0) + 1
+            entry = None if layer else self.entries.get((event["module"], event["version"]))
+            if entry is not None:
+                entry.hits += 1
+                entry.last_used = now
+        elif op == "miss":
+            self.misses += 1
+        elif op == "lookups":
+            self.layer_hits = dict(event.get("hits") or {})
+            self.misses = event.get("misses") or 0
+        elif op == "remove":
+            for key in list(self.entries):
+                if key[0] == event["module"] and event.get("version") in (None, key[1]):
+                    del self.entries[key]
+        elif op == "remove_checkout":
+            self.checkouts.pop(event["checkout"], None)
+            self.checkout_times.pop(event["checkout"], None)
+
+    def modules(self):
+        """{module name: [LedgerEntry, ...]} sorted by version"""
+        modules = {}
+        for key in sorted(self.entries):
+            modules.setdefault(key[0], []).append(self.entries[key])
+        return modules
+
+    def references(self):
+        """{checkout relpath: [LedgerEntry, ...]} of the entries pointing into each checkout"""
+        references = {}
+        for entry in self.entries.values():
+            if entry.checkout:
+                references.setdefault(entry.checkout, []).append(entry)
+        return references
+
+    def layer_stats(self, layers):
+        """
+        [(hits, misses), ...] for the writable cache and then each read-only
+        layer, in search order: a use misses every layer searched before the
+        one that served it
+        """
+        hits = [self.layer_hits.get("", 0)] + [self.layer_hits.get(layer, 0) for layer in layers]
+        stats = []
+        for index, layer_hits in enumerate(hits):
+            stats.append((layer_hits, sum(hits[index + 1:]) + self.misses))
+        return stats
+
+    def total(self):
+        """(bytes, files) of the whole cache"""
+        size = sum(entry.size for entry in self.entries.values())
+        files = sum(entry.files for entry in self.entries.values())
+        for checkout_size, checkout_files in self.checkouts.values():
+            size += checkout_size
+            files += checkout_files
+        return size, files
+
+    def events(self):
+        """The current state as a minimal list of events"""
+        events = [
+            {
+                "op": "checkout",
+                "checkout": relpath,
+                "size": size,
+                "files": files,
+                "time": self.checkout_times.get(relpath),
+            }
+            for relpath, (size, files) in sorted(self.checkouts.items())
+        ]
+        events.extend(self.entries[key].to_event() for key in sorted(self.entries))
+        if self.layer_hits or self.misses:
+            events.append({"op": "lookups", "hits": self.layer_hits, "misses": self.misses})
+        return events
+
+
+def get_ledger_path(cache_dir):
+    return os.path.join(cache_dir, LEDGER_FILE)
+
+
+def get_ledger_lock_path(cache_dir):
+    return os.path.join(cache_dir, LEDGER_LOCK_FILE)
+
+
+def append(cache_dir, op, **fields):
+    """Append an event to the ledger, if there is one"""
+    path = get_ledger_path(cache_dir)
+    if not os.path.exists(path):
+        return
+    event = dict(op=op, **fields)
+    event.setdefault("time", int(time.time()))
+    with FileLock(get_ledger_lock_path(cache_dir), timeout=get_lock_timeout()):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, separators=(", ", ": ")) + "\n")
+
+
+def read_ledger(cache_dir, ledger=None, offset=0):
+    """
+    Replay the ledger; returns (CacheLedger, size of the file read), or (None, 0)
+    if there is none. Pass a ledger and the size it was read up to, to apply
+    only the events appended since. A last line without its newline is still
+    being written, so it is left for the next read.
+    """
+    path = get_ledger_path(cache_dir)
+    ledger = ledger or CacheLedger()
+    size = offset
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                size += len(line)
+                ledger.lines += 1
+                try:
+                    ledger.apply(json.loads(line.decode("utf-8")))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # A torn or foreign line; the next rescan repairs what it described
+                    continue
+    except OSError:
+        return None, 0
+    return ledger, size
+
+
+def write_ledger(cache_dir, ledger, expected_size=None):
+    """
+    Replace the ledger with the events of a state. With expected_size, the
+    ledger is left alone if it grew since it was read, or if another process
+    holds its lock, so no append is lost. Returns whether it was written.
+    """
+    path = get_ledger_path(cache_dir)
+    timeout = 0 if expected_size is not None else get_lock_timeout()
+    lock = FileLock(get_ledger_lock_path(cache_dir), timeout=timeout)
+    if not lock.acquire(timeout):
+        if expected_size is not None:
+            return False
+        raise TimeoutError(f"{lock.path} is still locked after {timeout:g}s")
+    try:
+        if expected_size is not None:
+            try:
+                if os.path.getsize(path) != expected_size:
+                    return False
+            except OSError:
+                return False
+        text = "".join(json.dumps(e, separators=(", ", ": ")) + "\n" for e in ledger.events())
+        write_atomic(path, text)
+    finally:
+        lock.release()
+    return True
+
+
+def maybe_compact(cache_dir, ledger, size):
+    """Rewrite a ledger that has grown much longer than the state it describes"""
+    live = len(ledger.entries) + len(ledger.checkouts)
+    if ledger.lines >= COMPACT_MIN_LINES and ledger.lines > COMPACT_RATIO * max(1, live):
+        write_ledger(cache_dir, ledger, expected_size=size)
+
+
+def reset(cache_dir):
+    """Start an empty ledger, e.g. after the whole cache was cleared"""
+    os.makedirs(cache_dir, exist_ok=True)
+    write_ledger(cache_dir, CacheLedger())
+
+
+def ensure_started(cache_dir):
+    """Start an empty ledger for a cache that holds no modules or checkouts yet"""
+    if os.path.exists(get_ledger_path(cache_dir)):
+        return
+    names = os.listdir(cache_dir) if os.path.isdir(cache_dir) else []
+    if any(
+        (not name.startswith(".") or name == cache_layout.REPOS_DIR)
+        and os.path.isdir(os.path.join(cache_dir, name))
+        for name in names
+    ):
+        return
+    reset(cache_dir)
+
+
+def scan_tree(path):
+    """{(device, inode): size} of every file below a directory, using os.scandir"""
+    files = {}
+    stack = [path]
+    while stack:
+        try:
+            iterator = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with iterator:
+            for item in iterator:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        stack.append(item.path)
+                    else:
+                        stat = item.stat(follow_symlinks=False)
+                        files[(stat.st_dev, stat.st_ino)] = stat.st_size
+                except OSError:
+                    continue
+    return files
+
+
+def count_unseen(files, seen):
+    """(size, count) of the files not in seen, adding them to it"""
+    size = 0
+    count = 0
+    for key, file_size in files.items():
+        if key not in seen:
+            seen.add(key)
+            size += file_size
+            count += 1
+    return size, count
+
+
+def record_checkout(cache_dir, checkout_relpath):
+    """Record a checkout that was just downloaded"""
+    if not os.path.exists(get_ledger_path(cache_dir)):
+        return
+    checkout_dir = os.path.join(cache_dir, *checkout_relpath.split("/"))
+    files = scan_tree(checkout_dir)
+    files.update(scan_tree(checkout_dir + SUBBUILD_SUFFIX))
+    append(
+        cache_dir, "checkout", checkout=checkout_relpath,
+        size=sum(files.values()), files=len(files),
+    )
+
+
+def record_entry(cache_dir, module_name, version):
+    """Record a module entry that was just written"""
+    if not os.path.exists(get_ledger_path(cache_dir)):
+        return
+    entry_dir = cache_layout.get_entry_dir(cache_dir, module_name, version)
+    meta = cache_layout.read_entry_meta(entry_dir) or {}
+    files = scan_tree(entry_dir)
+    if meta.get("checkout") and meta.get("sha256"):
+        # The module file is a hardlink counted with the checkout
+        blob = content_store.get_blob_path(cache_dir, meta["sha256"])
+        try:
+            stat = os.stat(blob)
+            files.pop((stat.st_dev, stat.st_ino), None)
+        except OSError:
+            pass
+    append(
+        cache_dir, "add", module=module_name, version=version,
+        checkout=meta.get("checkout"), sha256=meta.get("sha256"), file_size=meta.get("size", 0),
+        size=sum(files.values()), files=len(files),
+    )
+
+
+def record_removed(cache_dir, module_name, checkout_dirs=()):
+    """Record the removal of a module's entries and the checkouts removed with them"""
+    append(cache_dir, "remove", module=module_name)
+    for checkout_dir in checkout_dirs:
+        relpath = os.path.relpath(checkout_dir, cache_dir).replace(os.sep, "/")
+        append(cache_dir, "remove_checkout", checkout=relpath)
+
+
+def iter_checkout_relpaths(cache_dir):
+    """Cache-relative paths of the shared checkouts on disk"""
+    repos_dir = os.path.join(cache_dir, cache_layout.REPOS_DIR)
+    try:
+        keys = sorted(os.listdir(repos_dir))
+    except OSError:
+        return
+    for key in keys:
+        try:
+            versions = sorted(os.listdir(os.path.join(repos_dir, key)))
+        except OSError:
+            continue
+        for version in versions:
+            # Skip sub-builds, lock files and downloads in progress
+            if not version.endswith(SUBBUILD_SUFFIX) and not version.startswith("."):
+                yield "/".join([cache_layout.REPOS_DIR, key, version])
+
+
+def rescan(cache_dir, jobs=8):
+    """
+    Rebuild the ledger from the files on disk, walking directories in parallel,
+    and keep the usage (hits, last used) recorded for entries still present.
+    Returns the new CacheLedger.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    previous, _ = read_ledger(cache_dir)
+    ledger = CacheLedger()
+
+    checkouts = list(iter_checkout_relpaths(cache_dir))
+    entries = []
+    for module_name in sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []:
+        module_dir = os.path.join(cache_dir, module_name)
+        if module_name.startswith(".") or not os.path.isdir(module_dir):
+            continue
+        for version in sorted(os.listdir(module_dir)):
+            if os.path.isdir(os.path.join(module_dir, version)):
+                entries.append((module_name, version))
+
+    def scan_checkout(relpath):
+        checkout_dir = os.path.join(cache_dir, *relpath.split("/"))
+        files = scan_tree(checkout_dir)
+        files.update(scan_tree(checkout_dir + SUBBUILD_SUFFIX))
+        return files
+
+    # scandir and stat release the GIL, so directories are walked concurrently
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        checkout_files = list(executor.map(scan_checkout, checkouts))
+        entry_files = list(
+            executor.map(
+                lambda key: scan_tree(cache_layout.get_entry_dir(cache_dir, *key)), entries
+            )
+        )
+
+    # Checkouts first, so files hardlinked into entries are counted with their checkout
+    now = int(time.time())
+    seen = set()
+    for relpath, files in zip(checkouts, checkout_files):
+        ledger.checkouts[relpath] = count_unseen(files, seen)
+        ledger.checkout_times[relpath] = (previous.checkout_times.get(relpath) if previous else None) or now
+    for key, files in zip(entries, entry_files):
+        entry = LedgerEntry(*key)
+        meta = cache_layout.read_entry_meta(cache_layout.get_entry_dir(cache_dir, *key)) or {}
+        entry.checkout = meta.get("checkout") or None
+        entry.sha256 = meta.get("sha256") or None
+        entry.file_size = meta.get("size", 0)
+        entry.size, entry.files = count_unseen(files, seen)
+        old = previous.entries.get(key) if previous else None
+        entry.downloaded = old.downloaded if old else now
+        entry.last_used = old.last_used if old else now
+        entry.hits = old.hits if old else 0
+        ledger.entries[key] = entry
+    if previous:
+        ledger.layer_hits = previous.layer_hits
+        ledger.misses = previous.misses
+
+    os.makedirs(cache_dir, exist_ok=True)
+    write_ledger(cache_dir, ledger)
+    return ledger
@@ -0,0 +1,106 @@
+"""
+Client for `cmakehub serve`
+
+Requests are JSON-RPC 2.0 objects sent over the server's Unix socket, one
+JSON document per line (see cli/server.py for the methods). main.py forwards
+read-only commands to a running server, so they skip loading the index;
+without a server, or if it does not answer in time, they run in-process as usual.
+"""
+
+import json
+import os
+import sys
+
+SOCKET_NAME = ".server.sock"
+
+# Seconds a forwarded command may take before the CLI runs it in-process instead
+CALL_TIMEOUT = 10.0
+
+# Commands a running server answers for the CLI
+SERVED_COMMANDS = ("list", "search", "info", "check")
+
+
+class ServerError(Exception):
+    """A JSON-RPC error returned by the server"""
+
+    def __init__(self, code, message, data=None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+def get_socket_path():
+    """Socket of the server: $CMH_SERVER_SOCKET, or .server.sock in the cache directory"""
+    if os.environ.get("CMH_SERVER_SOCKET"):
+        return os.environ["CMH_SERVER_SOCKET"]
+    from cli.cache_dirs import get_cache_dir
+
+    return os.path.join(get_cache_dir(), SOCKET_NAME)
+
+
+def get_call_timeout():
+    """Seconds to wait for the server to answer a forwarded command (CMH_SERVER_TIMEOUT)"""
+    try:
+        return float(os.environ.get("CMH_SERVER_TIMEOUT", CALL_TIMEOUT))
+    except ValueError:
+        return CALL_TIMEOUT
+
+
+def connect(socket_path=None, timeout=None):
+    """Open a connection to the server"""
+    # Imported here: most CLI runs never connect, and socket is not free to import
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix domain sockets are not supported on this platform")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path or get_socket_path())
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def call(method, params=None, socket_path=None, timeout=CALL_TIMEOUT):
+    """
+    Call a server method and return its result; raises ServerError on an RPC
+    error and OSError (socket.timeout included) if the server does not reply
+    within timeout seconds (None: wait forever)
+    """
+    request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}
+    with connect(socket_path, timeout) as sock:
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise OSError("Server closed the connection without replying")
+    response = json.loads(line.decode("utf-8"))
+    if "error" in response:
+        error = response["error"]
+        raise ServerError(error.get("code"), error.get("message", ""), error.get("data"))
+    return response.get("result")
+
+
+def run_on_server(argv):
+    """
+    Run a CLI command on a running server and print its output.
+    Returns the exit code, or None if the command should run in-process
+    (not a served command, no server, or CMH_NO_SERVER is set).
+    """
+    if not argv or argv[0] not in SERVED_COMMANDS or os.environ.get("CMH_NO_SERVER"):
+        return None
+
+    socket_path = get_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        result = call("run", {"argv": argv}, socket_path, timeout=get_call_timeout())
+    except (OSError, ValueError, ServerError):
+        # A stale socket, a hung or busy server, or one that cannot run the command
+        return None
+
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    return result["exit_code"]
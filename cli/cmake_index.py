@@ -0,0 +1,145 @@
+"""
+Precompiled CMake module index
+
+loader.cmake parses modules.json with string(JSON), which re-parses the whole
+document on every call. This module compiles modules.json into a CMake script
+that sets the same global properties the loader's parser would, with every
+module field pre-extracted, so a configure needs no JSON parsing at all.
+
+The script is written next to the index as <index name>_index.cmake (for
+example modules.json -> modules_index.cmake). The loader includes it only when
+it is newer than the index, was compiled from identical contents and has the
+format it reads (COMPILED_INDEX_FORMAT); otherwise it parses the JSON.
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+from cli.fs_utils import write_atomic
+from cli.sharded_index import is_sharded
+
+# Bump with the loader's index_format whenever the generated layout changes
+COMPILED_INDEX_FORMAT = 1
+
+
+def get_compiled_index_path(modules_json_path):
+    """Path of the compiled CMake index for a modules.json (matches loader.cmake)"""
+    directory, filename = os.path.split(modules_json_path)
+    return os.path.join(directory, os.path.splitext(filename)[0] + "_index.cmake")
+
+
+def cmake_bracket(value):
+    """Quote a string as a CMake bracket argument, which needs no escaping"""
+    # A newline right after the opening bracket is dropped by CMake
+    if value.startswith("\n"):
+        value = "\n" + value
+    level = 0
+    while f"]{'=' * level}]" in value or value.endswith("]" + "=" * level):
+        level += 1
+    return f"[{'=' * level}[{value}]{'=' * level}]"
+
+
+def field_value(value):
+    """A JSON field as string(JSON GET) returns it: scalars as text, arrays/objects as JSON"""
+    # Arrays and objects differ from CMake's output only in whitespace
+    if isinstance(value, bool):
+        return "ON" if value else "OFF"
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def cmake_list(values):
+    """A CMake list literal of plain names"""
+    return cmake_bracket(";".join(values))
+
+
+def compile_index(modules_json_path, output_path=None):
+    """
+    Write the compiled CMake index for a modules.json, returning its path.
+    Sharded indexes are not compiled (None is returned): the loader already
+    parses only the shards it needs.
+    """
+    with open(modules_json_path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    data = json.loads(raw.decode("utf-8"))
+    if is_sharded(data):
+        return None
+    modules = data.get("modules", [])
+
+    names = []
+    categories = {}
+    tags = {}
+    body = []
+    for module in modules:
+        name = module["name"]
+        # Keep the first definition of a duplicated name, like the loader does
+        if name in names:
+            continue
+        names.append(name)
+
+        if module.get("category"):
+            categories.setdefault(module["category"], []).append(name)
+        for tag in module.get("tags", []):
+            tags.setdefault(tag, []).append(name)
+
+        body.append(f"# {name}")
+        info_json = json.dumps(module, ensure_ascii=False)
+        body.append(
+            f'set_property(GLOBAL PROPERTY "CMH_MODULE_{name}_INFO_JSON" {cmake_bracket(info_json)})'
+        )
+        body.append(f'set_property(GLOBAL PROPERTY "CMH_MODULE_{name}_FIELDS" {cmake_list(module)})')
+        for field, value in module.items():
+            body.append(
+                f'set_property(GLOBAL PROPERTY "CMH_MODULE_{name}_FIELD_{field}" '
+                f"{cmake_bracket(field_value(value))})"
+            )
+
+    lines = [
+        f"# Generated by 'cmakehub compile-index' from {os.path.basename(modules_json_path)}.",
+        "# Do not edit; it is rebuilt whenever the index changes.",
+        f"set(CMH_COMPILED_INDEX_FORMAT {COMPILED_INDEX_FORMAT})",
+        f'set(CMH_COMPILED_INDEX_SHA256 "{digest}")',
+        "# Compiled from a different index, or for a loader reading another format:",
+        "# leave everything to the JSON parser",
+        "if(NOT CMH_COMPILED_INDEX_SHA256 STREQUAL index_sha256 OR NOT CMH_COMPILED_INDEX_FORMAT EQUAL index_format)",
+        "    return()",
+        "endif()",
+        "",
+        f"set_property(GLOBAL PROPERTY CMH_INDEX_MODULES {cmake_list(names)})",
+        f"set_property(GLOBAL PROPERTY CMH_INDEX_CATEGORIES {cmake_list(categories)})",
+        f"set_property(GLOBAL PROPERTY CMH_INDEX_TAGS {cmake_list(tags)})",
+        f"set_property(GLOBAL PROPERTY CMH_INDEX_LENGTH {len(modules)})",
+        f"set_property(GLOBAL PROPERTY CMH_INDEX_CURSOR {len(modules)})",
+    ]
+    for category, members in categories.items():
+        lines.append(
+            f'set_property(GLOBAL PROPERTY "CMH_CATEGORY_{category}_MODULES" {cmake_list(members)})'
+        )
+    for tag, members in tags.items():
+        lines.append(f'set_property(GLOBAL PROPERTY "CMH_TAG_{tag}_MODULES" {cmake_list(members)})')
+    lines.append("")
+    lines.extend(body)
+
+    output_path = output_path or get_compiled_index_path(modules_json_path)
+    write_atomic(output_path, "\n".join(lines) + "\n")
+    return output_path
+
+
+def try_compile_index(modules_json_path):
+    """
+    compile_index() for commands that update an index: a compiled index that
+    cannot be written (e.g. into a read-only installation) only costs
+    configures the JSON parsing, so it is a warning and None is returned.
+    """
+    try:
+        return compile_index(modules_json_path)
+    except OSError as e:
+        print(f"⚠ Could not write the compiled CMake index: {e}", file=sys.stderr)
+        print("  Configures will parse the JSON index instead", file=sys.stderr)
+        return None
@@ -0,0 +1,137 @@
+"""
+Bundle modules - Pack cached modules into one archive and restore it offline
+"""
+
+import os
+import sys
+import time
+
+from cli import bundle, lockfile
+from cli.cache_dirs import get_cache_dir, get_cache_dirs
+from cli.commands.fetch import count_repositories, fetch_locked, fetch_modules, print_summary
+from cli.commands.lock import collect_modules
+from cli.registry import get_registry
+
+
+def select_modules(args):
+    """
+    The (module, version) pairs to bundle, with their dependencies, and the
+    registry they came from (None for --locked, which needs no index)
+    """
+    if args.locked:
+        lock = lockfile.read_lock(args.locked)
+        if lock is None:
+            raise FileNotFoundError(f"Lock file not found: {args.locked}")
+        modules = [
+            (lockfile.locked_module(name, entry), entry["commit"])
+            for name, entry in sorted(lock.get("modules", {}).items())
+        ]
+        return modules, None
+
+    registry = get_registry()
+    if args.all:
+        return [(m, m.version or "master") for m in registry.modules], registry
+    if args.category:
+        requested = {m.name: None for m in registry.in_category(args.category)}
+    elif args.modules:
+        requested = {name: None for name in args.modules}
+    else:
+        requested = lockfile.find_used_modules(args.source or ".")
+    return collect_modules(registry, requested), registry
+
+
+def get_index_snapshot(modules, registry):
+    """Index holding the bundled modules at the bundled versions"""
+    categories = {}
+    if registry is not None:
+        used = {module.category for module, _ in modules}
+        categories = {name: value for name, value in registry.categories.items() if name in used}
+    return {
+        "schema_version": "1.0",
+        "categories": categories,
+        "modules": [module.replace(version=version).to_dict() for module, version in modules],
+    }
+
+
+def create(args):
+    """Download the selected modules if needed and pack them into a bundle"""
+    try:
+        modules, registry = select_modules(args)
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e.args[0]}", file=sys.stderr)
+        return 1
+    if not modules:
+        print("No modules to bundle")
+        print("Specify module names, --category <name>, --all, --locked or --source <project dir>")
+        return 1
+
+    start = time.perf_counter()
+    print(f"Bundling {len(modules)} module(s) into {args.output}...")
+    print("-" * 80)
+
+    # Make sure everything is cached; modules already cached are not downloaded
+    if args.locked:
+        if fetch_locked(args.locked, jobs=args.jobs) != 0:
+            return 1
+    else:
+        pinned = [module.replace(version=version) for module, version in modules]
+        results = fetch_modules(pinned, jobs=args.jobs, quiet=True)
+        if not all(r.ok for r in results):
+            print_summary(results, time.perf_counter() - start, count_repositories(pinned))
+            return 1
+
+    cache_dirs = get_cache_dirs()
+    entries = []
+    for module, version in modules:
+        record, path = bundle.get_bundle_entry(cache_dirs, module, version)
+        if record is None:
+            print(f"Error: {module.name} ({version}) is not in the cache", file=sys.stderr)
+            return 1
+        entries.append((record, path))
+
+    files = bundle.write_bundle(args.output, entries, get_index_snapshot(modules, registry))
+    print(
+        f"Wrote {args.output}: {len(entries)} module(s), {files} file(s), "
+        f"{os.path.getsize(args.output) / (1024 * 1024):.2f} MB in {time.perf_counter() - start:.1f}s"
+    )
+    return 0
+
+
+def restore(args):
+    """Unpack a bundle into the cache"""
+    if args.file != "-" and not os.path.exists(args.file):
+        print(f"Error: Bundle not found: {args.file}", file=sys.stderr)
+        return 1
+
+    cache_dir = get_cache_dir()
+    start = time.perf_counter()
+    result = bundle.import_bundle(args.file, cache_dir, index_output=args.index)
+
+    for record in result.modules:
+        state = "imported" if record in result.imported else "already cached"
+        print(f"  ✓ {record['name']} ({record['version']}) {state}")
+    print()
+    print(
+        f"Imported {len(result.modules)} module(s) into {cache_dir} in {time.perf_counter() - start:.1f}s: "
+        f"{len(result.imported)} added, {len(result.cached)} already cached, "
+        f"{result.blobs} new file(s) ({result.bytes / (1024 * 1024):.2f} MB)"
+    )
+    if args.index:
+        print(f"Wrote the bundle's index to {args.index}")
+    return 0
+
+
+def bundle_modules(args):
+    """Create or import offline module bundles"""
+    try:
+        if args.bundle_action == "create":
+            return create(args)
+        elif args.bundle_action == "import":
+            return restore(args)
+        else:
+            print("Usage: cmakehub bundle {create,import} ...")
+            return 1
+
+    except Exception as e:
+        print(f"Error managing bundle: {e}", file=sys.stderr)
+        return 1
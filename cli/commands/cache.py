@@ -6,21 +6,110 @@ import os
 import shutil
 import json
 import sys
+import time
+from datetime import datetime
 
+from cli import cache_layout, cache_ledger, content_store
+from cli.cache_dirs import get_cache_dir, get_cache_layers
 
-def get_cache_dir():
-    """Get the CMakeHub cache directory"""
-    # Check environment variable first
-    if "CMH_CACHE_DIR" in os.environ:
-        return os.environ["CMH_CACHE_DIR"]
 
-    # Default locations
-    if os.name == "nt":  # Windows
-        cache_dir = os.path.join(os.environ.get("USERPROFILE", "~"), ".cmakehub", "cache")
-    else:  # Unix-like
-        cache_dir = os.path.join(os.environ.get("HOME", "~"), ".cmakehub", "cache")
+def list_cached_modules(cache_dir):
+    """List module directories in the cache, skipping internal dot-directories"""
+    return [
+        d
+        for d in os.listdir(cache_dir)
+        if not d.startswith(".") and os.path.isdir(os.path.join(cache_dir, d))
+    ]
 
-    return os.path.expanduser(cache_dir)
+
+def remove_module_cache(cache_dir, module_name):
+    """
+    Remove a module's cache entries and the shared checkouts they point into
+    that no other cached module uses, waiting for downloads into them to finish
+    """
+    from cli import cache_gc
+    from cli.file_lock import get_lock_timeout
+
+    cache_gc.clear_module(cache_dir, module_name, timeout=get_lock_timeout())
+
+
+def load_ledger(cache_dir, rescan=False, jobs=8):
+    """The cache ledger, rebuilt from disk if asked to or if there is none yet"""
+    if not rescan:
+        ledger, size = cache_ledger.read_ledger(cache_dir)
+        if ledger is not None:
+            cache_ledger.maybe_compact(cache_dir, ledger, size)
+            return ledger
+
+    start = time.perf_counter()
+    ledger = cache_ledger.rescan(cache_dir, jobs=jobs)
+    print(
+        f"Scanned {len(ledger.entries)} module entries and {len(ledger.checkouts)} "
+        f"checkout(s) in {time.perf_counter() - start:.2f}s"
+    )
+    print()
+    return ledger
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else "never"
+
+
+def get_gc_options(args):
+    """Eviction policy options from the command line, falling back to the environment"""
+    from cli.cache_gc import parse_duration, parse_size
+
+    max_size = args.max_size or os.environ.get("CMH_CACHE_MAX_SIZE")
+    max_age = args.max_age or os.environ.get("CMH_CACHE_MAX_AGE")
+    return {
+        "max_size": parse_size(max_size) if max_size else None,
+        "max_age": parse_duration(max_age) if max_age else None,
+        "keep_versions": args.keep_versions,
+    }
+
+
+def collect_garbage(cache_dir, args):
+    """Evict cache entries selected by the eviction policies"""
+    from cli import cache_gc
+
+    options = get_gc_options(args)
+    grace = cache_gc.parse_duration(args.grace)
+    if not any(value is not None for value in options.values()):
+        print("No eviction policy given; only removing unreferenced checkouts and old trash")
+        print("Use --max-size, --max-age or --keep-versions to evict modules")
+        print()
+
+    ledger, offset = cache_ledger.read_ledger(cache_dir)
+    if ledger is None:
+        ledger = load_ledger(cache_dir, rescan=True)
+        ledger, offset = cache_ledger.read_ledger(cache_dir)
+    size_before, _ = ledger.total()
+
+    result = cache_gc.collect(
+        cache_dir, ledger, offset, options, grace=grace, limit=args.limit, dry_run=args.dry_run
+    )
+
+    verb = "Would evict" if args.dry_run else "Evicted"
+    marker = "-" if args.dry_run else "✓"
+    for entry, reason in result.evicted:
+        print(f"  {marker} {entry.module} ({entry.version}): {reason}")
+    for relpath in result.checkouts:
+        print(f"  {marker} {relpath}: no module uses it")
+    for entry in result.skipped:
+        print(f"  ! {entry.module} ({entry.version}): in use during gc, kept")
+
+    size_after = size_before - result.freed
+    print()
+    print(
+        f"{verb} {len(result.evicted)} module entries and {len(result.checkouts)} unused "
+        f"checkout(s), {result.freed / (1024 * 1024):.2f} MB "
+        f"({size_before / (1024 * 1024):.2f} MB -> {size_after / (1024 * 1024):.2f} MB)"
+    )
+    if result.recent:
+        print(f"{result.recent} module entries used within the last {args.grace} were not considered")
+    if not args.dry_run and (result.blobs or result.trash):
+        print(f"Deleted {result.blobs} unreferenced stored file(s) and {result.trash} trash item(s)")
+    return 0
 
 
 def cache_manager(args):
@@ -41,53 +130,111 @@ def cache_manager(args):
             print(f"Cache Directory: {cache_dir}")
             print()
 
-            # Count modules in cache
-            modules = [
-                d for d in os.listdir(cache_dir) if os.path.isdir(os.path.join(cache_dir, d))
-            ]
+            # Sizes and usage come from the ledger, so nothing is walked here
+            ledger = load_ledger(cache_dir, rescan=args.rescan, jobs=args.jobs)
+            modules = ledger.modules()
+
+            layers = get_cache_layers()
+            if layers:
+                print("Cache Layers (searched in order):")
+                print("-" * 80)
+                stats = ledger.layer_stats(layers)
+                for index, (layer, (hits, misses)) in enumerate(zip([cache_dir] + layers, stats)):
+                    mode = "writable" if index == 0 else "read-only"
+                    missing = "" if os.path.isdir(layer) else ", missing"
+                    print(f"  {index + 1}. {layer} ({mode}{missing}): {hits} hit(s), {misses} miss(es)")
+                print()
 
             if not modules:
                 print("Cache is empty")
                 return 0
 
-            total_size = 0
-            total_files = 0
+            # Shared checkouts and the module entries that reference them
+            references = ledger.references()
+
+            apparent_size = 0
 
             print(f"Cached Modules ({len(modules)}):")
             print("-" * 80)
 
-            for module_name in sorted(modules):
-                module_dir = os.path.join(cache_dir, module_name)
-                module_size = 0
-                module_files = 0
-
-                for root, dirs, files in os.walk(module_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        module_size += os.path.getsize(file_path)
-                        module_files += 1
+            for module_name, entries in sorted(modules.items()):
+                module_size = sum(entry.size for entry in entries)
+                module_files = sum(entry.files for entry in entries)
 
-                total_size += module_size
-                total_files += module_files
+                # Include the shared checkouts this module points into
+                checkouts = sorted({entry.checkout for entry in entries if entry.checkout})
+                for checkout in checkouts:
+                    checkout_size, checkout_files = ledger.checkouts.get(checkout, (0, 0))
+                    module_size += checkout_size
+                    module_files += checkout_files
+                apparent_size += module_size
 
                 # Format size
                 size_mb = module_size / (1024 * 1024)
                 print(f"  {module_name}")
                 print(f"    Size: {size_mb:.2f} MB ({module_size:,} bytes)")
                 print(f"    Files: {module_files}")
-
-                # Show versions
-                versions = [
-                    d for d in os.listdir(module_dir) if os.path.isdir(os.path.join(module_dir, d))
-                ]
-                if versions:
-                    print(f"    Versions: {', '.join(versions)}")
+                print(f"    Versions: {', '.join(entry.version for entry in entries)}")
+                hits = sum(entry.hits for entry in entries)
+                last_used = max((entry.last_used or 0) for entry in entries)
+                print(f"    Used: {hits} time(s), last {format_time(last_used)}")
+                for checkout in checkouts:
+                    shared_by = len(references.get(checkout, []))
+                    print(f"    Checkout: {checkout} (shared by {shared_by} module(s))")
                 print()
 
-            # Total statistics
+            # Total statistics; the ledger counts files hardlinked between
+            # entries, checkouts and the content store only once
+            total_size, total_files = ledger.total()
+
             total_size_mb = total_size / (1024 * 1024)
             print(f"Total: {total_size_mb:.2f} MB ({total_size:,} bytes) in {total_files} files")
 
+            if references:
+                saved = apparent_size - total_size
+                print(
+                    f"Shared checkouts: {len(references)} repository ref(s) used by "
+                    f"{sum(len(names) for names in references.values())} module entries"
+                )
+                print(
+                    f"Saved by sharing: {saved / (1024 * 1024):.2f} MB ({saved:,} bytes) "
+                    f"versus one clone per module"
+                )
+
+            blobs = {entry.sha256: entry.file_size for entry in ledger.entries.values() if entry.sha256}
+            if blobs:
+                store_size = sum(blobs.values())
+                print(
+                    f"Content store: {len(blobs)} unique file(s), "
+                    f"{store_size / (1024 * 1024):.2f} MB ({store_size:,} bytes)"
+                )
+
+        elif args.cache_action == "gc":
+            return collect_garbage(cache_dir, args)
+
+        elif args.cache_action == "verify":
+            # Check cached module files against their recorded SHA-256 digests
+            checked = 0
+            damaged = []
+            for module_name, version, entry_dir, meta in cache_layout.iter_entries(cache_dir):
+                if args.module and module_name != args.module:
+                    continue
+                entry_file = cache_layout.get_entry_file(cache_dir, entry_dir, meta)
+                checked += 1
+                if content_store.is_intact(entry_file, meta, deep=args.deep):
+                    print(f"  ✓ {module_name} ({version})")
+                else:
+                    print(f"  ✗ {module_name} ({version}): modified or missing")
+                    damaged.append(module_name)
+
+            print()
+            mode = "re-hashed" if args.deep else "checked by size and mtime"
+            print(f"Verified {checked} module entries ({mode}): {len(damaged)} damaged")
+            if damaged:
+                print("Download them again with:")
+                print(f"  cmakehub fetch {' '.join(sorted(set(damaged)))}")
+                return 1
+
         elif args.cache_action == "clear":
             # Clear cache
             if args.module:
@@ -107,7 +254,7 @@ def cache_manager(args):
                         print("Cancelled")
                         return 0
 
-                shutil.rmtree(module_cache_dir)
+                remove_module_cache(cache_dir, args.module)
                 print(f"Cache cleared for module: {args.module}")
 
             else:
@@ -121,14 +268,15 @@ def cache_manager(args):
                         print("Cancelled")
                         return 0
 
-                # Remove all module caches
-                modules = [
-                    d for d in os.listdir(cache_dir) if os.path.isdir(os.path.join(cache_dir, d))
-                ]
+                # Remove all module caches and shared checkouts once downloads
+                # into them finish, then the index snapshots
+                from cli import cache_gc
+                from cli.file_lock import get_lock_timeout
 
+                modules = sorted(list_cached_modules(cache_dir))
+                cache_gc.clear_cache(cache_dir, modules, timeout=get_lock_timeout())
+                shutil.rmtree(os.path.join(cache_dir, ".index"), ignore_errors=True)
                 for module_name in modules:
-                    module_dir = os.path.join(cache_dir, module_name)
-                    shutil.rmtree(module_dir)
                     print(f"Cleared cache for: {module_name}")
 
                 print(f"\nCache directory cleared: {cache_dir}")
@@ -2,44 +2,47 @@
 Check module compatibility - Must call CMake for version comparison
 """
 
+import os
 import sys
 import subprocess
-from cli.package_data import load_modules_json, get_loader_path
+from cli.fuzzy_index import did_you_mean
+from cli.package_data import get_loader_path
+from cli.registry import get_registry
+
+
+def get_current_platform():
+    """Platform name as used by the "platform" field of modules.json"""
+    if os.name == "nt":
+        return "windows"
+    if sys.platform == "darwin":
+        return "macos"
+    return "linux"
 
 
 def check_compatibility(args):
     """Check module compatibility using CMake for version comparison"""
     try:
-        data = load_modules_json()
+        registry = get_registry()
         loader_path = get_loader_path()
 
-        modules = data.get("modules", [])
-
-        # Find the module
-        module = None
-        for m in modules:
-            if m["name"] == args.module:
-                module = m
-                break
+        module = registry.get(args.module)
 
         if not module:
             print(f"Error: Module '{args.module}' not found", file=sys.stderr)
+            hint = did_you_mean(args.module)
+            if hint:
+                print(hint, file=sys.stderr)
             return 1
 
         print("=" * 80)
-        print(f"Compatibility Check: {module['name']}")
+        print(f"Compatibility Check: {module.name}")
         print("=" * 80)
         print()
 
         # Check platform (can be done in Python)
-        platform = module.get("platform", [])
+        platform = module.platform
         print("Platform Support:")
-        if os.name == "nt":
-            current_platform = "windows"
-        elif sys.platform == "darwin":
-            current_platform = "macos"
-        else:
-            current_platform = "linux"
+        current_platform = get_current_platform()
 
         print(f"  Required: {', '.join(platform) or 'All platforms'}")
         print(f"  Current:  {current_platform}")
@@ -54,11 +57,11 @@ def check_compatibility(args):
         print()
 
         # Check dependencies (can be done in Python)
-        dependencies = module.get("dependencies", [])
+        dependencies = module.dependencies
         print("Dependencies:")
         if dependencies:
             for dep in dependencies:
-                dep_found = any(m["name"] == dep for m in modules)
+                dep_found = dep in registry
                 status = "✓ Available" if dep_found else "⚠ Not found in index"
                 print(f"  - {dep}: {status}")
         else:
@@ -66,7 +69,7 @@ def check_compatibility(args):
         print()
 
         # Check conflicts (can be done in Python)
-        conflicts = module.get("conflicts", [])
+        conflicts = module.conflicts
         print("Conflicts:")
         if conflicts:
             for conflict in conflicts:
@@ -84,9 +87,9 @@ def check_compatibility(args):
 cmake_minimum_required(VERSION 3.19)
 
 # Get module info
-set(MODULE_NAME "{module['name']}")
-set(CMAKE_MIN_REQUIRED "{module.get('cmake_minimum_required', '')}")
-set(CPP_MIN_REQUIRED "{module.get('cpp_minimum_required', '')}")
+set(MODULE_NAME "{module.name}")
+set(CMAKE_MIN_REQUIRED "{module.cmake_minimum_required or ''}")
+set(CPP_MIN_REQUIRED "{module.cpp_minimum_required or ''}")
 
 # Check CMake version
 message(STATUS "CMake Version:")
@@ -0,0 +1,33 @@
+"""
+Compile index - Precompile modules.json into a CMake include for the loader
+"""
+
+import os
+import sys
+import time
+
+from cli.cmake_index import compile_index
+
+
+def compile_modules_index(args):
+    """Write <index>_index.cmake next to a modules.json"""
+    try:
+        index_path = os.path.abspath(args.index)
+        if not os.path.exists(index_path):
+            print(f"Error: Index not found: {index_path}", file=sys.stderr)
+            return 1
+
+        start = time.perf_counter()
+        output_path = compile_index(index_path, args.output)
+        if output_path is None:
+            print(f"{index_path} is a sharded index: the loader reads its shards directly")
+            return 0
+        print(f"✓ Compiled {index_path}")
+        print(f"  → {output_path} ({time.perf_counter() - start:.2f}s)")
+        if args.output:
+            print("Note: loader.cmake only picks up the compiled index next to modules.json")
+        return 0
+
+    except Exception as e:
+        print(f"Error compiling index: {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,475 @@
+"""
+Fetch modules - Download many modules into the cache concurrently
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from cli import cache_layout, cache_ledger, content_store, lockfile
+from cli.cache_dirs import get_cache_dir, get_cache_layers
+from cli.file_lock import FileLock, get_lock_timeout
+from cli.registry import get_registry
+from cli.transfer import Transfer, get_host
+
+DEFAULT_JOBS = 8
+
+COMMIT_RE = re.compile(r"^[0-9a-fA-F]{40}$")
+
+# git errors worth retrying: the network or the server, not the ref or the repository
+TRANSIENT_GIT_ERRORS = re.compile(
+    r"could not resolve host|failed to connect|couldn't connect|connection (reset|refused)"
+    r"|timed out|early eof|remote end hung up|rpc failed|unexpected disconnect"
+    r"|error: (429|5\d\d)",
+    re.IGNORECASE,
+)
+
+
+class FetchResult:
+    """Outcome of fetching one module"""
+
+    def __init__(self, name, version, ok, cached=False, error=None, seconds=0.0, layer=None):
+        self.name = name
+        self.version = version
+        self.ok = ok
+        self.cached = cached
+        self.error = error
+        self.seconds = seconds
+        # Read-only cache layer holding the module, if not the cache itself
+        self.layer = layer
+
+    def get_cache_dir(self, cache_dir):
+        """Cache directory holding the fetched entry"""
+        return self.layer or cache_dir
+
+
+def get_fetch_mode():
+    """Fetch backend: "sparse" (default) fetches only module files, "full" clones everything"""
+    return os.environ.get("CMH_FETCH_MODE", "sparse").lower()
+
+
+def run_git(args, cwd=None):
+    """Run a git command, returning (ok, stderr)"""
+    result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True)
+    return result.returncode == 0, result.stderr.strip()
+
+
+def sparse_patterns(paths):
+    """Non-cone sparse-checkout patterns matching exactly the given files"""
+    return "".join(f"/{path.lstrip('/')}\n" for path in paths)
+
+
+def get_sparse_file(dest_dir):
+    """Path of a checkout's sparse-checkout pattern file"""
+    return os.path.join(dest_dir, ".git", "info", "sparse-checkout")
+
+
+def read_sparse_paths(dest_dir):
+    """Files selected by an existing sparse checkout (empty for full clones)"""
+    try:
+        with open(get_sparse_file(dest_dir), "r", encoding="utf-8") as f:
+            return [line.strip().lstrip("/") for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def shallow_fetch(repository, version, dest_dir, paths=None):
+    """
+    Check out one ref (branch, tag or commit) at depth 1. When paths are given,
+    the fetch is blob-less with a sparse checkout, so only the blobs of the
+    selected files are downloaded.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    steps = [["init", "-q"], ["remote", "add", "origin", repository]]
+    if paths:
+        steps.append(["config", "core.sparseCheckout", "true"])
+    for step in steps:
+        ok, error = run_git(step, cwd=dest_dir)
+        if not ok:
+            return False, error
+
+    fetch_cmd = ["fetch", "-q", "--depth", "1"]
+    if paths:
+        with open(get_sparse_file(dest_dir), "w", encoding="utf-8") as f:
+            f.write(sparse_patterns(paths))
+        fetch_cmd.append("--filter=blob:none")
+
+    ok, error = run_git(fetch_cmd + ["origin", version], cwd=dest_dir)
+    if ok:
+        ok, error = run_git(["checkout", "-q", "FETCH_HEAD"], cwd=dest_dir)
+    if ok and not all(os.path.exists(os.path.join(dest_dir, path)) for path in paths or []):
+        ok, error = False, "checkout is missing module files"
+    return ok, error
+
+
+def add_sparse_paths(dest_dir, paths):
+    """Add files to an existing sparse checkout; their blobs are fetched on demand"""
+    with open(get_sparse_file(dest_dir), "a", encoding="utf-8") as f:
+        f.write(sparse_patterns(paths))
+    ok, _ = run_git(["read-tree", "-mu", "HEAD"], cwd=dest_dir)
+    return ok and all(os.path.exists(os.path.join(dest_dir, path)) for path in paths)
+
+
+def clone_repository(repository, version, dest_dir, paths=None):
+    """
+    Download one ref of a repository, returning (ok, error message).
+    When paths are given and the fetch mode is sparse, only those files are
+    fetched; a full shallow checkout is the fallback.
+    """
+    if paths and get_fetch_mode() == "sparse":
+        ok, error = shallow_fetch(repository, version, dest_dir, paths)
+        if ok:
+            return True, None
+        shutil.rmtree(dest_dir, ignore_errors=True)
+
+    ok, error = shallow_fetch(repository, version, dest_dir)
+    return ok, None if ok else error
+
+
+def resolve_commit(repository, version):
+    """
+    Resolve a branch or tag to the commit it points to, returning (commit, error).
+    Full commit SHAs are returned as they are.
+    """
+    if COMMIT_RE.match(version):
+        return version.lower(), None
+
+    result = subprocess.run(
+        ["git", "ls-remote", repository, version], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip()
+
+    refs = {}
+    for line in result.stdout.splitlines():
+        commit, _, ref = line.partition("\t")
+        refs[ref] = commit
+
+    # Annotated tags resolve through their peeled ^{} entry
+    for ref in (f"refs/heads/{version}", f"refs/tags/{version}^{{}}", f"refs/tags/{version}"):
+        if ref in refs:
+            return refs[ref], None
+    return None, f"ref '{version}' not found in {repository}"
+
+
+def is_transient(error):
+    """Whether a git error message looks like a network failure worth retrying"""
+    return bool(error and TRANSIENT_GIT_ERRORS.search(error))
+
+
+def resolve_commits(refs, jobs=DEFAULT_JOBS):
+    """Resolve many (repository, version) pairs concurrently; returns {ref: (commit, error)}"""
+    transfer = Transfer.from_environment(jobs=jobs)
+
+    async def resolve_all():
+        return await asyncio.gather(
+            *(
+                transfer.call(
+                    get_host(repository),
+                    resolve_commit,
+                    repository,
+                    version,
+                    retry_if=lambda result: result[0] is None and is_transient(result[1]),
+                )
+                for repository, version in refs
+            )
+        )
+
+    return dict(zip(refs, transfer.run(resolve_all())))
+
+
+def replace_dir(src, dest):
+    """Move a finished download to dest, replacing leftovers of an interrupted or stale one"""
+    if os.path.exists(dest):
+        stale = tempfile.mkdtemp(dir=os.path.dirname(dest), prefix=".tmp-")
+        os.replace(dest, os.path.join(stale, "old"))
+        os.replace(src, dest)
+        shutil.rmtree(stale, ignore_errors=True)
+    else:
+        os.replace(src, dest)
+
+
+def fetch_group(cache_dir, repository, version, modules, layers=()):
+    """
+    Fetch every module that shares one (repository, version): the repository is
+    checked out once under .repos/ and each module entry points into it.
+    Modules found in a read-only cache layer are not downloaded. The download
+    holds the checkout's lock, so a configure or another command fetching the
+    same ref at the same time waits and reuses the result.
+    """
+    start = time.perf_counter()
+    results = []
+    missing = []
+    for module in modules:
+        found = cache_layout.find_entry([cache_dir] + list(layers), module.name, version)
+        if found is None:
+            missing.append(module)
+            continue
+        layer = None if found == cache_dir else found
+        results.append(FetchResult(module.name, version, True, cached=True, layer=layer))
+    if not missing:
+        return results
+
+    checkout_dir = cache_layout.get_checkout_dir(cache_dir, repository, version)
+    lock = FileLock(cache_layout.get_checkout_lock_path(checkout_dir), timeout=get_lock_timeout())
+    try:
+        with lock:
+            results.extend(fetch_group_locked(cache_dir, repository, version, missing, start))
+    except TimeoutError as e:
+        elapsed = time.perf_counter() - start
+        results.extend(FetchResult(m.name, version, False, error=str(e), seconds=elapsed) for m in missing)
+    return results
+
+
+def fetch_group_locked(cache_dir, repository, version, modules, start):
+    """Fetch a group while holding its checkout lock; entries another process finished are reused"""
+    results = []
+    pending = []
+    damaged = False
+
+    for module in modules:
+        if cache_layout.is_entry_cached(cache_dir, module.name, version):
+            results.append(FetchResult(module.name, version, True, cached=True))
+            continue
+        pending.append(module)
+
+        # A modified file means its blob and the checkout copy, which are the
+        # same hardlinked file, are modified too: download the ref again
+        entry_dir = cache_layout.get_entry_dir(cache_dir, module.name, version)
+        meta = cache_layout.read_entry_meta(entry_dir)
+        if meta and meta.get("sha256"):
+            content_store.discard_blob(cache_dir, meta["sha256"])
+            damaged = True
+
+    if not pending:
+        return results
+
+    checkout_dir = cache_layout.get_checkout_dir(cache_dir, repository, version)
+    checkout_relpath = cache_layout.get_checkout_relpath(repository, version)
+    reused = cache_layout.is_checkout_complete(checkout_dir) and not damaged
+
+    paths = [module.path or "" for module in pending]
+    missing = [path for path in paths if not os.path.exists(os.path.join(checkout_dir, path))]
+
+    # Nothing is downloaded when the checkout already holds every module file
+    cached = reused and not missing
+    if reused and missing:
+        # A sparse checkout made for other modules of this repository
+        reused = add_sparse_paths(checkout_dir, missing)
+        if reused:
+            cache_ledger.record_checkout(cache_dir, checkout_relpath)
+
+    if not reused:
+        # Download again, keeping the files the other modules rely on
+        kept = [path for path in read_sparse_paths(checkout_dir) if path not in paths]
+        paths = kept + paths
+
+        # Download next to the checkout and move it into place once complete
+        os.makedirs(os.path.dirname(checkout_dir), exist_ok=True)
+        download_dir = tempfile.mkdtemp(dir=os.path.dirname(checkout_dir), prefix=".tmp-")
+        ok, error = clone_repository(repository, version, download_dir, paths)
+        if not ok:
+            shutil.rmtree(download_dir, ignore_errors=True)
+            elapsed = time.perf_counter() - start
+            results.extend(
+                FetchResult(m.name, version, False, error=error, seconds=elapsed)
+                for m in pending
+            )
+            return results
+        cache_layout.write_checkout_marker(download_dir, repository, version)
+        replace_dir(download_dir, checkout_dir)
+        cache_ledger.record_checkout(cache_dir, checkout_relpath)
+
+    for module in pending:
+        cache_layout.materialize_entry(cache_dir, module, version, checkout_relpath)
+        cache_ledger.record_entry(cache_dir, module.name, version)
+        results.append(
+            FetchResult(
+                module.name, version, True, cached=cached, seconds=time.perf_counter() - start
+            )
+        )
+
+    return results
+
+
+def group_modules(modules, version=None):
+    """Modules by the (repository, version) they are downloaded from; version overrides each module's"""
+    groups = {}
+    for module in modules:
+        module_version = version or module.version or "master"
+        groups.setdefault((module.repository or "", module_version), []).append(module)
+    return groups
+
+
+def count_repositories(modules, version=None):
+    """Number of (repository, version) downloads fetch_modules() makes for modules"""
+    return len(group_modules(modules, version))
+
+
+def fetch_modules(modules, jobs=DEFAULT_JOBS, version=None, quiet=False):
+    """
+    Download modules into the cache, at most `jobs` repositories at a time.
+    Modules sharing a (repository, version) are downloaded once; downloads
+    that fail with a network error are retried with backoff.
+    Returns the list of FetchResult objects.
+    """
+    cache_dir = get_cache_dir()
+    layers = get_cache_layers()
+    # A new cache starts with an empty ledger, so it never needs a rescan
+    cache_ledger.ensure_started(cache_dir)
+
+    # Deduplicate by (repository, version)
+    groups = group_modules(modules, version)
+
+    total = len(modules)
+    results = []
+
+    def report(result):
+        results.append(result)
+        if quiet:
+            return
+        if result.cached:
+            status = f"✓ cached in {result.layer}" if result.layer else "✓ cached"
+        elif result.ok:
+            status = f"✓ downloaded ({result.seconds:.1f}s)"
+        else:
+            status = f"✗ failed: {result.error}"
+        print(f"  [{len(results)}/{total}] {result.name} ({result.version}) {status}")
+
+    def should_retry(group_results):
+        return any(not r.ok and is_transient(r.error) for r in group_results)
+
+    transfer = Transfer.from_environment(jobs=jobs)
+
+    async def fetch_all():
+        downloads = []
+        for (repository, module_version), group in groups.items():
+            if not repository:
+                for module in group:
+                    report(FetchResult(module.name, module_version, False, error="no repository URL"))
+                continue
+            downloads.append(
+                transfer.call(
+                    get_host(repository),
+                    fetch_group,
+                    cache_dir,
+                    repository,
+                    module_version,
+                    group,
+                    layers,
+                    retry_if=should_retry,
+                )
+            )
+
+        # Results are reported on the event loop thread as each repository completes
+        for download in asyncio.as_completed(downloads):
+            for result in await download:
+                report(result)
+
+    transfer.run(fetch_all())
+    return results
+
+
+def print_summary(results, elapsed, repositories):
+    """Print the totals of a fetch run"""
+    downloaded = sum(1 for r in results if r.ok and not r.cached)
+    cached = sum(1 for r in results if r.cached)
+    failed = sum(1 for r in results if not r.ok)
+
+    print()
+    print(
+        f"Fetched {len(results)} module(s) from {repositories} repositories "
+        f"in {elapsed:.1f}s: {downloaded} downloaded, {cached} already cached, {failed} failed"
+    )
+
+
+def fetch_locked(lock_path, jobs=DEFAULT_JOBS):
+    """
+    Download the modules pinned by a lock file. Entries already cached with the
+    locked digest are skipped without reading the module index or the network.
+    """
+    lock = lockfile.read_lock(lock_path)
+    if lock is None:
+        print(f"Error: Lock file not found: {lock_path}", file=sys.stderr)
+        print("Create it with 'cmakehub lock'", file=sys.stderr)
+        return 1
+
+    cache_dir = get_cache_dir()
+    cache_dirs = [cache_dir] + get_cache_layers()
+    entries = lock.get("modules", {})
+    stale = {
+        name: entry
+        for name, entry in entries.items()
+        if not any(lockfile.is_lock_entry_cached(d, name, entry) for d in cache_dirs)
+    }
+    print(f"{len(entries) - len(stale)} of {len(entries)} locked module(s) already cached")
+    if not stale:
+        return 0
+
+    start = time.perf_counter()
+    modules = [lockfile.locked_module(name, entry) for name, entry in sorted(stale.items())]
+    results = fetch_modules(modules, jobs=jobs)
+
+    # A commit always has the same content, so a mismatch means the lock is stale or edited
+    for result in results:
+        if not result.ok:
+            continue
+        entry_dir = cache_layout.get_entry_dir(result.get_cache_dir(cache_dir), result.name, result.version)
+        meta = cache_layout.read_entry_meta(entry_dir) or {}
+        if meta.get("sha256") != stale[result.name].get("sha256"):
+            result.ok = False
+            result.error = "file digest does not match the lock file"
+            print(f"  ✗ {result.name}: {result.error}", file=sys.stderr)
+
+    print_summary(results, time.perf_counter() - start, count_repositories(modules))
+    return 0 if all(r.ok for r in results) else 1
+
+
+def fetch(args):
+    """Download modules into the cache concurrently"""
+    try:
+        if args.locked:
+            return fetch_locked(args.locked, jobs=args.jobs)
+
+        registry = get_registry()
+
+        if args.all:
+            modules = list(registry.modules)
+        elif args.category:
+            modules = list(registry.in_category(args.category))
+        else:
+            modules = []
+            for name in args.modules:
+                module = registry.get(name)
+                if not module:
+                    print(f"Error: Module '{name}' not found", file=sys.stderr)
+                    return 1
+                modules.append(module)
+
+        if not modules:
+            print("No modules to fetch")
+            print("Specify module names, --category <name> or --all")
+            return 0
+
+        repositories = count_repositories(modules, args.version)
+        print(f"Fetching {len(modules)} module(s) with {args.jobs} job(s)...")
+        print(f"  Cache: {get_cache_dir()}")
+        print("-" * 80)
+
+        start = time.perf_counter()
+        results = fetch_modules(modules, jobs=args.jobs, version=args.version)
+        print_summary(results, time.perf_counter() - start, repositories)
+
+        return 0 if all(r.ok for r in results) else 1
+
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Error fetching modules: {e}", file=sys.stderr)
+        return 1
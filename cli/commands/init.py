@@ -5,7 +5,9 @@ Init project - Initialize a new project with CMakeHub
 import os
 import shutil
 import sys
+from cli.cmake_index import try_compile_index
 from cli.package_data import get_loader_path, get_package_data_path
+from cli.sharded_index import get_shard_dir, load_shard_manifest
 
 
 def init_project(args):
@@ -42,6 +44,18 @@ def init_project(args):
         shutil.copy(modules_json_path, modules_json_dest)
         print(f"✓ Copied modules.json to project root")
 
+        # A sharded index also needs its shard files
+        manifest = load_shard_manifest(modules_json_path)
+        if manifest:
+            shutil.copytree(
+                get_shard_dir(modules_json_path, manifest), get_shard_dir(modules_json_dest, manifest)
+            )
+            print(f"✓ Copied {len(manifest['shards'])} index shards")
+
+        # Precompiled index, so configures skip JSON parsing
+        if try_compile_index(modules_json_dest):
+            print(f"✓ Compiled modules_index.cmake")
+
         # Create CMakeLists.txt
         cmake_content = f"""cmake_minimum_required(VERSION 3.19)
 project({project_name} VERSION 1.0.0 LANGUAGES CXX)
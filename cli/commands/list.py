@@ -3,54 +3,64 @@ List all available modules
 """
 
 import sys
-from cli.package_data import load_modules_json
+from cli.package_data import iter_modules
 
 
 def list_modules(args):
     """List all available modules"""
     try:
-        data = load_modules_json()
+        if args.compact:
+            # Names only: a single streaming pass, whatever the size of the index
+            found = False
+            for module in iter_modules():
+                if args.category and module.get("category", "uncategorized") != args.category:
+                    continue
+                print(f"{module['name']}")
+                found = True
+            if not found:
+                print(f"No modules found")
+            return 0
+
+        # Imported here so the streaming path does not load the registry machinery
+        from cli.registry import get_registry
+
+        registry = get_registry()
 
-        modules = data.get("modules", [])
-        categories = data.get("categories", {})
+        modules = registry.modules
+        categories = registry.categories
 
         # Filter by category if specified
         if args.category:
-            modules = [m for m in modules if m.get("category") == args.category]
+            modules = registry.in_category(args.category)
 
         if not modules:
             print(f"No modules found")
             return 0
 
-        if args.compact:
-            # Compact output
-            for module in modules:
-                print(f"{module['name']}")
-        else:
-            # Detailed output
-            print("=" * 80)
-            print(f"Available Modules ({len(modules)} total)")
-            print("=" * 80)
-            print()
-
-            # Group by category
-            by_category = {}
-            for module in modules:
-                cat = module.get("category", "uncategorized")
-                if cat not in by_category:
-                    by_category[cat] = []
-                by_category[cat].append(module)
-
-            for category, cat_modules in sorted(by_category.items()):
-                cat_name = categories.get(category, category)
-                print(f"\n{cat_name} ({len(cat_modules)} modules)")
-                print("-" * 80)
-
-                for module in sorted(cat_modules, key=lambda x: x["name"]):
-                    print(f"  • {module['name']}")
-                    if module.get("description"):
-                        print(f"    {module['description']}")
-                    print()
+        # Detailed output
+        print("=" * 80)
+        print(f"Available Modules ({len(modules)} total)")
+        print("=" * 80)
+        print()
+
+        # Group by category
+        by_category = {}
+        for module in modules:
+            cat = module.category or "uncategorized"
+            if cat not in by_category:
+                by_category[cat] = []
+            by_category[cat].append(module)
+
+        for category, cat_modules in sorted(by_category.items()):
+            cat_name = categories.get(category, category)
+            print(f"\n{cat_name} ({len(cat_modules)} modules)")
+            print("-" * 80)
+
+            for module in sorted(cat_modules, key=lambda x: x.name):
+                print(f"  • {module.name}")
+                if module.description:
+                    print(f"    {module.description}")
+                print()
 
         return 0
 
@@ -0,0 +1,108 @@
+"""
+Lock modules - Pin the modules a project uses to commits and file digests
+"""
+
+import os
+import sys
+import time
+
+from cli import cache_layout, lockfile
+from cli.cache_dirs import get_cache_dirs
+from cli.commands.fetch import count_repositories, fetch_modules, print_summary, resolve_commits
+from cli.fuzzy_index import did_you_mean
+from cli.registry import get_registry
+
+
+def collect_modules(registry, requested):
+    """
+    Expand {module name: version or None} with every transitive dependency.
+    Returns a list of (module, version) in discovery order. Raises KeyError
+    for an unknown module and ValueError if two of the modules conflict.
+    """
+    collected = {}
+    queue = list(requested.items())
+    while queue:
+        name, version = queue.pop(0)
+        if name in collected:
+            continue
+        module = registry.get(name)
+        if not module:
+            hint = did_you_mean(name)
+            raise KeyError(f"Module '{name}' not found" + (f". {hint}" if hint else ""))
+        collected[name] = (module, version or module.version or "master")
+        queue.extend((dep, None) for dep in module.dependencies)
+
+    for module, _ in collected.values():
+        for conflict in module.conflicts:
+            if conflict in collected:
+                raise ValueError(f"Module '{module.name}' conflicts with module '{conflict}'")
+    return list(collected.values())
+
+
+def lock(args):
+    """Write cmakehub.lock for the modules a project uses"""
+    try:
+        lock_path = os.path.abspath(args.file)
+
+        if args.modules:
+            requested = {name: args.version for name in args.modules}
+        else:
+            source_dir = args.source or os.path.dirname(lock_path)
+            requested = lockfile.find_used_modules(source_dir)
+            if not requested:
+                print(f"No cmakehub_use() calls found in {source_dir}")
+                print("Specify module names or --source <project dir>")
+                return 1
+
+        try:
+            modules = collect_modules(get_registry(), requested)
+        except (KeyError, ValueError) as e:
+            print(f"Error: {e.args[0]}", file=sys.stderr)
+            return 1
+
+        print(f"Locking {len(modules)} module(s)...")
+        print("-" * 80)
+        start = time.perf_counter()
+
+        # Resolve floating refs to commits; modules sharing a ref resolve once
+        refs = sorted({(m.repository or "", version) for m, version in modules})
+        resolved = resolve_commits(refs, jobs=args.jobs)
+
+        pinned = []
+        for module, version in modules:
+            commit, error = resolved[(module.repository or "", version)]
+            if not commit:
+                print(f"Error: Cannot resolve {module.name} ({version}): {error}", file=sys.stderr)
+                return 1
+            pinned.append(module.replace(version=commit))
+
+        # Download each module at its commit to record the file digest
+        results = fetch_modules(pinned, jobs=args.jobs)
+        if not all(r.ok for r in results):
+            print_summary(results, time.perf_counter() - start, count_repositories(pinned))
+            return 1
+
+        # Entries may be served by a read-only cache layer
+        cache_dirs = get_cache_dirs()
+        entries = {}
+        for (module, version), pinned_module in zip(modules, pinned):
+            commit = pinned_module.version
+            cache_dir = cache_layout.find_entry(cache_dirs, module.name, commit) or cache_dirs[0]
+            entry_dir = cache_layout.get_entry_dir(cache_dir, module.name, commit)
+            meta = cache_layout.read_entry_meta(entry_dir)
+            entries[module.name] = lockfile.make_lock_entry(
+                module, version, commit, meta.get("sha256")
+            )
+
+        lockfile.write_lock(lock_path, entries)
+
+        print()
+        for name, entry in sorted(entries.items()):
+            print(f"  {name:<30} {entry['version']:<10} {entry['commit'][:12]}")
+        print()
+        print(f"Wrote {lock_path} in {time.perf_counter() - start:.1f}s")
+        return 0
+
+    except Exception as e:
+        print(f"Error locking modules: {e}", file=sys.stderr)
+        return 1
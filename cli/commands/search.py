@@ -3,49 +3,86 @@ Search for modules
 """
 
 import sys
-from cli.package_data import load_modules_json
+from cli.fuzzy_index import get_fuzzy_index
+from cli.module import Module
+from cli.package_data import iter_modules
+from cli.registry import get_registry
+from cli.search_index import get_search_index
 
 
-def search_modules(args):
-    """Search for modules"""
-    try:
-        data = load_modules_json()
+def substring_matches(modules, keyword):
+    """Plain substring scan over name, description and tags"""
+    keyword = keyword.lower()
+    results = []
+    for module in modules:
+        name = (module.name or "").lower()
+        description = (module.description or "").lower()
+        tags = " ".join(module.tags).lower()
+
+        if keyword in name or keyword in description or keyword in tags:
+            results.append(module)
+    return results
 
-        modules = data.get("modules", [])
-        keyword = args.keyword.lower()
 
-        # Filter by keyword
-        results = []
-        for module in modules:
-            # Search in name, description, tags
-            name = module.get("name", "").lower()
-            description = module.get("description", "").lower()
-            tags = " ".join(module.get("tags", [])).lower()
+def fuzzy_matches(registry, keyword):
+    """Modules whose name or tags are close spellings of any keyword word"""
+    fuzzy_index = get_fuzzy_index()
+    names = []
+    for word in keyword.split():
+        for name in fuzzy_index.suggest_modules(word, limit=None):
+            if name not in names:
+                names.append(name)
+    return [registry.get(name) for name in names]
 
-            if keyword in name or keyword in description or keyword in tags:
-                results.append(module)
 
-        # Filter by category if specified
-        if args.category:
-            results = [m for m in results if m.get("category") == args.category]
+def find_modules(registry, keyword, category=None, match_any=False, fuzzy=False):
+    """Modules matching a search, best first"""
+    if fuzzy:
+        # Typo-tolerant lookup against names and tags
+        results = fuzzy_matches(registry, keyword)
+    else:
+        # Ranked lookup in the inverted index
+        ranked = get_search_index().search(keyword, match_all=not match_any)
+        results = [registry.get(name) for name, score in ranked]
+
+        # Fall back to a streaming substring scan for keywords that are not token prefixes
+        if not results:
+            results = substring_matches(map(Module.from_dict, iter_modules()), keyword)
+
+    # Filter by category if specified
+    if category:
+        results = [m for m in results if m.category == category]
+    return results
+
+
+def search_modules(args):
+    """Search for modules"""
+    try:
+        results = find_modules(
+            get_registry(), args.keyword, args.category, match_any=args.any, fuzzy=args.fuzzy
+        )
 
         if not results:
             print(f"No modules found matching '{args.keyword}'")
             return 0
 
+        found = len(results)
+        if args.limit:
+            results = results[: args.limit]
+
         print("=" * 80)
-        print(f"Search Results: '{args.keyword}' ({len(results)} found)")
+        print(f"Search Results: '{args.keyword}' ({found} found)")
         print("=" * 80)
         print()
 
         for module in results:
-            print(f"Module: {module['name']}")
-            print(f"  Description: {module.get('description', 'N/A')}")
-            print(f"  Category: {module.get('category', 'N/A')}")
-            print(f"  Repository: {module.get('repository', 'N/A')}")
-            print(f"  License: {module.get('license', 'N/A')}")
-            if module.get("tags"):
-                print(f"  Tags: {', '.join(module['tags'])}")
+            print(f"Module: {module.name}")
+            print(f"  Description: {module.description or 'N/A'}")
+            print(f"  Category: {module.category or 'N/A'}")
+            print(f"  Repository: {module.repository or 'N/A'}")
+            print(f"  License: {module.license or 'N/A'}")
+            if module.tags:
+                print(f"  Tags: {', '.join(module.tags)}")
             print()
 
         return 0
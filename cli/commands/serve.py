@@ -0,0 +1,34 @@
+"""
+Serve - Keep the index in memory and answer CLI and editor requests on a Unix socket
+"""
+
+import sys
+
+from cli import client
+
+
+def serve(args):
+    """Run the server in the foreground, or stop a running one"""
+    try:
+        socket_path = args.socket or client.get_socket_path()
+
+        if args.stop:
+            try:
+                client.call("shutdown", socket_path=socket_path, timeout=5)
+            except OSError:
+                print(f"No server is running on {socket_path}")
+                return 1
+            print(f"Stopped the server on {socket_path}")
+            return 0
+
+        from cli.server import serve_forever
+
+        try:
+            serve_forever(socket_path)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    except Exception as e:
+        print(f"Error running server: {e}", file=sys.stderr)
+        return 1
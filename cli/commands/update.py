@@ -3,97 +3,52 @@ Update modules - Must call CMake to re-download modules
 """
 
 import os
-import shutil
 import sys
-import subprocess
-import json
-from cli.package_data import load_modules_json, get_loader_path
-
-
-def get_cache_dir():
-    """Get the CMakeHub cache directory"""
-    if "CMH_CACHE_DIR" in os.environ:
-        return os.environ["CMH_CACHE_DIR"]
-
-    if os.name == "nt":  # Windows
-        cache_dir = os.path.join(os.environ.get("USERPROFILE", "~"), ".cmakehub", "cache")
-    else:  # Unix-like
-        cache_dir = os.path.join(os.environ.get("HOME", "~"), ".cmakehub", "cache")
-
-    return os.path.expanduser(cache_dir)
+import time
+from cli.package_data import get_loader_path
+from cli.registry import get_registry
+from cli import cache_gc
+from cli.cache_dirs import get_cache_dir
+from cli.commands.cache import list_cached_modules, remove_module_cache
+from cli.commands.fetch import count_repositories, fetch_modules, print_summary
+from cli.file_lock import get_lock_timeout
 
 
 def download_module_now(module_name, version=None):
     """Download module immediately using Git (without waiting for project use)"""
     try:
         # Get module info
-        data = load_modules_json()
-        modules = data.get("modules", [])
-
-        module = None
-        for m in modules:
-            if m["name"] == module_name:
-                module = m
-                break
+        module = get_registry().get(module_name)
 
         if not module:
             print(f"Error: Module '{module_name}' not found", file=sys.stderr)
             return False
 
         # Get module details
-        repository = module.get("repository", "")
-        module_version = version or module.get("version", "master")
-        module_path = module.get("path", "")
+        repository = module.repository or ""
+        module_version = version or module.version or "master"
 
         if not repository:
             print(f"Error: Module '{module_name}' has no repository URL", file=sys.stderr)
             return False
 
-        # Create cache directory
-        cache_dir = get_cache_dir()
-        module_cache_dir = os.path.join(cache_dir, module_name, module_version)
-        os.makedirs(module_cache_dir, exist_ok=True)
+        module_cache_dir = os.path.join(get_cache_dir(), module_name, module_version)
 
         print(f"Downloading {module_name} from {repository}...")
         print(f"  Version: {module_version}")
         print(f"  Cache: {module_cache_dir}")
 
-        # Check if already downloaded
-        meta_file = os.path.join(module_cache_dir, ".cmh_meta.json")
-        if os.path.exists(meta_file):
-            print(f"  ✓ Module already cached")
-            return True
-
-        # Clone repository using Git
-        git_clone_cmd = [
-            "git", "clone",
-            "--depth", "1",
-            "--branch", module_version,
-            repository,
-            module_cache_dir
-        ]
-
-        result = subprocess.run(git_clone_cmd, capture_output=True, text=True)
-
-        if result.returncode == 0:
-            # Create metadata file
-            from datetime import datetime
-            metadata = {
-                "module": module_name,
-                "repository": repository,
-                "version": module_version,
-                "path": module_path,
-                "downloaded_at": datetime.now().isoformat()
-            }
-
-            with open(meta_file, "w") as f:
-                json.dump(metadata, f, indent=2)
+        result = fetch_modules([module], jobs=1, version=module_version, quiet=True)[0]
 
+        if result.cached:
+            print(f"  ✓ Module already cached" + (f" in {result.layer}" if result.layer else ""))
+            return True
+        elif result.ok:
             print(f"✓ Module '{module_name}' downloaded successfully")
             return True
         else:
             print(f"✗ Failed to download module:", file=sys.stderr)
-            print(f"  {result.stderr}", file=sys.stderr)
+            print(f"  {result.error}", file=sys.stderr)
             return False
 
     except Exception as e:
@@ -104,32 +59,26 @@ def download_module_now(module_name, version=None):
 def update_modules(args):
     """Update modules by clearing cache and optionally downloading"""
     try:
-        data = load_modules_json()
+        registry = get_registry()
         cache_dir = get_cache_dir()
         loader_path = get_loader_path()
 
-        modules = data.get("modules", [])
-
         if args.module:
             # Update specific module
-            module = None
-            for m in modules:
-                if m["name"] == args.module:
-                    module = m
-                    break
+            module = registry.get(args.module)
 
             if not module:
                 print(f"Error: Module '{args.module}' not found", file=sys.stderr)
                 return 1
 
-            print(f"Updating module: {module['name']}")
+            print(f"Updating module: {module.name}")
             print("-" * 80)
 
             # Step 1: Clear Python cache (file operation - can be done in Python)
-            module_cache_dir = os.path.join(cache_dir, module["name"])
+            module_cache_dir = os.path.join(cache_dir, module.name)
             if os.path.exists(module_cache_dir):
-                print(f"Clearing cache for {module['name']}...")
-                shutil.rmtree(module_cache_dir)
+                print(f"Clearing cache for {module.name}...")
+                remove_module_cache(cache_dir, module.name)
                 print(f"  ✓ Cache cleared")
             else:
                 print(f"  No existing cache found")
@@ -137,14 +86,14 @@ def update_modules(args):
             # Step 2: Download now if requested
             if args.download_now:
                 print()
-                download_module_now(module["name"], module.get("version"))
+                download_module_now(module.name, module.version)
             else:
                 print()
-                print(f"Next time you use 'cmakehub_use({module['name']})' in your project,")
+                print(f"Next time you use 'cmakehub_use({module.name})' in your project,")
                 print(f"CMakeHub will automatically download the latest version.")
                 print()
                 print(f"To download now, add --download-now flag:")
-                print(f"  cmakehub update {module['name']} --download-now")
+                print(f"  cmakehub update {module.name} --download-now")
 
         else:
             # Update all modules
@@ -152,31 +101,44 @@ def update_modules(args):
             print("-" * 80)
 
             # Step 1: Clear all Python caches (file operation - can be done in Python)
+            cached_modules = []
             if os.path.exists(cache_dir):
-                cached_modules = [
-                    d for d in os.listdir(cache_dir) if os.path.isdir(os.path.join(cache_dir, d))
-                ]
+                cached_modules = list_cached_modules(cache_dir)
 
                 if not cached_modules:
                     print("No cached modules found")
                     return 0
 
                 print(f"Clearing cache for {len(cached_modules)} modules...")
+                # Shared checkouts and stored files are stale too once every module is updated;
+                # downloads in progress finish first, and builds reading the cache see whole entries
+                cache_gc.clear_cache(cache_dir, cached_modules, timeout=get_lock_timeout())
                 for module_name in cached_modules:
-                    module_dir = os.path.join(cache_dir, module_name)
-                    shutil.rmtree(module_dir)
                     print(f"  ✓ Cleared: {module_name}")
             else:
                 print("No cache directory found")
 
             print()
             print("All caches cleared.")
+
+            if args.download_now:
+                # Re-download everything that was cached, in parallel
+                modules = [registry.get(name) for name in cached_modules if name in registry]
+                print()
+                print(f"Downloading {len(modules)} module(s) with {args.jobs} job(s)...")
+                start = time.perf_counter()
+                results = fetch_modules(modules, jobs=args.jobs)
+                print_summary(results, time.perf_counter() - start, count_repositories(modules))
+                return 0 if all(r.ok for r in results) else 1
+
             print()
             print("Next time you use cmakehub_use() in your project,")
             print("CMakeHub will automatically download the latest versions.")
             print()
             print("To download specific modules now, use:")
             print("  cmakehub update <module_name> --download-now")
+            print("To pre-download many modules in parallel, use:")
+            print("  cmakehub fetch --all --jobs 8")
 
         return 0
 
@@ -2,18 +2,166 @@
 Update modules index - Download latest modules.json from GitHub
 """
 
+import gzip
+import json
 import os
 import sys
-import json
-import urllib.request
-import urllib.error
-from datetime import datetime
+
+from cli import index_delta
+from cli.cmake_index import get_compiled_index_path, try_compile_index
+from cli.content_store import file_fingerprint
+from cli.fs_utils import write_atomic
+from cli.transfer import Transfer
+
+INDEX_URL = "https://raw.githubusercontent.com/caomengxuan666/CMakeHub/main/modules.json"
 
 
 def get_modules_index_url():
-    """Get the GitHub raw URL for modules.json"""
-    # Use the default branch (main)
-    return "https://raw.githubusercontent.com/caomengxuan666/CMakeHub/main/modules.json"
+    """Get the URL of modules.json (CMH_INDEX_URL overrides the GitHub default)"""
+    return os.environ.get("CMH_INDEX_URL", INDEX_URL)
+
+
+def get_delta_url(index_url):
+    """Get the URL of the delta document published next to modules.json"""
+    if "CMH_INDEX_DELTA_URL" in os.environ:
+        return os.environ["CMH_INDEX_DELTA_URL"]
+    return index_url.rsplit("/", 1)[0] + "/" + index_delta.DELTA_FILE
+
+
+def get_state_path(index_path):
+    """Sidecar file recording the HTTP validators and revision of a downloaded index"""
+    directory, filename = os.path.split(index_path)
+    return os.path.join(directory, f".{filename}.state")
+
+
+def read_state(index_path):
+    """
+    Download state of an index, or {} if the index was changed or removed since.
+    The check is a stat, so an unchanged index is never read or parsed.
+    """
+    try:
+        with open(get_state_path(index_path), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        fingerprint = file_fingerprint(index_path)
+    except (OSError, ValueError):
+        return {}
+    if fingerprint != {"size": state.get("size"), "mtime": state.get("mtime")}:
+        return {}
+    return state
+
+
+def conditional_get(url, etag=None, last_modified=None):
+    """
+    GET a URL with gzip transfer and If-None-Match / If-Modified-Since.
+    Returns (body, etag, last_modified), with body None for 304 Not Modified.
+    """
+    headers = {"Accept-Encoding": "gzip", "User-Agent": "cmakehub"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    transfer = Transfer.from_environment(jobs=1)
+    response = transfer.run(transfer.request("GET", url, headers))
+    if response.status == 304:
+        return None, etag, last_modified
+    body = response.raise_for_status().body
+    if response.headers.get("content-encoding", "").lower() == "gzip":
+        body = gzip.decompress(body)
+    return body, response.headers.get("etag"), response.headers.get("last-modified")
+
+
+def save_index(output_path, text, state):
+    """
+    Atomically save an index, its download state and its compiled CMake index;
+    returns the compiled index's path, or None if it could not be written
+    """
+    write_atomic(output_path, text)
+    state = dict(state, sha256=index_delta.index_sha256(text), **file_fingerprint(output_path))
+    write_atomic(get_state_path(output_path), json.dumps(state, indent=2) + "\n")
+    return try_compile_index(output_path)
+
+
+def ensure_compiled(output_path):
+    """Compile the index if its compiled CMake index is missing or stale"""
+    compiled_path = get_compiled_index_path(output_path)
+    if not os.path.exists(compiled_path) or os.path.getmtime(compiled_path) < os.path.getmtime(
+        output_path
+    ):
+        try_compile_index(output_path)
+
+
+def update_from_delta(url, output_path, state):
+    """
+    Try to bring the index up to date from the delta document.
+    Returns "current", "updated", or None when a full download is needed.
+    """
+    if not state.get("sha256"):
+        return None
+
+    delta_url = get_delta_url(url)
+    print(f"Fetching delta from: {delta_url}")
+    try:
+        body, etag, last_modified = conditional_get(
+            delta_url, state.get("delta_etag"), state.get("delta_last_modified")
+        )
+    except OSError as e:
+        print(f"  No delta available ({e}), downloading the full index")
+        return None
+    validators = {"delta_etag": etag, "delta_last_modified": last_modified}
+
+    # The document is unchanged since it last brought this index up to date
+    if body is None:
+        return "current"
+
+    try:
+        document = json.loads(body.decode("utf-8"))
+    except ValueError as e:
+        print(f"  Invalid delta document ({e}), downloading the full index")
+        return None
+
+    target = document.get("sha256")
+    if target == state["sha256"]:
+        save_state = dict(state, **validators)
+        write_atomic(get_state_path(output_path), json.dumps(save_state, indent=2) + "\n")
+        return "current"
+
+    delta = index_delta.find_delta(document, state["sha256"])
+    if delta is None:
+        print("  No delta from the local revision, downloading the full index")
+        return None
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    text = index_delta.serialize_index(index_delta.apply_delta(data, delta))
+    if index_delta.index_sha256(text) != target:
+        print("  Delta result does not match the published index, downloading the full index")
+        return None
+
+    # The full download's validators describe the old revision, so drop them
+    save_index(output_path, text, validators)
+    print(
+        f"✓ Applied delta: {len(delta.get('updated', []))} updated, "
+        f"{len(delta.get('removed', []))} removed module(s)"
+    )
+    return "updated"
+
+
+def print_statistics(modules):
+    """Print module and category counts of an index"""
+    print()
+    print("=" * 80)
+    print("Index statistics:")
+    print("=" * 80)
+    print(f"  Total modules: {len(modules)}")
+    print(f"  Categories: {len(set(m.get('category', 'unknown') for m in modules))}")
+    print(f"  Total stars: {sum(m.get('stars', 0) for m in modules)}")
+    print()
+    print("Categories:")
+    from collections import Counter
+    categories = Counter(m.get('category', 'unknown') for m in modules)
+    for cat, count in sorted(categories.items()):
+        print(f"  - {cat}: {count}")
 
 
 def update_index(args):
@@ -22,15 +170,42 @@ def update_index(args):
         print("Updating CMakeHub modules index...")
         print("-" * 80)
 
+        # Determine where to save
+        if args.local:
+            # Save to repository root (for development)
+            repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            output_path = os.path.join(repo_root, "modules.json")
+        else:
+            # Save to package data directory
+            from cli.package_data import get_package_data_path
+            output_path = get_package_data_path("modules.json")
+
+        # Validators are only sent while the local index is the one they describe
+        state = {} if args.force else read_state(output_path)
+
         # Get URL
         url = get_modules_index_url()
+
+        if args.delta:
+            result = update_from_delta(url, output_path, state)
+            if result == "current":
+                ensure_compiled(output_path)
+                print("✓ Index is already up to date")
+                return 0
+            if result == "updated":
+                print(f"✓ Saved to: {output_path}")
+                print()
+                print("✅ Index updated successfully!")
+                return 0
+
         print(f"Fetching from: {url}")
 
         # Download
         try:
-            with urllib.request.urlopen(url, timeout=30) as response:
-                content = response.read().decode('utf-8')
-        except urllib.error.URLError as e:
+            body, etag, last_modified = conditional_get(
+                url, state.get("etag"), state.get("last_modified")
+            )
+        except OSError as e:
             print(f"✗ Failed to download modules.json", file=sys.stderr)
             print(f"  Error: {e}", file=sys.stderr)
             print()
@@ -43,7 +218,13 @@ def update_index(args):
             print(f"✗ Unexpected error: {e}", file=sys.stderr)
             return 1
 
+        if body is None:
+            ensure_compiled(output_path)
+            print("✓ Index is already up to date (not modified)")
+            return 0
+
         # Parse and validate
+        content = body.decode('utf-8')
         try:
             data = json.loads(content)
         except json.JSONDecodeError as e:
@@ -56,44 +237,17 @@ def update_index(args):
             return 1
 
         modules = data["modules"]
-        print(f"✓ Downloaded {len(modules)} modules")
-
-        # Determine where to save
-        if args.local:
-            # Save to repository root (for development)
-            repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            output_path = os.path.join(repo_root, "modules.json")
-        else:
-            # Save to package data directory
-            from cli.package_data import get_package_data_path
-            output_path = get_package_data_path("modules.json")
+        print(f"✓ Downloaded {len(modules)} modules ({len(body)} bytes)")
 
-        # Backup existing file
-        if os.path.exists(output_path):
-            backup_path = output_path + ".backup"
-            os.rename(output_path, backup_path)
-            print(f"✓ Backed up existing file to: {os.path.basename(backup_path)}")
-
-        # Save new file
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Save the file as published, so its revision matches the delta document
+        compiled_path = save_index(output_path, content, {"etag": etag, "last_modified": last_modified})
 
         print(f"✓ Saved to: {output_path}")
+        if compiled_path:
+            print(f"✓ Compiled CMake index: {os.path.basename(compiled_path)}")
 
         # Show stats
-        print()
-        print("=" * 80)
-        print("Index statistics:")
-        print("=" * 80)
-        print(f"  Total modules: {len(modules)}")
-        print(f"  Categories: {len(set(m.get('category', 'unknown') for m in modules))}")
-        print(f"  Total stars: {sum(m.get('stars', 0) for m in modules)}")
-        print()
-        print("Categories:")
-        from collections import Counter
-        categories = Counter(m.get('category', 'unknown') for m in modules)
-        for cat, count in sorted(categories.items()):
-            print(f"  - {cat}: {count}")
+        print_statistics(modules)
         print()
         print("✅ Index updated successfully!")
         print()
@@ -106,4 +260,4 @@ def update_index(args):
         print(f"✗ Error updating index: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc()
-        return 1
\ No newline at end of file
+        return 1
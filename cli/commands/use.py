@@ -5,32 +5,29 @@ Use module - Generate CMake configuration for using modules
 import json
 import os
 import sys
-from cli.package_data import load_modules_json, get_loader_path
+from cli.fuzzy_index import did_you_mean
+from cli.package_data import get_loader_path
+from cli.registry import get_registry
 
 
 def use_module(args):
     """Generate CMake configuration for using a module"""
     try:
-        data = load_modules_json()
         loader_path = get_loader_path()
 
-        modules = data.get("modules", [])
-
-        # Find the module
-        module = None
-        for m in modules:
-            if m["name"] == args.module:
-                module = m
-                break
+        module = get_registry().get(args.module)
 
         if not module:
             print(f"Error: Module '{args.module}' not found", file=sys.stderr)
+            hint = did_you_mean(args.module)
+            if hint:
+                print(hint, file=sys.stderr)
             print("\nUse 'cmakehub list' to see available modules", file=sys.stderr)
             return 1
 
         # Generate CMake code
-        cmake_code = f"""# CMakeHub: {module['name']}
-# {module.get('description', 'No description')}
+        cmake_code = f"""# CMakeHub: {module.name}
+# {module.description or 'No description'}
 
 # Include CMakeHub loader
 include({{CMAKE_CURRENT_SOURCE_DIR}}/cmake/hub/loader.cmake)
@@ -75,23 +72,23 @@ cmakehub_use({args.module}"""
 
             # Show module info
             print(f"Module Information:")
-            print(f"  Name: {module['name']}")
-            print(f"  Description: {module.get('description', 'N/A')}")
-            print(f"  Category: {module.get('category', 'N/A')}")
-            print(f"  Repository: {module.get('repository', 'N/A')}")
-            print(f"  License: {module.get('license', 'N/A')}")
+            print(f"  Name: {module.name}")
+            print(f"  Description: {module.description or 'N/A'}")
+            print(f"  Category: {module.category or 'N/A'}")
+            print(f"  Repository: {module.repository or 'N/A'}")
+            print(f"  License: {module.license or 'N/A'}")
 
-            if module.get("dependencies"):
-                print(f"  Dependencies: {', '.join(module['dependencies'])}")
+            if module.dependencies:
+                print(f"  Dependencies: {', '.join(module.dependencies)}")
 
-            if module.get("conflicts"):
-                print(f"  Conflicts: {', '.join(module['conflicts'])}")
+            if module.conflicts:
+                print(f"  Conflicts: {', '.join(module.conflicts)}")
 
         # Test download if requested
         if args.test:
             print()
             print("Testing download...")
-            from update import download_module_now
+            from cli.commands.update import download_module_now
 
             download_module_now(args.module, args.version)
 
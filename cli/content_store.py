@@ -0,0 +1,119 @@
+"""
+Content-addressed store for cached module files
+
+Every module file is stored once under .store/blobs/<aa>/<sha256>, keyed by
+the SHA-256 of its contents, so identical files from different modules and
+versions share one copy. Module entries and checkouts are materialized as
+hardlinks to the blob (a copy where links are not supported), and the digest,
+size and mtime recorded in the entry metadata let a cached file be verified
+with a single stat instead of re-reading it.
+"""
+
+import hashlib
+import os
+import shutil
+
+from cli.fs_utils import open_atomic
+
+STORE_DIR = ".store"
+BLOBS_DIR = "blobs"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_blobs_dir(cache_dir):
+    """Directory holding the store's blobs"""
+    return os.path.join(cache_dir, STORE_DIR, BLOBS_DIR)
+
+
+def get_blob_relpath(digest):
+    """Cache-relative path of a blob (matches loader.cmake)"""
+    return "/".join([STORE_DIR, BLOBS_DIR, digest[:2], digest])
+
+
+def get_blob_path(cache_dir, digest):
+    """Absolute path of a blob"""
+    return os.path.join(cache_dir, *get_blob_relpath(digest).split("/"))
+
+
+def add_blob(cache_dir, path):
+    """
+    Add a file to the store, returning its digest.
+    A blob that already exists is kept, so identical files are stored once.
+    """
+    digest = file_sha256(path)
+    blob_path = get_blob_path(cache_dir, digest)
+    if os.path.exists(blob_path):
+        return digest
+
+    with open(path, "rb") as source, open_atomic(blob_path, "wb") as f:
+        shutil.copyfileobj(source, f)
+    return digest
+
+
+def discard_blob(cache_dir, digest):
+    """Remove a blob, e.g. one whose contents no longer match its digest"""
+    try:
+        os.remove(get_blob_path(cache_dir, digest))
+    except OSError:
+        pass
+
+
+def materialize(blob_path, dest):
+    """Make dest a hardlink to a blob, falling back to a copy (replaces dest atomically)"""
+    dest_dir = os.path.dirname(dest)
+    os.makedirs(dest_dir, exist_ok=True)
+    if os.path.exists(dest) and os.path.samefile(blob_path, dest):
+        return
+
+    tmp_path = os.path.join(dest_dir, f".tmp-{os.getpid()}-{os.path.basename(dest)}")
+    try:
+        os.link(blob_path, tmp_path)
+    except OSError:
+        shutil.copy2(blob_path, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+def file_fingerprint(path):
+    """Size and whole-second mtime of a file, recorded at materialization"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def is_intact(path, meta, deep=False):
+    """
+    Whether a materialized file still matches its recorded digest.
+    The quick check compares size and mtime only; deep re-hashes the file.
+    """
+    digest = meta.get("sha256")
+    if not digest:
+        return os.path.exists(path)
+    try:
+        if file_fingerprint(path) != {"size": meta.get("size"), "mtime": meta.get("mtime")}:
+            return False
+    except OSError:
+        return False
+    return not deep or file_sha256(path) == digest
+
+
+def iter_blobs(cache_dir):
+    """Yield the path of every blob in the store"""
+    blobs_dir = get_blobs_dir(cache_dir)
+    if not os.path.isdir(blobs_dir):
+        return
+    for prefix in sorted(os.listdir(blobs_dir)):
+        prefix_dir = os.path.join(blobs_dir, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for name in sorted(os.listdir(prefix_dir)):
+            if not name.startswith("."):
+                yield os.path.join(prefix_dir, name)
@@ -0,0 +1,118 @@
+"""
+Advisory file locks shared by the CLI and loader.cmake
+
+Downloads into one shared checkout are serialized by a lock file next to it
+(see cache_layout.get_checkout_lock_path). loader.cmake takes it with
+file(LOCK), which is a whole-file fcntl() record lock on POSIX and LockFileEx
+on Windows; FileLock takes the same kind of lock, so parallel configures and
+CLI commands wait for each other and then reuse the winner's download.
+
+Record locks belong to a process, not to a file descriptor, so threads of one
+process are serialized by a threading lock per path as well.
+"""
+
+import os
+import threading
+import time
+
+DEFAULT_TIMEOUT = 600
+POLL_INTERVAL = 0.05
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def get_lock_timeout():
+    """Seconds to wait for a lock held by another process (CMH_LOCK_TIMEOUT)"""
+    try:
+        return float(os.environ.get("CMH_LOCK_TIMEOUT", DEFAULT_TIMEOUT))
+    except ValueError:
+        return DEFAULT_TIMEOUT
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _try_lock(fd):
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(fd):
+        fcntl.lockf(fd, fcntl.LOCK_UN)
+
+
+def _get_thread_lock(path):
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class FileLock:
+    """
+    Exclusive lock on a file, created with its directory if needed.
+    Used as a context manager it waits up to `timeout` seconds (None: forever)
+    and raises TimeoutError if the lock stays held.
+    """
+
+    def __init__(self, path, timeout=None):
+        self.path = path
+        self.timeout = timeout
+        self.fd = None
+        self._thread_lock = _get_thread_lock(path)
+
+    def acquire(self, timeout=None):
+        """Wait up to timeout seconds (None: forever, 0: not at all); returns whether the lock was taken"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._thread_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return False
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            self._thread_lock.release()
+            raise
+
+        while not _try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+            time.sleep(POLL_INTERVAL)
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is None:
+            return
+        try:
+            _unlock(self.fd)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+            self._thread_lock.release()
+
+    def __enter__(self):
+        if not self.acquire(self.timeout):
+            raise TimeoutError(f"{self.path} is still locked after {self.timeout:g}s")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
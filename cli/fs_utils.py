@@ -0,0 +1,43 @@
+"""
+File system helpers shared by the CLI
+
+Every file the CLI rewrites in place (indexes, lock files, cache metadata,
+snapshots, blobs, bundles) is written through open_atomic, so readers such as
+a parallel loader.cmake never see one half-written.
+"""
+
+import contextlib
+import os
+
+
+@contextlib.contextmanager
+def open_atomic(path, mode="w"):
+    """
+    Open a temporary file next to path for writing ("w" for UTF-8 text, "wb"
+    for bytes). It replaces path when the block completes and is removed if
+    the block raises.
+    """
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-")
+    try:
+        if "b" in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding="utf-8", newline="")
+        with f:
+            yield f
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_atomic(path, data):
+    """Write text (as UTF-8) or bytes to a file via a temporary file and rename"""
+    with open_atomic(path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
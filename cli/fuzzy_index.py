@@ -0,0 +1,169 @@
+"""
+Typo-tolerant module name resolution for CMakeHub CLI
+
+Module names and tags are indexed by character trigrams, so a misspelled name
+only needs exact edit-distance checks against the few terms that share
+trigrams with it. The index is persisted with the compiled index snapshot.
+"""
+
+from array import array
+
+# Terms sharing fewer trigrams than this fraction (Dice coefficient) are not candidates
+MIN_SIMILARITY = 0.3
+# How many of the best trigram candidates get an exact edit-distance check
+MAX_CANDIDATES = 50
+# Candidates this similar are accepted even beyond the edit-distance budget (partial names)
+STRONG_SIMILARITY = 0.5
+
+
+def trigrams(word):
+    """Character trigrams of a word, padded so prefixes and suffixes count"""
+    padded = f"  {word.lower()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def max_distance_for(word):
+    """Edit distance tolerated for a word: one typo per three characters, 1 to 3"""
+    return max(1, min(3, len(word) // 3))
+
+
+class TrigramIndex:
+    """Trigram index over module names and tags"""
+
+    def __init__(self, modules):
+        # term -> module names it resolves to (a name resolves to itself)
+        resolves = {}
+        for module in modules:
+            name = module.name
+            resolves.setdefault(name.lower(), [])
+            if name not in resolves[name.lower()]:
+                resolves[name.lower()].insert(0, name)
+            for tag in module.tags:
+                tag_modules = resolves.setdefault(tag.lower(), [])
+                if name not in tag_modules:
+                    tag_modules.append(name)
+
+        self.terms = sorted(resolves)
+        self.resolves = [resolves[term] for term in self.terms]
+
+        postings = {}
+        for term_id, term in enumerate(self.terms):
+            for gram in trigrams(term):
+                postings.setdefault(gram, array("I")).append(term_id)
+        self.postings = postings
+        self.gram_counts = array("I", (len(trigrams(term)) for term in self.terms))
+
+    def to_snapshot(self):
+        """Plain-data state of the index, for the index snapshot"""
+        postings = {gram: term_ids.tobytes() for gram, term_ids in self.postings.items()}
+        return (self.terms, self.resolves, postings, self.gram_counts.tobytes())
+
+    @classmethod
+    def from_snapshot(cls, state):
+        """Rebuild an index from to_snapshot() state"""
+        index = cls.__new__(cls)
+        index.terms, index.resolves, postings, gram_counts = state
+        index.postings = {}
+        for gram, data in postings.items():
+            index.postings[gram] = array("I")
+            index.postings[gram].frombytes(data)
+        index.gram_counts = array("I")
+        index.gram_counts.frombytes(gram_counts)
+        return index
+
+    def _closest(self, word):
+        """Candidate term ids for word as (edit distance, -similarity, term id), closest first"""
+        word = word.lower()
+        grams = trigrams(word)
+
+        # Count shared trigrams per term using only the word's posting lists
+        shared = {}
+        for gram in grams:
+            for term_id in self.postings.get(gram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+
+        scored = []
+        for term_id, count in shared.items():
+            similarity = 2.0 * count / (len(grams) + self.gram_counts[term_id])
+            if similarity >= MIN_SIMILARITY:
+                scored.append((similarity, term_id))
+        scored.sort(reverse=True)
+
+        max_distance = max_distance_for(word)
+        matches = []
+        for similarity, term_id in scored[:MAX_CANDIDATES]:
+            distance = edit_distance(word, self.terms[term_id])
+            if distance <= max_distance or similarity >= STRONG_SIMILARITY:
+                matches.append((distance, -similarity, term_id))
+
+        matches.sort()
+        return matches
+
+    def similar_terms(self, word, limit=5):
+        """Names and tags similar to word as (term, edit distance), closest first"""
+        matches = self._closest(word)[:limit]
+        return [(self.terms[term_id], distance) for distance, _, term_id in matches]
+
+    def suggest_modules(self, word, limit=5):
+        """Module names that word most likely refers to, best match first"""
+        suggestions = []
+        for _, _, term_id in self._closest(word):
+            for name in self.resolves[term_id]:
+                if name not in suggestions:
+                    suggestions.append(name)
+            if limit is not None and len(suggestions) >= limit:
+                return suggestions[:limit]
+        return suggestions
+
+
+def build_fuzzy_index(modules_json_path):
+    """Build the trigram index for the registry's modules"""
+    from cli.registry import get_registry
+
+    return TrigramIndex(get_registry().modules)
+
+
+_fuzzy_index = None
+
+
+def get_fuzzy_index():
+    """Get the process-wide trigram index, loading it on first use"""
+    global _fuzzy_index
+
+    if _fuzzy_index is None:
+        from cli.index_cache import load_snapshot
+        from cli.package_data import get_package_data_path
+
+        modules_json_path = get_package_data_path("modules.json")
+        _fuzzy_index = load_snapshot(
+            "fuzzy", modules_json_path, build_fuzzy_index, TrigramIndex.to_snapshot, TrigramIndex.from_snapshot
+        )
+
+    return _fuzzy_index
+
+
+def reset_fuzzy_index():
+    """Forget the process-wide trigram index, so the next get_fuzzy_index() reloads it"""
+    global _fuzzy_index
+    _fuzzy_index = None
+
+
+def did_you_mean(name, limit=3):
+    """A 'Did you mean ...?' hint for an unknown module name, or an empty string"""
+    suggestions = get_fuzzy_index().suggest_modules(name, limit=limit)
+    if not suggestions:
+        return ""
+    return "Did you mean: " + ", ".join(suggestions) + "?"
@@ -0,0 +1,114 @@
+"""
+Compiled index snapshots for CMakeHub CLI
+
+Parsing modules.json on every invocation is wasteful when the file rarely
+changes, so parsed structures are saved into the cache directory and
+reused for as long as the source file's stat signature stays the same.
+
+Snapshots are written with marshal, which only stores plain data (lists,
+dicts, tuples, strings, numbers, bytes) and cannot run code when a file is
+read, so a tampered snapshot in a shared cache is at worst rejected. Objects
+that are not plain data are converted with the encode/decode pair given to
+load_snapshot().
+"""
+
+import contextlib
+import gc
+import hashlib
+import marshal
+import os
+
+from cli.fs_utils import open_atomic
+
+# Bump whenever the layout of a snapshot changes
+SNAPSHOT_FORMAT = 3
+
+
+def get_index_cache_dir():
+    """Get the directory holding compiled index snapshots"""
+    from cli.cache_dirs import get_cache_dir
+
+    return os.path.join(get_cache_dir(), ".index")
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector while building large container trees.
+    Loading an index allocates millions of dicts and lists that can never be
+    cyclic garbage, and the collector's repeated passes over them dominate load time.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def source_signature(source_path):
+    """Cheap identity of a source file: format, absolute path, mtime and size"""
+    stat = os.stat(source_path)
+    return (SNAPSHOT_FORMAT, os.path.abspath(source_path), stat.st_mtime_ns, stat.st_size)
+
+
+def get_snapshot_path(name, source_path):
+    """Get the snapshot file for a (name, source file) pair"""
+    source_id = hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(get_index_cache_dir(), f"{name}-{source_id}.marshal")
+
+
+def read_snapshot(snapshot_path, signature):
+    """Read a snapshot, returning (True, state) only if its signature matches"""
+    try:
+        with open(snapshot_path, "rb") as f:
+            # The signature is stored separately so a stale snapshot is
+            # rejected without loading its payload
+            if marshal.load(f) != signature:
+                return False, None
+            with gc_paused():
+                return True, marshal.load(f)
+    except Exception:
+        return False, None
+
+
+def write_snapshot(snapshot_path, signature, state):
+    """Atomically write a snapshot; failures are ignored (e.g. read-only cache)"""
+    try:
+        with open_atomic(snapshot_path, "wb") as f:
+            marshal.dump(signature, f)
+            marshal.dump(state, f)
+    except (OSError, ValueError):
+        # ValueError: the state holds something marshal cannot store
+        pass
+
+
+def load_snapshot(name, source_path, build, encode=None, decode=None):
+    """
+    Return build(source_path), reusing the compiled snapshot while the source
+    file is unchanged. encode turns the built value into plain data for the
+    snapshot and decode turns it back; both default to the identity.
+    Set CMH_NO_INDEX_CACHE=1 to always rebuild.
+    """
+    if os.environ.get("CMH_NO_INDEX_CACHE"):
+        return build(source_path)
+
+    signature = source_signature(source_path)
+    snapshot_path = get_snapshot_path(name, source_path)
+
+    found, state = read_snapshot(snapshot_path, signature)
+    if found:
+        if decode is None:
+            return state
+        try:
+            with gc_paused():
+                return decode(state)
+        except Exception:
+            # A snapshot of the right format but the wrong shape: rebuild it
+            pass
+
+    with gc_paused():
+        value = build(source_path)
+    write_snapshot(snapshot_path, signature, value if encode is None else encode(value))
+    return value
@@ -0,0 +1,96 @@
+"""
+Incremental modules.json updates
+
+A delta document lets `cmakehub update-index --delta` bring a local index up
+to date by downloading only the modules that changed. It is published next
+to modules.json as modules.delta.json:
+
+    {
+      "format": 1,
+      "sha256": "<SHA-256 of the current modules.json>",
+      "deltas": [
+        {
+          "base_sha256": "<SHA-256 of an earlier modules.json>",
+          "fields": {"categories": {...}},
+          "updated": [{"name": "...", ...}],
+          "removed": ["..."]
+        }
+      ]
+    }
+
+Revisions are identified by the SHA-256 of the serialized index. Each delta
+leads from its base straight to the current index, so a client applies at
+most one, and checks the result against "sha256" before saving it.
+"""
+
+import hashlib
+import json
+
+DELTA_FORMAT = 1
+DELTA_FILE = "modules.delta.json"
+
+
+def serialize_index(data):
+    """modules.json text exactly as the repository writes it"""
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def index_sha256(text):
+    """Revision of a serialized index"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_delta(base, current):
+    """Delta leading from the base index data to the current index data"""
+    base_modules = {m["name"]: m for m in base.get("modules", [])}
+    current_names = {m["name"] for m in current.get("modules", [])}
+    return {
+        "base_sha256": index_sha256(serialize_index(base)),
+        "fields": {
+            key: value
+            for key, value in current.items()
+            if key != "modules" and base.get(key) != value
+        },
+        "updated": [m for m in current.get("modules", []) if base_modules.get(m["name"]) != m],
+        "removed": [name for name in base_modules if name not in current_names],
+    }
+
+
+def make_delta_document(current, bases):
+    """Delta document from each of the base indexes to the current one"""
+    return {
+        "format": DELTA_FORMAT,
+        "sha256": index_sha256(serialize_index(current)),
+        "deltas": [make_delta(base, current) for base in bases],
+    }
+
+
+def find_delta(document, base_sha256):
+    """The delta starting at base_sha256, or None if the document has none"""
+    if document.get("format") != DELTA_FORMAT:
+        return None
+    for delta in document.get("deltas", []):
+        if delta.get("base_sha256") == base_sha256:
+            return delta
+    return None
+
+
+def apply_delta(data, delta):
+    """
+    Apply a delta to index data, returning the new data.
+    Updated modules replace their old entry in place, new ones are appended.
+    """
+    removed = set(delta.get("removed", []))
+    updated = {m["name"]: m for m in delta.get("updated", [])}
+
+    modules = []
+    for module in data.get("modules", []):
+        if module["name"] in removed:
+            continue
+        modules.append(updated.pop(module["name"], module))
+    modules.extend(updated.values())
+
+    result = dict(data)
+    result.update(delta.get("fields", {}))
+    result["modules"] = modules
+    return result
@@ -0,0 +1,124 @@
+"""
+Incremental JSON reading
+
+JsonStreamReader decodes JSON values one at a time from a text file, holding
+only the current chunk and value in memory. It is used to walk the modules
+array of a large index without materializing the whole document.
+"""
+
+import json
+import re
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r"\s*")
+
+# Characters that can continue a JSON number
+NUMBER_CHARS = "0123456789.eE+-"
+
+
+class JsonStreamReader:
+    """Read JSON punctuation and values from a file, a chunk at a time"""
+
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        """Append the next chunk, dropping what was consumed; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self):
+        """Advance to the next non-whitespace character, reading more as needed"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return
+
+    def peek(self):
+        """The next non-whitespace character, or "" at end of file"""
+        self.skip_whitespace()
+        return self.buffer[self.pos : self.pos + 1]
+
+    def next_token(self):
+        """Consume and return the next non-whitespace character"""
+        char = self.peek()
+        if not char:
+            raise ValueError("Unexpected end of JSON input")
+        self.pos += 1
+        return char
+
+    def expect(self, expected):
+        """Consume the next character, which must be `expected`"""
+        char = self.next_token()
+        if char != expected:
+            raise ValueError(f"Expected '{expected}' but found '{char}' in JSON input")
+
+    def decode_value(self):
+        """Decode the next complete JSON value"""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # The value continues in the next chunk
+                if not self.fill():
+                    raise
+                continue
+            # A number cut off by the end of the buffer continues in the next chunk
+            if (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and (end == len(self.buffer) or self.buffer[end] in NUMBER_CHARS)
+                and self.fill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_object_items(reader):
+    """
+    Yield (key, reader) for each member of the JSON object at the reader.
+    The caller must consume each member's value before advancing.
+    """
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.next_token()
+        return
+    while True:
+        key = reader.decode_value()
+        reader.expect(":")
+        yield key, reader
+        char = reader.next_token()
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or '}}' but found '{char}' in JSON input")
+
+
+def iter_array_values(reader):
+    """Yield the values of the JSON array at the reader, one at a time"""
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.next_token()
+        return
+    while True:
+        yield reader.decode_value()
+        char = reader.next_token()
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or ']' but found '{char}' in JSON input")
@@ -0,0 +1,109 @@
+"""
+cmakehub.lock support
+
+A lock file pins every module a project uses to a resolved commit and the
+SHA-256 of its module file. Locked modules are cached under their commit, so
+when the cache already holds a matching entry, neither the loader nor the CLI
+has to read the module index or contact the remote.
+"""
+
+import json
+import os
+import re
+
+from cli import cache_layout, content_store
+from cli.fs_utils import write_atomic
+from cli.module import Module
+
+LOCK_FILE = "cmakehub.lock"
+LOCK_VERSION = 1
+
+# cmakehub_use(<name> [VERSION <version>] ...)
+USE_RE = re.compile(r"cmakehub_use\s*\(\s*([A-Za-z0-9_.+-]+)([^)]*)\)", re.IGNORECASE)
+VERSION_ARG_RE = re.compile(r"\bVERSION\s+\"?([^\s\")]+)")
+
+# Directories not scanned for cmakehub_use() calls
+SKIPPED_DIRS = {"build", "out", "node_modules", "_deps"}
+
+
+def find_used_modules(source_dir):
+    """
+    Find the modules a project loads with cmakehub_use() in its CMakeLists.txt
+    and *.cmake files, returning {module name: requested version or None}.
+    """
+    used = {}
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [
+            d
+            for d in sorted(dirs)
+            if not d.startswith(".") and not d.startswith("cmake-build") and d not in SKIPPED_DIRS
+        ]
+        for filename in sorted(files):
+            if filename != "CMakeLists.txt" and not filename.endswith(".cmake"):
+                continue
+            try:
+                with open(os.path.join(root, filename), "r", encoding="utf-8") as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            for name, arguments in USE_RE.findall(text):
+                version = VERSION_ARG_RE.search(arguments)
+                used.setdefault(name, version.group(1) if version else None)
+    return used
+
+
+def read_lock(path):
+    """Read a lock file, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        lock = json.load(f)
+    if lock.get("lock_version") != LOCK_VERSION:
+        raise ValueError(f"Unsupported lock file version in {path}: {lock.get('lock_version')}")
+    return lock
+
+
+def write_lock(path, modules):
+    """Write a lock file for {module name: lock entry}, atomically and in a stable order"""
+    lock = {"lock_version": LOCK_VERSION, "modules": modules}
+    write_atomic(path, json.dumps(lock, indent=2, sort_keys=True) + "\n")
+
+
+def make_lock_entry(module, version, commit, digest):
+    """
+    Lock entry for a module resolved to a commit. The fields the loader
+    validates are recorded too, so the locked fast path checks conflicts,
+    minimum versions and platforms without reading the index.
+    """
+    return {
+        "repository": module.repository or "",
+        "version": version,
+        "commit": commit,
+        "path": module.path or "",
+        "sha256": digest,
+        "dependencies": list(module.dependencies),
+        "conflicts": list(module.conflicts),
+        "cmake_minimum_required": module.cmake_minimum_required or "",
+        "cpp_minimum_required": module.cpp_minimum_required or "",
+        "platform": list(module.platform),
+    }
+
+
+def locked_module(name, entry):
+    """Module record for a lock entry, cached under its commit"""
+    return Module(
+        name,
+        repository=entry["repository"],
+        path=entry["path"],
+        version=entry["commit"],
+        dependencies=tuple(entry.get("dependencies", [])),
+    )
+
+
+def is_lock_entry_cached(cache_dir, name, entry):
+    """Whether the cache holds exactly the locked file (a stat, no re-hash)"""
+    entry_dir = cache_layout.get_entry_dir(cache_dir, name, entry["commit"])
+    meta = cache_layout.read_entry_meta(entry_dir)
+    if meta is None or meta.get("sha256") != entry.get("sha256"):
+        return False
+    return content_store.is_intact(cache_layout.get_entry_file(cache_dir, entry_dir, meta), meta)
@@ -3,26 +3,45 @@
 CMakeHub CLI - Main entry point
 """
 
-import argparse
+import importlib
 import sys
 import os
 
 # Add parent directory to path to import from commands
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from commands import list as cmd_list
-from commands import search as cmd_search
-from commands import info as cmd_info
-from commands import cache as cmd_cache
-from commands import check as cmd_check
-from commands import update as cmd_update
-from commands import update_index as cmd_update_index
-from commands import use as cmd_use
-from commands import init as cmd_init
+# Subcommand -> (module in commands/, handler). A command's module is imported
+# only when it runs, so startup does not pay for every command's dependencies
+# (check with scripts/check_startup.py).
+COMMANDS = {
+    "list": ("list", "list_modules"),
+    "search": ("search", "search_modules"),
+    "info": ("info", "show_info"),
+    "cache": ("cache", "cache_manager"),
+    "check": ("check", "check_compatibility"),
+    "update": ("update", "update_modules"),
+    "fetch": ("fetch", "fetch"),
+    "lock": ("lock", "lock"),
+    "bundle": ("bundle", "bundle_modules"),
+    "update-index": ("update_index", "update_index"),
+    "compile-index": ("compile_index", "compile_modules_index"),
+    "use": ("use", "use_module"),
+    "init": ("init", "init_project"),
+    "serve": ("serve", "serve"),
+}
 
 
-def main():
-    """Main entry point for cmakehub CLI"""
+def get_command_handler(command):
+    """Import a subcommand's module and return its handler"""
+    module_name, handler_name = COMMANDS[command]
+    module = importlib.import_module(f"commands.{module_name}")
+    return getattr(module, handler_name)
+
+
+def build_parser():
+    """Build the argument parser for every subcommand"""
+    import argparse
+
     parser = argparse.ArgumentParser(
         prog="cmakehub",
         description="CMakeHub - Unified CMake Module Manager CLI",
@@ -31,17 +50,30 @@ def main():
 Examples:
   cmakehub list                    List all available modules
   cmakehub search sanitizer        Search for modules
+  cmakehub search "gtest OR catch2"  Search with OR
   cmakehub info sanitizers         Show module details
   cmakehub cache info              Show cache information
+  cmakehub cache info --rescan     Reconcile the cache ledger with the disk
+  cmakehub cache gc --max-size 2G  Evict least recently used modules
   cmakehub cache clear             Clear all cache
   cmakehub cache clear sanitizers  Clear specific module cache
+  cmakehub cache verify --deep     Re-hash cached module files
   cmakehub check sanitizers        Check module compatibility
   cmakehub update                  Update all modules
   cmakehub update sanitizers       Update specific module
   cmakehub update sanitizers --download-now  Update and download now
+  cmakehub update --all --download-now -j 8  Re-download all cached modules
+  cmakehub fetch --all --jobs 8    Pre-download every module in parallel
+  cmakehub lock                    Pin the project's modules in cmakehub.lock
+  cmakehub fetch --locked          Download exactly what cmakehub.lock pins
+  cmakehub bundle create --locked  Pack the locked modules into one archive
+  cmakehub bundle import cmakehub-bundle.tar.gz  Restore a bundle offline
+  cmakehub update-index --delta    Refresh the index, downloading only changes
+  cmakehub compile-index           Precompile modules.json for faster configures
   cmakehub use sanitizers           Generate CMake configuration
   cmakehub use sanitizers --append CMakeLists.txt  Append to file
   cmakehub init myproject          Initialize new project with CMakeHub
+  cmakehub serve                   Answer list/search/info/check from memory
 
 For more information, visit: https://github.com/caomengxuan666/CMakeHub
         """,
@@ -60,6 +92,13 @@ For more information, visit: https://github.com/caomengxuan666/CMakeHub
     search_parser = subparsers.add_parser("search", help="Search for modules")
     search_parser.add_argument("keyword", help="Search keyword")
     search_parser.add_argument("--category", "-c", help="Filter by category")
+    search_parser.add_argument(
+        "--any", action="store_true", help="Match any keyword instead of all of them"
+    )
+    search_parser.add_argument("--limit", "-n", type=int, help="Show at most N results")
+    search_parser.add_argument(
+        "--fuzzy", "-f", action="store_true", help="Tolerate typos in module names and tags"
+    )
 
     # Info command
     info_parser = subparsers.add_parser("info", help="Show module information")
@@ -72,7 +111,13 @@ For more information, visit: https://github.com/caomengxuan666/CMakeHub
     cache_parser = subparsers.add_parser("cache", help="Cache management")
     cache_subparsers = cache_parser.add_subparsers(dest="cache_action", help="Cache actions")
 
-    cache_subparsers.add_parser("info", help="Show cache information")
+    cache_info_parser = cache_subparsers.add_parser("info", help="Show cache information")
+    cache_info_parser.add_argument(
+        "--rescan", action="store_true", help="Rebuild the cache ledger from the files on disk"
+    )
+    cache_info_parser.add_argument(
+        "--jobs", "-j", type=int, default=8, help="Directories scanned in parallel by --rescan"
+    )
 
     cache_clear_parser = cache_subparsers.add_parser("clear", help="Clear cache")
     cache_clear_parser.add_argument(
@@ -82,6 +127,41 @@ For more information, visit: https://github.com/caomengxuan666/CMakeHub
         "--force", "-f", action="store_true", help="Force clear without confirmation"
     )
 
+    cache_verify_parser = cache_subparsers.add_parser(
+        "verify", help="Verify cached module files against their SHA-256 digests"
+    )
+    cache_verify_parser.add_argument(
+        "module", nargs="?", help="Module name (optional, verify all if not specified)"
+    )
+    cache_verify_parser.add_argument(
+        "--deep", action="store_true", help="Re-hash files instead of checking size and mtime"
+    )
+
+    cache_gc_parser = cache_subparsers.add_parser(
+        "gc", help="Evict cached modules by size budget, age or version count"
+    )
+    cache_gc_parser.add_argument(
+        "--max-size",
+        help="Evict least recently used modules until the cache fits, e.g. 2G "
+        "(default: $CMH_CACHE_MAX_SIZE)",
+    )
+    cache_gc_parser.add_argument(
+        "--max-age",
+        help="Evict modules not used for this long, e.g. 30d or 12h (default: $CMH_CACHE_MAX_AGE)",
+    )
+    cache_gc_parser.add_argument(
+        "--keep-versions", type=int, help="Keep only the N most recently used versions per module"
+    )
+    cache_gc_parser.add_argument(
+        "--grace",
+        default="10m",
+        help="Never evict modules used this recently; trash is deleted after it (default: 10m)",
+    )
+    cache_gc_parser.add_argument("--limit", type=int, help="Evict at most N module entries")
+    cache_gc_parser.add_argument(
+        "--dry-run", "-n", action="store_true", help="Show what would be evicted"
+    )
+
     # Check command
     check_parser = subparsers.add_parser("check", help="Check module compatibility")
     check_parser.add_argument("module", help="Module name")
@@ -91,15 +171,116 @@ For more information, visit: https://github.com/caomengxuan666/CMakeHub
     update_parser.add_argument(
         "module", nargs="?", help="Module name (optional, update all if not specified)"
     )
+    update_parser.add_argument(
+        "--all", action="store_true", help="Update all modules (same as giving no module)"
+    )
     update_parser.add_argument(
         "--download-now", action="store_true", help="Download module immediately"
     )
+    update_parser.add_argument(
+        "--jobs", "-j", type=int, default=8, help="Parallel downloads (default: 8)"
+    )
+
+    # Fetch command
+    fetch_parser = subparsers.add_parser("fetch", help="Download modules into the cache now")
+    fetch_parser.add_argument("modules", nargs="*", help="Module names")
+    fetch_parser.add_argument("--all", action="store_true", help="Fetch every module in the index")
+    fetch_parser.add_argument("--category", "-c", help="Fetch every module in a category")
+    fetch_parser.add_argument("--version", "-v", help="Fetch this version instead of the default")
+    fetch_parser.add_argument(
+        "--jobs", "-j", type=int, default=8, help="Parallel downloads (default: 8)"
+    )
+    fetch_parser.add_argument(
+        "--locked",
+        nargs="?",
+        const="cmakehub.lock",
+        metavar="LOCKFILE",
+        help="Fetch the commits pinned by a lock file (default: cmakehub.lock)",
+    )
+
+    # Lock command
+    lock_parser = subparsers.add_parser(
+        "lock", help="Pin the modules a project uses to commits in cmakehub.lock"
+    )
+    lock_parser.add_argument(
+        "modules", nargs="*", help="Module names (default: scan the project for cmakehub_use)"
+    )
+    lock_parser.add_argument(
+        "--file", "-f", default="cmakehub.lock", help="Lock file to write (default: cmakehub.lock)"
+    )
+    lock_parser.add_argument(
+        "--source", "-s", help="Project directory to scan (default: the lock file's directory)"
+    )
+    lock_parser.add_argument("--version", "-v", help="Lock this version of the given modules")
+    lock_parser.add_argument(
+        "--jobs", "-j", type=int, default=8, help="Parallel downloads (default: 8)"
+    )
+
+    # Bundle command
+    bundle_parser = subparsers.add_parser(
+        "bundle", help="Pack cached modules into one archive, or restore one offline"
+    )
+    bundle_subparsers = bundle_parser.add_subparsers(dest="bundle_action", help="Bundle actions")
+
+    bundle_create_parser = bundle_subparsers.add_parser(
+        "create", help="Pack modules and their dependencies into a compressed archive"
+    )
+    bundle_create_parser.add_argument(
+        "modules", nargs="*", help="Module names (default: scan the project for cmakehub_use)"
+    )
+    bundle_create_parser.add_argument(
+        "--output",
+        "-o",
+        default="cmakehub-bundle.tar.gz",
+        help="Archive to write; .tar.xz, .tar.bz2 and .tar select the compression "
+        "(default: cmakehub-bundle.tar.gz)",
+    )
+    bundle_create_parser.add_argument("--all", action="store_true", help="Bundle every module in the index")
+    bundle_create_parser.add_argument("--category", "-c", help="Bundle every module in a category")
+    bundle_create_parser.add_argument(
+        "--source", "-s", help="Project directory to scan (default: the current directory)"
+    )
+    bundle_create_parser.add_argument(
+        "--locked",
+        nargs="?",
+        const="cmakehub.lock",
+        metavar="LOCKFILE",
+        help="Bundle the commits pinned by a lock file (default: cmakehub.lock)",
+    )
+    bundle_create_parser.add_argument(
+        "--jobs", "-j", type=int, default=8, help="Parallel downloads (default: 8)"
+    )
+
+    bundle_import_parser = bundle_subparsers.add_parser(
+        "import", help="Unpack a bundle into the cache, with no network access"
+    )
+    bundle_import_parser.add_argument("file", help="Bundle archive, or - to read standard input")
+    bundle_import_parser.add_argument(
+        "--index", "-i", help="Also write the bundle's index snapshot to this file"
+    )
 
     # Update-index command
     update_index_parser = subparsers.add_parser("update-index", help="Update modules index from GitHub")
     update_index_parser.add_argument(
         "--local", "-l", action="store_true", help="Save to repository root (for development)"
     )
+    update_index_parser.add_argument(
+        "--delta", "-d", action="store_true", help="Download only changed modules when possible"
+    )
+    update_index_parser.add_argument(
+        "--force", "-f", action="store_true", help="Download the full index even if unchanged"
+    )
+
+    # Compile-index command
+    compile_index_parser = subparsers.add_parser(
+        "compile-index", help="Precompile modules.json into a CMake include for the loader"
+    )
+    compile_index_parser.add_argument(
+        "--index", "-i", default="modules.json", help="Index to compile (default: modules.json)"
+    )
+    compile_index_parser.add_argument(
+        "--output", "-o", help="Output file (default: <index>_index.cmake next to the index)"
+    )
 
     # Use command
     use_parser = subparsers.add_parser(
@@ -118,6 +299,28 @@ For more information, visit: https://github.com/caomengxuan666/CMakeHub
     init_parser = subparsers.add_parser("init", help="Initialize a new project with CMakeHub")
     init_parser.add_argument("name", help="Project name")
 
+    # Serve command
+    serve_parser = subparsers.add_parser(
+        "serve", help="Keep the index in memory and answer requests on a Unix socket"
+    )
+    serve_parser.add_argument(
+        "--socket", "-s", help="Socket path (default: $CMH_SERVER_SOCKET or .server.sock in the cache)"
+    )
+    serve_parser.add_argument("--stop", action="store_true", help="Stop the running server")
+
+    return parser
+
+
+def main():
+    """Main entry point for cmakehub CLI"""
+    # Read-only commands are answered by a running `cmakehub serve`, if there is one
+    from cli.client import run_on_server
+
+    exit_code = run_on_server(sys.argv[1:])
+    if exit_code is not None:
+        return exit_code
+
+    parser = build_parser()
     args = parser.parse_args()
 
     if not args.command:
@@ -126,27 +329,10 @@ For more information, visit: https://github.com/caomengxuan666/CMakeHub
 
     # Execute command
     try:
-        if args.command == "list":
-            return cmd_list.list_modules(args)
-        elif args.command == "search":
-            return cmd_search.search_modules(args)
-        elif args.command == "info":
-            return cmd_info.show_info(args)
-        elif args.command == "cache":
-            return cmd_cache.cache_manager(args)
-        elif args.command == "check":
-            return cmd_check.check_compatibility(args)
-        elif args.command == "update":
-            return cmd_update.update_modules(args)
-        elif args.command == "update-index":
-            return cmd_update_index.update_index(args)
-        elif args.command == "use":
-            return cmd_use.use_module(args)
-        elif args.command == "init":
-            return cmd_init.init_project(args)
-        else:
+        if args.command not in COMMANDS:
             parser.print_help()
             return 1
+        return get_command_handler(args.command)(args)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -0,0 +1,194 @@
+"""
+Module records
+
+Index entries are converted once, when the registry is built, into compact
+Module records: attributes live in __slots__ instead of a per-module dict,
+list fields become tuples, and low-cardinality strings (category, license,
+platforms, ...) are interned so every module shares one copy.
+
+FIELDS is the single schema of a modules.json entry; scripts/validate_modules.py
+checks index entries against it with Module.check().
+"""
+
+import sys
+
+# (field, type, required) for every field of a modules.json entry, in index order
+FIELDS = (
+    ("name", str, True),
+    ("description", str, True),
+    ("category", str, True),
+    ("author", str, False),
+    ("repository", str, True),
+    ("path", str, True),
+    ("license", str, True),
+    ("stars", int, False),
+    ("last_updated", str, False),
+    ("version", str, False),
+    ("cmake_minimum_required", str, False),
+    ("cpp_minimum_required", str, False),
+    ("dependencies", list, False),
+    ("conflicts", list, False),
+    ("tags", list, False),
+    ("platform", list, False),
+)
+
+FIELD_NAMES = tuple(field for field, _, _ in FIELDS)
+LIST_FIELDS = frozenset(field for field, kind, _ in FIELDS if kind is list)
+SCALAR_FIELDS = frozenset(FIELD_NAMES) - LIST_FIELDS
+FIELD_SET = frozenset(FIELD_NAMES)
+
+# Fields (or list items) drawn from a small vocabulary, shared via sys.intern
+INTERNED_FIELDS = frozenset(
+    ["category", "license", "version", "cmake_minimum_required", "cpp_minimum_required", "tags", "platform"]
+)
+
+TYPE_NAMES = {str: "a string", int: "an integer", list: "a list"}
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Module:
+    """
+    One module of the index. Fields are read as attributes (module.name,
+    module.tags); a scalar field missing from the index entry is None and a
+    missing list field is an empty tuple. Fields outside the schema are kept
+    in `extra`. The read-only mapping methods (module["name"], module.get(),
+    dict(module)) mirror the index entry, for code that handles raw entries too.
+    """
+
+    __slots__ = FIELD_NAMES + ("extra",)
+
+    def __init__(
+        self,
+        name,
+        description=None,
+        category=None,
+        author=None,
+        repository=None,
+        path=None,
+        license=None,
+        stars=None,
+        last_updated=None,
+        version=None,
+        cmake_minimum_required=None,
+        cpp_minimum_required=None,
+        dependencies=(),
+        conflicts=(),
+        tags=(),
+        platform=(),
+        extra=None,
+    ):
+        self.name = name
+        self.description = description
+        self.category = category
+        self.author = author
+        self.repository = repository
+        self.path = path
+        self.license = license
+        self.stars = stars
+        self.last_updated = last_updated
+        self.version = version
+        self.cmake_minimum_required = cmake_minimum_required
+        self.cpp_minimum_required = cpp_minimum_required
+        self.dependencies = dependencies
+        self.conflicts = conflicts
+        self.tags = tags
+        self.platform = platform
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Convert an index entry"""
+        values = {}
+        extra = None
+        for key, value in data.items():
+            if key in SCALAR_FIELDS:
+                values[key] = _intern(value) if key in INTERNED_FIELDS else value
+            elif key in LIST_FIELDS and isinstance(value, (list, tuple)):
+                if key in INTERNED_FIELDS:
+                    values[key] = tuple(_intern(item) for item in value)
+                else:
+                    values[key] = tuple(value)
+            else:
+                # Unknown fields, and list fields of the wrong type, are kept as-is
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        return cls(extra=extra, **values)
+
+    @staticmethod
+    def check(data):
+        """Problems of an index entry against the schema (missing required fields, wrong types)"""
+        issues = []
+        for field, kind, required in FIELDS:
+            value = data.get(field)
+            if value is None or value == "":
+                if required:
+                    issues.append(f"Missing required field: {field}")
+                continue
+            # bool is an int subclass, but not a valid star count
+            if not isinstance(value, kind) or isinstance(value, bool):
+                issues.append(f"Field {field} should be {TYPE_NAMES[kind]}: {value!r}")
+            elif kind is list and not all(isinstance(item, str) for item in value):
+                issues.append(f"Field {field} should only contain strings: {value!r}")
+        return issues
+
+    def to_dict(self):
+        """The index entry this record was built from (list fields as lists)"""
+        data = {}
+        for field in FIELD_NAMES:
+            value = getattr(self, field)
+            if field in LIST_FIELDS:
+                data[field] = list(value)
+            elif value is not None:
+                data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def replace(self, **changes):
+        """A copy with some fields changed"""
+        values = {field: getattr(self, field) for field in self.__slots__}
+        values.update(changes)
+        return Module(**values)
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def __getitem__(self, key):
+        if key in FIELD_SET:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_tuple(self):
+        """Positional state of the record; Module(*state) rebuilds it (used by index snapshots)"""
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, Module):
+            return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Module({self.name!r})"
@@ -4,7 +4,6 @@ Package data utilities for CMakeHub CLI
 
 import os
 import sys
-import json
 
 
 def get_package_data_path(filename):
@@ -40,12 +39,49 @@ def get_package_data_path(filename):
     raise FileNotFoundError(f"{filename} not found in package data or repository root")
 
 
-def load_modules_json():
-    """Load modules.json from package data"""
-    modules_json_path = get_package_data_path("modules.json")
+def parse_modules_json(modules_json_path):
+    """Parse a modules.json file (all shards of a sharded index)"""
+    from cli.sharded_index import load_index_data
+
+    return load_index_data(modules_json_path)
+
+
+def iter_modules(modules_json_path=None, fields=None):
+    """
+    Yield the modules of an index one at a time.
+
+    The "modules" array is parsed incrementally, so memory use does not grow
+    with the size of the index. Other top-level fields (e.g. "categories")
+    are stored in `fields`, if given, as they are read; a field that follows
+    the modules array is only available once iteration finishes. The shards
+    of a sharded index are read one after another.
+    """
+    from cli.json_stream import JsonStreamReader, iter_array_values, iter_object_items
+    from cli.sharded_index import is_sharded, read_shard
+
+    if modules_json_path is None:
+        modules_json_path = get_package_data_path("modules.json")
+    if fields is None:
+        fields = {}
 
     with open(modules_json_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        for key, reader in iter_object_items(JsonStreamReader(f)):
+            if key == "modules":
+                yield from iter_array_values(reader)
+            else:
+                fields[key] = reader.decode_value()
+
+    if is_sharded(fields):
+        for shard_key in sorted(fields["shards"]):
+            yield from read_shard(modules_json_path, fields, shard_key)
+
+
+def load_modules_json():
+    """Load modules.json from package data, reusing the compiled snapshot if current"""
+    from cli.index_cache import load_snapshot
+
+    modules_json_path = get_package_data_path("modules.json")
+    return load_snapshot("modules", modules_json_path, parse_modules_json)
 
 
 def get_loader_path():
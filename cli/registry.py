@@ -0,0 +1,157 @@
+"""
+Module registry - indexed view of modules.json shared by all CLI commands
+"""
+
+import json
+
+from cli.module import Module
+from cli.package_data import get_package_data_path
+from cli.sharded_index import find_module, is_sharded, load_index_data
+
+
+class ModuleRegistry:
+    """
+    Modules from the index, as Module records, with dict-based lookup by
+    name and secondary indexes by category, tag, license and platform.
+    """
+
+    def __init__(self, data):
+        self._index([Module.from_dict(module) for module in data.get("modules", [])], data.get("categories", {}))
+
+    @classmethod
+    def from_modules(cls, modules, categories):
+        """Build a registry from Module records"""
+        registry = cls.__new__(cls)
+        registry._index(modules, categories)
+        return registry
+
+    def _index(self, modules, categories):
+        self.modules = modules
+        self.categories = categories
+
+        self.by_name = {}
+        self.by_category = {}
+        self.by_tag = {}
+        self.by_license = {}
+        self.by_platform = {}
+
+        for module in self.modules:
+            # Keep the first entry on duplicate names, like the old linear scans did
+            self.by_name.setdefault(module.name, module)
+            self.by_category.setdefault(module.category or "uncategorized", []).append(module)
+            self.by_license.setdefault(module.license or "", []).append(module)
+            for tag in module.tags:
+                self.by_tag.setdefault(tag, []).append(module)
+            for platform in module.platform:
+                self.by_platform.setdefault(platform, []).append(module)
+
+    def __len__(self):
+        return len(self.modules)
+
+    def __iter__(self):
+        return iter(self.modules)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def get(self, name):
+        """Get a module by name, or None if it is not in the index"""
+        return self.by_name.get(name)
+
+    def in_category(self, category):
+        """Modules in a category"""
+        return self.by_category.get(category, [])
+
+    def with_tag(self, tag):
+        """Modules carrying a tag"""
+        return self.by_tag.get(tag, [])
+
+    def with_license(self, license_name):
+        """Modules released under a license"""
+        return self.by_license.get(license_name, [])
+
+    def on_platform(self, platform):
+        """Modules that declare support for a platform"""
+        return self.by_platform.get(platform, [])
+
+
+class ShardedModuleRegistry(ModuleRegistry):
+    """
+    Registry over a sharded index (see cli.sharded_index). Lookups by name
+    read only the module's shard; iterating or the secondary indexes load
+    every shard on first use.
+    """
+
+    LAZY_ATTRIBUTES = ("modules", "by_name", "by_category", "by_tag", "by_license", "by_platform")
+
+    def __init__(self, index_path, manifest):
+        self.index_path = index_path
+        self.manifest = manifest
+        self.categories = manifest.get("categories", {})
+        self.shard_modules = {}
+
+    def __getattr__(self, attribute):
+        if attribute not in self.LAZY_ATTRIBUTES:
+            raise AttributeError(attribute)
+        ModuleRegistry.__init__(self, load_index_data(self.index_path))
+        return self.__dict__[attribute]
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def get(self, name):
+        """Get a module by name, or None if it is not in the index"""
+        if "by_name" in self.__dict__:
+            return self.by_name.get(name)
+        if name not in self.shard_modules:
+            module = find_module(self.index_path, self.manifest, name)
+            self.shard_modules[name] = Module.from_dict(module) if module is not None else None
+        return self.shard_modules[name]
+
+
+def registry_to_snapshot(registry):
+    """Plain-data state of a registry, for the index snapshot"""
+    if isinstance(registry, ShardedModuleRegistry):
+        return ("sharded", registry.index_path, registry.manifest)
+    return ("modules", [module.to_tuple() for module in registry.modules], registry.categories)
+
+
+def registry_from_snapshot(state):
+    """Rebuild a registry from registry_to_snapshot() state"""
+    kind, first, second = state
+    if kind == "sharded":
+        return ShardedModuleRegistry(first, second)
+    return ModuleRegistry.from_modules([Module(*values) for values in first], second)
+
+
+def build_registry(modules_json_path):
+    """Build a registry from a modules.json file or shard manifest"""
+    with open(modules_json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if is_sharded(data):
+        return ShardedModuleRegistry(modules_json_path, data)
+    return ModuleRegistry(data)
+
+
+_registry = None
+
+
+def get_registry():
+    """Get the process-wide module registry, loading it on first use"""
+    global _registry
+
+    if _registry is None:
+        from cli.index_cache import load_snapshot
+
+        modules_json_path = get_package_data_path("modules.json")
+        _registry = load_snapshot(
+            "registry", modules_json_path, build_registry, registry_to_snapshot, registry_from_snapshot
+        )
+
+    return _registry
+
+
+def reset_registry():
+    """Forget the process-wide registry, so the next get_registry() reloads the index"""
+    global _registry
+    _registry = None
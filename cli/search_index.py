@@ -0,0 +1,278 @@
+"""
+Full-text search index for CMakeHub CLI
+
+Modules are tokenized once into an inverted index over their name, description,
+tags, category and author. Postings carry precomputed BM25F weights, so a query
+only has to sum weights. The index is persisted with the compiled index snapshot.
+"""
+
+import bisect
+import heapq
+import math
+import re
+from array import array
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Per-field weights; matches in the module name count the most
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "tags": 2.0,
+    "category": 1.5,
+    "author": 1.0,
+    "description": 1.0,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# A term reached only through prefix expansion scores a little below an exact match
+PREFIX_PENALTY = 0.8
+# Upper bound on vocabulary terms a single query prefix expands to
+MAX_PREFIX_EXPANSION = 64
+# Prefixes shorter than this only match exact terms
+MIN_PREFIX_LENGTH = 2
+# Added when the whole query is exactly a module's name
+EXACT_NAME_BONUS = 10.0
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def module_fields(module):
+    """Get the searchable text of a module, by field"""
+    return {
+        "name": module.name or "",
+        "description": module.description or "",
+        "tags": " ".join(module.tags),
+        "category": module.category or "",
+        "author": module.author or "",
+    }
+
+
+def parse_query(query, match_all=True):
+    """
+    Parse a query into AND-ed clauses of OR-ed alternatives.
+    Words are AND-ed unless joined by OR ("gtest OR catch2 coverage").
+    Each alternative is the token list of one word, and all its tokens must match.
+    With match_all=False, every word becomes an alternative of a single clause.
+    """
+    clauses = []
+    join_next = False
+
+    for word in query.split():
+        if word == "OR":
+            join_next = True
+            continue
+
+        tokens = tokenize(word)
+        if not tokens:
+            continue
+
+        if join_next and clauses:
+            clauses[-1].append(tokens)
+        else:
+            clauses.append([tokens])
+        join_next = False
+
+    if not match_all and clauses:
+        clauses = [[alternative for clause in clauses for alternative in clause]]
+
+    return clauses
+
+
+def intersect_scores(left, right):
+    """Sum two score dicts over the documents present in both (left=None means no filter)"""
+    if left is None:
+        return right
+    if len(right) < len(left):
+        left, right = right, left
+    return {doc_id: score + right[doc_id] for doc_id, score in left.items() if doc_id in right}
+
+
+class SearchIndex:
+    """Inverted index with BM25F-ranked, prefix-aware AND/OR queries"""
+
+    def __init__(self, modules):
+        self.names = [module.name for module in modules]
+        self.name_ids = {}
+        for doc_id, name in enumerate(self.names):
+            self.name_ids.setdefault(name.lower(), doc_id)
+
+        # Tokenize every field once
+        docs = []
+        total_lengths = dict.fromkeys(FIELD_WEIGHTS, 0)
+        for module in modules:
+            fields = {f: tokenize(text) for f, text in module_fields(module).items()}
+            for field, tokens in fields.items():
+                total_lengths[field] += len(tokens)
+            docs.append(fields)
+
+        doc_count = max(len(docs), 1)
+        avg_lengths = {f: (total_lengths[f] / doc_count) or 1.0 for f in FIELD_WEIGHTS}
+
+        # Accumulate length-normalized, field-weighted term frequencies (BM25F)
+        frequencies = {}
+        for doc_id, fields in enumerate(docs):
+            for field, tokens in fields.items():
+                if not tokens:
+                    continue
+                norm = 1.0 - BM25_B + BM25_B * len(tokens) / avg_lengths[field]
+                weight = FIELD_WEIGHTS[field] / norm
+                for token in tokens:
+                    postings = frequencies.setdefault(token, {})
+                    postings[doc_id] = postings.get(doc_id, 0.0) + weight
+
+        # Flatten into a sorted vocabulary with one contiguous postings array,
+        # which keeps the snapshot compact and quick to load
+        self.terms = sorted(frequencies)
+        self.offsets = array("I", [0])
+        self.doc_ids = array("I")
+        self.weights = array("f")
+
+        for term in self.terms:
+            postings = frequencies[term]
+            idf = math.log(1.0 + (len(docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id in sorted(postings):
+                tf = postings[doc_id]
+                self.doc_ids.append(doc_id)
+                self.weights.append(idf * tf * (BM25_K1 + 1.0) / (tf + BM25_K1))
+            self.offsets.append(len(self.doc_ids))
+
+    def to_snapshot(self):
+        """Plain-data state of the index, for the index snapshot"""
+        arrays = (self.offsets.tobytes(), self.doc_ids.tobytes(), self.weights.tobytes())
+        return (self.names, self.name_ids, self.terms) + arrays
+
+    @classmethod
+    def from_snapshot(cls, state):
+        """Rebuild an index from to_snapshot() state"""
+        index = cls.__new__(cls)
+        index.names, index.name_ids, index.terms, offsets, doc_ids, weights = state
+        index.offsets, index.doc_ids, index.weights = array("I"), array("I"), array("f")
+        index.offsets.frombytes(offsets)
+        index.doc_ids.frombytes(doc_ids)
+        index.weights.frombytes(weights)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def _matching_terms(self, token):
+        """Yield (term index, factor) for the exact term and its prefix expansions"""
+        position = bisect.bisect_left(self.terms, token)
+
+        if position < len(self.terms) and self.terms[position] == token:
+            yield position, 1.0
+            position += 1
+
+        if len(token) < MIN_PREFIX_LENGTH:
+            return
+
+        end = min(position + MAX_PREFIX_EXPANSION, len(self.terms))
+        while position < end and self.terms[position].startswith(token):
+            yield position, PREFIX_PENALTY
+            position += 1
+
+    def _postings(self, term_index, factor):
+        """Postings of one vocabulary term as a {doc id: weight} dict"""
+        start, stop = self.offsets[term_index], self.offsets[term_index + 1]
+        weights = self.weights[start:stop]
+        if factor != 1.0:
+            weights = [weight * factor for weight in weights]
+        return dict(zip(self.doc_ids[start:stop], weights))
+
+    def _token_scores(self, token):
+        """Best score per document for a single query token"""
+        scores = None
+        for term_index, factor in self._matching_terms(token):
+            postings = self._postings(term_index, factor)
+            if scores is None:
+                scores = postings
+                continue
+            # Keep the best-matching term per document; only the overlap needs a loop
+            for doc_id in scores.keys() & postings.keys():
+                if postings[doc_id] < scores[doc_id]:
+                    postings[doc_id] = scores[doc_id]
+            scores.update(postings)
+        return scores or {}
+
+    def _alternative_scores(self, tokens):
+        """Scores of documents matching every token of one query word"""
+        result = None
+        for token in tokens:
+            result = intersect_scores(result, self._token_scores(token))
+            if not result:
+                return {}
+        return result
+
+    def search(self, query, match_all=True, limit=None):
+        """
+        Search the index, returning a list of (module name, score) ordered by
+        descending score.
+        """
+        clauses = parse_query(query, match_all)
+        if not clauses:
+            return []
+
+        result = None
+        for clause in clauses:
+            # OR: union of the alternatives
+            clause_scores = {}
+            for alternative in clause:
+                scores = self._alternative_scores(alternative)
+                for doc_id in clause_scores.keys() & scores.keys():
+                    scores[doc_id] += clause_scores[doc_id]
+                clause_scores.update(scores)
+
+            # AND: intersection with the clauses so far
+            result = intersect_scores(result, clause_scores)
+            if not result:
+                return []
+
+        exact_id = self.name_ids.get(query.strip().lower())
+        if exact_id in result:
+            result[exact_id] += EXACT_NAME_BONUS
+
+        names = self.names
+        if limit is not None:
+            top = heapq.nlargest(limit, result.items(), key=lambda item: item[1])
+            ranked = [(names[doc_id], score) for doc_id, score in top]
+        else:
+            ranked = [(names[doc_id], score) for doc_id, score in result.items()]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+
+def build_search_index(modules_json_path):
+    """Build the search index for the registry's modules"""
+    from cli.registry import get_registry
+
+    return SearchIndex(get_registry().modules)
+
+
+_search_index = None
+
+
+def get_search_index():
+    """Get the process-wide search index, loading it on first use"""
+    global _search_index
+
+    if _search_index is None:
+        from cli.index_cache import load_snapshot
+        from cli.package_data import get_package_data_path
+
+        modules_json_path = get_package_data_path("modules.json")
+        _search_index = load_snapshot(
+            "search", modules_json_path, build_search_index, SearchIndex.to_snapshot, SearchIndex.from_snapshot
+        )
+
+    return _search_index
+
+
+def reset_search_index():
+    """Forget the process-wide search index, so the next get_search_index() reloads it"""
+    global _search_index
+    _search_index = None
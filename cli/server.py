@@ -0,0 +1,307 @@
+"""
+Server mode for CMakeHub CLI
+
+`cmakehub serve` keeps the parsed registry, the search indexes and the list
+of cached modules in memory and answers JSON-RPC 2.0 requests on a Unix
+socket, one JSON document per line in each direction. Every request first
+stats modules.json and the cache directory, and whatever was derived from
+a file that changed is reloaded.
+
+Methods (params by name):
+    ping                                      -> {"version", "pid"}
+    list     category=None                    -> [{"name", "category", "description"}]
+    search   query, category=None, any=False, fuzzy=False, limit=None
+                                              -> [{"name", "category", "description"}]
+    info     name                             -> module entry
+    check    name                             -> platform, dependency and conflict status
+    cached                                    -> names of cached modules
+    run      argv                             -> {"exit_code", "stdout", "stderr"} of a CLI
+                                                 command (list, search, info or check)
+    shutdown                                  -> true, then the server exits
+"""
+
+import contextlib
+import inspect
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from cli import __version__
+from cli.client import SERVED_COMMANDS, ServerError, connect, get_socket_path
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+MODULE_NOT_FOUND = -32000
+
+
+def file_signature(path):
+    """(mtime, size) of a file or directory, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ServerState:
+    """In-memory index and cache state, reloaded when the files behind them change"""
+
+    def __init__(self):
+        # Held while refreshing and while a CLI command runs with redirected output
+        self.lock = threading.RLock()
+        self.index_signature = None
+        self.cache_signature = None
+        self.cached = []
+        self.parser = None
+        self.stopping = False
+
+    def refresh(self):
+        """Drop what was derived from modules.json or the cache directory if they changed"""
+        from cli.cache_dirs import get_cache_dir
+        from cli.commands.cache import list_cached_modules
+        from cli.fuzzy_index import reset_fuzzy_index
+        from cli.package_data import get_package_data_path
+        from cli.registry import get_registry, reset_registry
+        from cli.search_index import reset_search_index
+
+        with self.lock:
+            # A sharded index rewrites its manifest after any shard changes
+            signature = file_signature(get_package_data_path("modules.json"))
+            if signature != self.index_signature:
+                reset_registry()
+                reset_search_index()
+                reset_fuzzy_index()
+                get_registry()
+                self.index_signature = signature
+
+            cache_dir = get_cache_dir()
+            signature = file_signature(cache_dir)
+            if signature != self.cache_signature:
+                self.cached = sorted(list_cached_modules(cache_dir)) if signature else []
+                self.cache_signature = signature
+
+    def run(self, argv):
+        """Run a read-only CLI command, capturing its output"""
+        from cli.main import build_parser, get_command_handler
+
+        if not argv or argv[0] not in SERVED_COMMANDS:
+            raise ServerError(INVALID_PARAMS, f"Only {', '.join(SERVED_COMMANDS)} can run on the server")
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with self.lock, contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            if self.parser is None:
+                self.parser = build_parser()
+            try:
+                args = self.parser.parse_args(argv)
+                exit_code = get_command_handler(args.command)(args)
+            except SystemExit as e:
+                # argparse errors and --help
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def summarize(module):
+    """Short description of a module for list and search results"""
+    return {"name": module.name, "category": module.category, "description": module.description}
+
+
+def get_module(name):
+    """A module by name, or a MODULE_NOT_FOUND error with suggestions"""
+    from cli.fuzzy_index import get_fuzzy_index
+    from cli.registry import get_registry
+
+    module = get_registry().get(name)
+    if module is None:
+        suggestions = get_fuzzy_index().suggest_modules(name, limit=3)
+        raise ServerError(MODULE_NOT_FOUND, f"Module '{name}' not found", {"suggestions": suggestions})
+    return module
+
+
+def method_ping(state):
+    return {"version": __version__, "pid": os.getpid()}
+
+
+def method_list(state, category=None):
+    from cli.registry import get_registry
+
+    registry = get_registry()
+    modules = registry.in_category(category) if category else registry.modules
+    return [summarize(module) for module in modules]
+
+
+def method_search(state, query, category=None, any=False, fuzzy=False, limit=None):
+    from cli.commands.search import find_modules
+    from cli.registry import get_registry
+
+    results = find_modules(get_registry(), query, category, match_any=any, fuzzy=fuzzy)
+    return [summarize(module) for module in results[:limit]]
+
+
+def method_info(state, name):
+    return get_module(name).to_dict()
+
+
+def method_check(state, name):
+    from cli.commands.check import get_current_platform
+    from cli.registry import get_registry
+
+    module = get_module(name)
+    registry = get_registry()
+    current_platform = get_current_platform()
+    return {
+        "name": module.name,
+        "platform": {
+            "required": list(module.platform),
+            "current": current_platform,
+            "supported": not module.platform or current_platform in module.platform,
+        },
+        "dependencies": {dep: dep in registry for dep in module.dependencies},
+        "conflicts": list(module.conflicts),
+        "cmake_minimum_required": module.cmake_minimum_required or "",
+        "cpp_minimum_required": module.cpp_minimum_required or "",
+    }
+
+
+def method_cached(state):
+    return list(state.cached)
+
+
+def method_run(state, argv):
+    return state.run(list(argv))
+
+
+def method_shutdown(state):
+    state.stopping = True
+    return True
+
+
+METHODS = {
+    "ping": method_ping,
+    "list": method_list,
+    "search": method_search,
+    "info": method_info,
+    "check": method_check,
+    "cached": method_cached,
+    "run": method_run,
+    "shutdown": method_shutdown,
+}
+
+
+def error_response(request_id, code, message, data=None):
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+def handle_request(state, line):
+    """Answer one JSON-RPC request line; returns the response, or None for a notification"""
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return error_response(None, PARSE_ERROR, f"Parse error: {e}")
+    if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+        return error_response(None, INVALID_REQUEST, "Invalid request")
+
+    request_id = request.get("id")
+    method = METHODS.get(request["method"])
+    params = request.get("params", {})
+    if method is None:
+        return error_response(request_id, METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+    if not isinstance(params, dict):
+        return error_response(request_id, INVALID_PARAMS, "Params must be an object")
+
+    try:
+        inspect.signature(method).bind(state, **params)
+    except TypeError as e:
+        return error_response(request_id, INVALID_PARAMS, f"Invalid params: {e}")
+
+    try:
+        state.refresh()
+        result = method(state, **params)
+    except ServerError as e:
+        return error_response(request_id, e.code, str(e), e.data)
+    except Exception as e:
+        return error_response(request_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+
+    if "id" not in request:
+        return None
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Serve the requests of one connection, one line each"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = handle_request(self.server.state, line.decode("utf-8", errors="replace"))
+            if response is not None:
+                self.reply(response)
+            if self.server.state.stopping:
+                # shutdown() waits for serve_forever() to return, so it cannot run on this thread
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+    def reply(self, response):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class CMakeHubServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """Threaded Unix socket server holding a ServerState"""
+
+        daemon_threads = True
+
+        def __init__(self, socket_path):
+            self.state = ServerState()
+            super().__init__(socket_path, RequestHandler)
+
+
+def is_server_running(socket_path):
+    """Whether a server is accepting connections on a socket"""
+    try:
+        connect(socket_path, timeout=1).close()
+    except OSError:
+        return False
+    return True
+
+
+def serve_forever(socket_path=None):
+    """Run a server until it is stopped; a stale socket file is replaced"""
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("cmakehub serve requires Unix domain sockets")
+
+    socket_path = socket_path or get_socket_path()
+    if os.path.exists(socket_path):
+        if is_server_running(socket_path):
+            raise RuntimeError(f"A server is already listening on {socket_path}")
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+
+    # Only the current user may connect: the socket is created without group
+    # and other permissions, rather than narrowed after bind() made it reachable
+    umask = os.umask(0o077)
+    try:
+        server = CMakeHubServer(socket_path)
+    finally:
+        os.umask(umask)
+    try:
+        server.state.refresh()
+        print(f"Serving on {socket_path} (pid {os.getpid()})", flush=True)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,173 @@
+"""
+Sharded modules index
+
+A very large catalog can be split into a small manifest plus shard files, so
+consumers load only the modules they need. The manifest takes the place of
+modules.json and keeps its top-level fields except "modules":
+
+    {
+      "schema_version": "1.0",
+      "categories": {...},
+      "sharding": {"format": 1, "hash": "sha256", "prefix_length": 2, "directory": "modules.d"},
+      "shards": {"3f": {"sha256": "<digest of modules.d/3f.json>", "modules": ["name", ...]}}
+    }
+
+Each module lives in the shard named by the first prefix_length hex digits of
+the SHA-256 of its name, so a lookup by name computes its shard without
+reading the manifest's name lists (loader.cmake does the same). Shard files
+have the same {"modules": [...]} shape as a monolithic modules.json.
+"""
+
+import hashlib
+import json
+import os
+
+from cli.fs_utils import write_atomic
+
+SHARD_FORMAT = 1
+SHARD_DIR = "modules.d"
+
+# Aim for at most this many modules per shard when choosing the prefix length
+TARGET_SHARD_SIZE = 64
+
+
+def is_sharded(data):
+    """Whether parsed index data is a shard manifest"""
+    return "sharding" in data
+
+
+def load_shard_manifest(index_path):
+    """The manifest of a sharded index, or None for a monolithic one"""
+    with open(index_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if is_sharded(data) else None
+
+
+def get_shard_key(name, prefix_length):
+    """Shard holding a module name (matches loader.cmake)"""
+    return hashlib.sha256(name.encode("utf-8")).hexdigest()[:prefix_length]
+
+
+def choose_prefix_length(module_count):
+    """Shortest prefix length that keeps shards around TARGET_SHARD_SIZE modules"""
+    prefix_length = 1
+    while module_count > TARGET_SHARD_SIZE * 16 ** prefix_length:
+        prefix_length += 1
+    return prefix_length
+
+
+def get_shard_dir(index_path, manifest):
+    """Directory holding the shard files of a manifest"""
+    return os.path.join(os.path.dirname(os.path.abspath(index_path)), manifest["sharding"]["directory"])
+
+
+def get_shard_path(index_path, manifest, key):
+    """Path of one shard file"""
+    return os.path.join(get_shard_dir(index_path, manifest), f"{key}.json")
+
+
+def get_shard_files(index_path, manifest):
+    """Paths of every shard file of a manifest"""
+    return [get_shard_path(index_path, manifest, key) for key in sorted(manifest["shards"])]
+
+
+def serialize(data):
+    """Index text as the repository writes it"""
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def read_shard(index_path, manifest, key):
+    """Modules of one shard, checked against the manifest's digest ([] for an empty shard)"""
+    entry = manifest["shards"].get(key)
+    if entry is None:
+        return []
+    shard_path = get_shard_path(index_path, manifest, key)
+    with open(shard_path, "rb") as f:
+        raw = f.read()
+    if hashlib.sha256(raw).hexdigest() != entry["sha256"]:
+        raise ValueError(f"Shard {shard_path} does not match its digest in the manifest")
+    return json.loads(raw.decode("utf-8")).get("modules", [])
+
+
+def find_module(index_path, manifest, name):
+    """Look up a module by name, reading only its shard"""
+    key = get_shard_key(name, manifest["sharding"]["prefix_length"])
+    for module in read_shard(index_path, manifest, key):
+        if module["name"] == name:
+            return module
+    return None
+
+
+def load_modules(index_path, manifest):
+    """Every module of a sharded index, in shard order"""
+    modules = []
+    for key in sorted(manifest["shards"]):
+        modules.extend(read_shard(index_path, manifest, key))
+    return modules
+
+
+def load_index_data(index_path):
+    """Parse an index into monolithic modules.json data, whether it is sharded or not"""
+    with open(index_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not is_sharded(data):
+        return data
+    merged = {key: value for key, value in data.items() if key not in ("sharding", "shards")}
+    merged["modules"] = load_modules(index_path, data)
+    return merged
+
+
+def write_shard(index_path, manifest, key, modules):
+    """Write one shard file and record it in the manifest (which the caller then writes)"""
+    text = serialize({"modules": modules})
+    write_atomic(get_shard_path(index_path, manifest, key), text)
+    manifest["shards"][key] = {
+        "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "modules": [module["name"] for module in modules],
+    }
+
+
+def write_manifest(index_path, manifest):
+    """Write a manifest, after its shards"""
+    write_atomic(index_path, serialize(manifest))
+
+
+def shard_index(data, index_path, prefix_length=None, directory=SHARD_DIR):
+    """Write monolithic index data as a manifest at index_path plus shard files"""
+    modules = data.get("modules", [])
+    prefix_length = prefix_length or choose_prefix_length(len(modules))
+
+    buckets = {}
+    for module in modules:
+        buckets.setdefault(get_shard_key(module["name"], prefix_length), []).append(module)
+
+    manifest = {key: value for key, value in data.items() if key != "modules"}
+    manifest["sharding"] = {
+        "format": SHARD_FORMAT,
+        "hash": "sha256",
+        "prefix_length": prefix_length,
+        "directory": directory,
+    }
+    manifest["shards"] = {}
+
+    # Shards left over from a previous layout would be picked up by the loader
+    shard_dir = get_shard_dir(index_path, manifest)
+    if os.path.isdir(shard_dir):
+        for filename in os.listdir(shard_dir):
+            if filename.endswith(".json") and filename[:-5] not in buckets:
+                os.remove(os.path.join(shard_dir, filename))
+
+    for key in sorted(buckets):
+        write_shard(index_path, manifest, key, buckets[key])
+    write_manifest(index_path, manifest)
+    return manifest
+
+
+def add_module(index_path, manifest, module):
+    """Add a module to a sharded index, rewriting only its shard and the manifest"""
+    key = get_shard_key(module["name"], manifest["sharding"]["prefix_length"])
+    modules = read_shard(index_path, manifest, key)
+    modules.append(module)
+    modules.sort(key=lambda x: x["name"])
+    write_shard(index_path, manifest, key, modules)
+    write_manifest(index_path, manifest)
@@ -0,0 +1,512 @@
+"""
+Transfer scheduler for CMakeHub CLI
+
+All network work -- HTTP requests and git subprocesses -- goes through a
+Transfer, which runs it on an asyncio event loop with:
+
+- a global concurrency limit and a per-host limit,
+- pooled keep-alive HTTP/1.1 connections, one pool per host,
+- retries with exponential backoff and full jitter (Retry-After is honored),
+- a timeout on connecting and on each read, so a slow but steady download
+  is never cut off while a stalled one fails fast,
+- an optional bandwidth limit shared by every HTTP response body,
+- a single TransferMetrics record for the whole run.
+
+HTTP is spoken directly over asyncio streams, so only the standard library is
+needed. Requests that must go through an HTTP(S) proxy fall back to urllib in
+a worker thread.
+
+    transfer = Transfer(jobs=8)
+    response = transfer.run(transfer.request("GET", url))
+"""
+
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+DEFAULT_JOBS = 8
+DEFAULT_PER_HOST = 8
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 30
+
+# Backoff before retry n (from 0) is random(0, min(MAX_BACKOFF, BASE_BACKOFF * 2**n))
+BASE_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset([408, 429, 500, 502, 503, 504])
+REDIRECT_STATUSES = frozenset([301, 302, 303, 307, 308])
+MAX_REDIRECTS = 5
+
+READ_CHUNK_SIZE = 64 * 1024
+USER_AGENT = "cmakehub"
+
+
+class TransferError(OSError):
+    """A request that failed after all retries (url and, for HTTP errors, status)"""
+
+    def __init__(self, message, url=None, status=None):
+        super().__init__(message)
+        self.url = url
+        self.status = status
+
+
+class Response:
+    """An HTTP response; header names are lowercase"""
+
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def raise_for_status(self):
+        """Raise TransferError for 4xx and 5xx responses"""
+        if self.status >= 400:
+            raise TransferError(f"HTTP Error {self.status}: {self.reason}", self.url, self.status)
+        return self
+
+
+class TransferMetrics:
+    """Counters for everything a Transfer did"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.jobs = 0
+        self.retries = 0
+        self.failures = 0
+        self.bytes_received = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.by_host = {}
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def summary(self):
+        """One-line summary, e.g. for a command's closing message"""
+        parts = [f"{self.requests} request(s)"]
+        if self.jobs:
+            parts.append(f"{self.jobs} job(s)")
+        parts.append(f"{self.bytes_received / 1024:.1f} KiB")
+        if self.connections_opened:
+            parts.append(
+                f"{self.connections_opened} connection(s), {self.connections_reused} reused"
+            )
+        if self.retries:
+            parts.append(f"{self.retries} retried")
+        if self.failures:
+            parts.append(f"{self.failures} failed")
+        return ", ".join(parts) + f" in {self.elapsed:.1f}s"
+
+
+class BandwidthLimiter:
+    """Token bucket shared by all response bodies (bytes per second)"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.allowance = rate
+        self.updated = time.monotonic()
+
+    async def consume(self, nbytes):
+        while True:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.allowance >= nbytes or self.allowance >= self.rate:
+                self.allowance -= nbytes
+                return
+            await asyncio.sleep((nbytes - self.allowance) / self.rate)
+
+
+def parse_rate(text):
+    """Bytes per second from "500K", "2M", "1.5G" or a plain number; None for empty or 0"""
+    if not text:
+        return None
+    text = text.strip().upper().rstrip("B").rstrip("/S")
+    multiplier = 1
+    for suffix, factor in (("K", 1024), ("M", 1024 ** 2), ("G", 1024 ** 3)):
+        if text.endswith(suffix):
+            text, multiplier = text[:-1], factor
+            break
+    rate = float(text) * multiplier
+    return rate or None
+
+
+def get_transfer_options():
+    """Transfer settings from the environment (CMH_TRANSFER_PER_HOST, _RETRIES, _BANDWIDTH)"""
+    options = {}
+    if os.environ.get("CMH_TRANSFER_PER_HOST"):
+        options["per_host"] = int(os.environ["CMH_TRANSFER_PER_HOST"])
+    if os.environ.get("CMH_TRANSFER_RETRIES"):
+        options["retries"] = int(os.environ["CMH_TRANSFER_RETRIES"])
+    if os.environ.get("CMH_TRANSFER_BANDWIDTH"):
+        options["bandwidth"] = parse_rate(os.environ["CMH_TRANSFER_BANDWIDTH"])
+    return options
+
+
+def get_proxy(scheme, host):
+    """Proxy URL configured for a scheme and host, or None"""
+    import urllib.request
+
+    if urllib.request.proxy_bypass(host or ""):
+        return None
+    return urllib.request.getproxies().get(scheme)
+
+
+class ProtocolError(OSError):
+    """Malformed HTTP response"""
+
+
+class Connection:
+    """One HTTP/1.1 connection"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+
+class Transfer:
+    """
+    Scheduler for HTTP requests and other network jobs. Use one Transfer per
+    batch; run() drives a coroutine on a fresh event loop and closes pooled
+    connections afterwards.
+    """
+
+    def __init__(
+        self,
+        jobs=DEFAULT_JOBS,
+        per_host=DEFAULT_PER_HOST,
+        retries=DEFAULT_RETRIES,
+        bandwidth=None,
+        timeout=DEFAULT_TIMEOUT,
+        progress=None,
+    ):
+        self.jobs = max(1, jobs)
+        self.per_host = max(1, per_host)
+        self.retries = max(0, retries)
+        self.bandwidth = bandwidth
+        self.timeout = timeout
+        self.progress = progress
+        self.metrics = TransferMetrics()
+        self.ssl_context = None
+        self.proxies = {}
+
+    @classmethod
+    def from_environment(cls, **options):
+        """A Transfer with settings from get_transfer_options(), overridden by options"""
+        return cls(**dict(get_transfer_options(), **options))
+
+    def run(self, coroutine):
+        """Run a coroutine using this Transfer to completion and return its result"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        # Locks and pools belong to the loop they are used on
+        self.slots = asyncio.Semaphore(self.jobs)
+        self.host_slots = {}
+        self.idle = {}
+        self.limiter = BandwidthLimiter(self.bandwidth) if self.bandwidth else None
+        self.executor = ThreadPoolExecutor(max_workers=self.jobs)
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle = {}
+            # Let the transports finish closing, so servers see the connections end
+            loop.run_until_complete(asyncio.sleep(0))
+            self.executor.shutdown(wait=True)
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def _host_slot(self, host):
+        if host not in self.host_slots:
+            self.host_slots[host] = asyncio.Semaphore(self.per_host)
+        return self.host_slots[host]
+
+    def backoff_delay(self, attempt, response=None):
+        """Seconds to wait before retry `attempt` (0-based): full jitter, or Retry-After"""
+        delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), MAX_BACKOFF * 2))
+        return delay
+
+    def _count(self, host):
+        self.metrics.by_host[host] = self.metrics.by_host.get(host, 0) + 1
+
+    async def request(self, method, url, headers=None, body=None):
+        """
+        Send an HTTP request, following redirects and retrying connection errors,
+        timeouts and RETRY_STATUSES. Returns the final Response (call
+        raise_for_status() to treat 4xx/5xx as errors); raises TransferError if
+        no response was received.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._request_with_retries(method, url, headers, body)
+            location = response.headers.get("location")
+            if response.status not in REDIRECT_STATUSES or not location:
+                break
+            url = urljoin(url, location)
+            if response.status == 303:
+                method, body = "GET", None
+        if self.progress:
+            self.progress(self.metrics, url)
+        return response
+
+    async def _request_with_retries(self, method, url, headers, body):
+        host = urlsplit(url).hostname or ""
+        attempt = 0
+        while True:
+            response = None
+            error = None
+            # The host slot first, so requests queued for a busy host do not hold global slots
+            async with self._host_slot(host), self.slots:
+                self.metrics.requests += 1
+                self._count(host)
+                try:
+                    response = await self._send(method, url, headers or {}, body)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                    error = e
+
+            if response is not None and response.status not in RETRY_STATUSES:
+                return response
+            if attempt >= self.retries:
+                self.metrics.failures += 1
+                if response is not None:
+                    return response
+                raise TransferError(f"{url}: {str(error) or 'timed out'}", url) from error
+
+            self.metrics.retries += 1
+            await asyncio.sleep(self.backoff_delay(attempt, response))
+            attempt += 1
+
+    async def _send(self, method, url, headers, body):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise TransferError(f"Unsupported URL scheme: {url}", url)
+        key = (parts.scheme, parts.hostname, parts.port)
+
+        if key not in self.proxies:
+            self.proxies[key] = get_proxy(parts.scheme, parts.hostname)
+        if self.proxies[key]:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.executor, urllib_request, method, url, headers, body, self.timeout
+            )
+
+        # A pooled connection may have been closed by the server while idle;
+        # only such a stale connection is retried here, without counting an attempt
+        while True:
+            connection = await self._acquire(key)
+            try:
+                response, reusable = await self._exchange(connection, method, parts, headers, body)
+            except asyncio.TimeoutError:
+                # A stalled server, not a stale connection: no retry here
+                connection.close()
+                raise
+            except (OSError, asyncio.IncompleteReadError) as e:
+                connection.close()
+                if connection.reused and not getattr(e, "response_started", False):
+                    continue
+                raise
+            except asyncio.CancelledError:
+                # Abandoned mid-exchange, so the connection cannot be reused
+                connection.close()
+                raise
+            if reusable:
+                self.idle.setdefault(key, []).append(connection)
+            else:
+                connection.close()
+            return response
+
+    async def _acquire(self, key):
+        idle = self.idle.get(key)
+        if idle:
+            connection = idle.pop()
+            connection.reused = True
+            self.metrics.connections_reused += 1
+            return connection
+
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == "https":
+            if self.ssl_context is None:
+                import ssl
+
+                self.ssl_context = ssl.create_default_context()
+            ssl_context = self.ssl_context
+        reader, writer = await self._timed(
+            asyncio.open_connection(host, port or (443 if scheme == "https" else 80), ssl=ssl_context)
+        )
+        self.metrics.connections_opened += 1
+        return Connection(reader, writer)
+
+    async def _timed(self, awaitable):
+        """Await one connect, write or read, failing with asyncio.TimeoutError after the timeout"""
+        return await asyncio.wait_for(awaitable, self.timeout)
+
+    async def _exchange(self, connection, method, parts, headers, body):
+        """Send one request on a connection; returns (response, whether the connection can be reused)"""
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        host = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}"]
+        sent = {name.lower() for name in headers}
+        if "user-agent" not in sent:
+            lines.append(f"User-Agent: {USER_AGENT}")
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        connection.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await self._timed(connection.writer.drain())
+
+        reader = connection.reader
+        status_line = await self._timed(reader.readline())
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response")
+        try:
+            version, status, reason = (status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""])[:3]
+            status = int(status)
+        except ValueError:
+            raise ProtocolError(f"Malformed status line: {status_line!r}")
+
+        response_headers = {}
+        while True:
+            line = await self._timed(reader.readline())
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        try:
+            body, framed = await self._read_body(reader, method, status, response_headers)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            # The request may have been processed, so it is not resent on a new connection
+            e.response_started = True
+            raise
+        self.metrics.bytes_received += len(body)
+
+        keep_alive = version == "HTTP/1.1" and response_headers.get("connection", "").lower() != "close"
+        response = Response(parts.geturl(), status, reason, response_headers, body)
+        return response, keep_alive and framed
+
+    async def _read_body(self, reader, method, status, headers):
+        """Read a response body; returns (body, whether its end was framed)"""
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return b"", True
+
+        chunks = []
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await self._timed(reader.readline())
+                if not size_line:
+                    # The connection ended before the last chunk
+                    raise asyncio.IncompleteReadError(b"".join(chunks), None)
+                try:
+                    size = int(size_line.split(b";")[0].strip(), 16)
+                except ValueError:
+                    size = -1
+                if size < 0:
+                    raise ProtocolError(f"Malformed chunk size: {size_line!r}")
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await self._timed(reader.readline())) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(chunks), True
+                chunks.append(await self._read_exactly(reader, size))
+                await self._timed(reader.readexactly(2))
+
+        if "content-length" in headers:
+            return await self._read_exactly(reader, int(headers["content-length"])), True
+
+        # Delimited by the end of the connection
+        while True:
+            chunk = await self._timed(reader.read(READ_CHUNK_SIZE))
+            if not chunk:
+                return b"".join(chunks), False
+            if self.limiter:
+                await self.limiter.consume(len(chunk))
+            chunks.append(chunk)
+
+    async def _read_exactly(self, reader, size):
+        chunks = []
+        remaining = size
+        while remaining:
+            # Whatever has arrived, so the timeout measures progress rather than block size
+            chunk = await self._timed(reader.read(min(remaining, READ_CHUNK_SIZE)))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"".join(chunks), size)
+            if self.limiter:
+                await self.limiter.consume(len(chunk))
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    async def call(self, host, func, *args, retry_if=None):
+        """
+        Run a blocking network job (e.g. a git subprocess) in a worker thread
+        under the limits for `host`. If retry_if(result) is true, the job is
+        retried with backoff, up to the retry limit. Returns the last result.
+        """
+        loop = asyncio.get_event_loop()
+        attempt = 0
+        while True:
+            async with self._host_slot(host), self.slots:
+                self.metrics.jobs += 1
+                self._count(host)
+                result = await loop.run_in_executor(self.executor, func, *args)
+            if retry_if is None or not retry_if(result):
+                break
+            if attempt >= self.retries:
+                self.metrics.failures += 1
+                break
+            self.metrics.retries += 1
+            await asyncio.sleep(self.backoff_delay(attempt))
+            attempt += 1
+        if self.progress:
+            self.progress(self.metrics, result)
+        return result
+
+
+def urllib_request(method, url, headers, body, timeout):
+    """Blocking request through urllib (which applies the proxy settings), as a Response"""
+    import urllib.error
+    import urllib.request
+
+    request = urllib.request.Request(url, data=body, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return Response(
+                response.geturl(),
+                response.status,
+                response.reason,
+                {name.lower(): value for name, value in response.headers.items()},
+                response.read(),
+            )
+    except urllib.error.HTTPError as e:
+        return Response(
+            url, e.code, e.reason, {name.lower(): value for name, value in e.headers.items()}, e.read()
+        )
+
+
+def get_host(url):
+    """Host a URL (or scp-style git remote such as git@github.com:org/repo) connects to"""
+    parts = urlsplit(url)
+    if parts.hostname:
+        return parts.hostname
+    # user@host:path
+    return url.split("@", 1)[-1].split(":", 1)[0]
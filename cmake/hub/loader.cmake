@@ -18,6 +18,16 @@ if(NOT DEFINED CMH_CACHE_DIR)
     endif()
 endif()
 
+# Read-only cache layers searched after CMH_CACHE_DIR, in order, e.g. a cache
+# baked into a runner image; CMH_CACHE_LAYERS is separated like PATH
+if(NOT DEFINED CMAKEHUB_CACHE_LAYERS)
+    set(CMAKEHUB_CACHE_LAYERS "$ENV{CMH_CACHE_LAYERS}")
+    if(NOT CMAKE_HOST_WIN32)
+        string(REPLACE ":" ";" CMAKEHUB_CACHE_LAYERS "${CMAKEHUB_CACHE_LAYERS}")
+    endif()
+    set(CMAKEHUB_CACHE_LAYERS "${CMAKEHUB_CACHE_LAYERS}" CACHE STRING "Read-only CMakeHub cache layers")
+endif()
+
 # Version check mode: STRICT, WARNING, SILENT
 if(NOT DEFINED CMAKEHUB_VERSION_CHECK_MODE)
     set(CMAKEHUB_VERSION_CHECK_MODE "STRICT" CACHE STRING "Version check mode: STRICT, WARNING, SILENT")
@@ -28,9 +38,36 @@ if(NOT DEFINED CMAKEHUB_VERBOSE)
     set(CMAKEHUB_VERBOSE FALSE CACHE BOOL "Enable verbose output")
 endif()
 
+# Fetch mode: SPARSE (download only the module files) or FULL (clone the whole ref)
+if(NOT DEFINED CMAKEHUB_FETCH_MODE)
+    set(CMAKEHUB_FETCH_MODE "SPARSE" CACHE STRING "Module fetch mode: SPARSE, FULL")
+endif()
+
+# Repository refs cmakehub_use_many() downloads in parallel
+if(NOT DEFINED CMAKEHUB_FETCH_JOBS)
+    set(CMAKEHUB_FETCH_JOBS 8 CACHE STRING "Parallel module downloads of cmakehub_use_many")
+endif()
+
+# Lock file pinning modules to commits (written by 'cmakehub lock'); empty disables it
+if(NOT DEFINED CMAKEHUB_LOCK_FILE)
+    set(CMAKEHUB_LOCK_FILE "${CMAKE_SOURCE_DIR}/cmakehub.lock" CACHE FILEPATH "CMakeHub lock file")
+endif()
+
+# Seconds to wait for another configure downloading the same repository ref
+if(NOT DEFINED CMAKEHUB_LOCK_TIMEOUT)
+    if(DEFINED ENV{CMH_LOCK_TIMEOUT})
+        set(CMAKEHUB_LOCK_TIMEOUT "$ENV{CMH_LOCK_TIMEOUT}" CACHE STRING "CMakeHub cache lock timeout in seconds")
+    else()
+        set(CMAKEHUB_LOCK_TIMEOUT 600 CACHE STRING "CMakeHub cache lock timeout in seconds")
+    endif()
+endif()
+
 # Location of modules.json (relative to this file)
 get_filename_component(CMAKEHUB_ROOT_DIR "${CMAKE_CURRENT_LIST_DIR}/../.." ABSOLUTE)
-set(CMAKEHUB_MODULES_INDEX "${CMAKEHUB_ROOT_DIR}/modules.json")
+set(CMAKEHUB_LOADER_FILE "${CMAKE_CURRENT_LIST_FILE}")
+if(NOT DEFINED CMAKEHUB_MODULES_INDEX)
+    set(CMAKEHUB_MODULES_INDEX "${CMAKEHUB_ROOT_DIR}/modules.json")
+endif()
 
 # Global property to track used modules
 set_property(GLOBAL PROPERTY CMAKEHUB_USED_MODULES "")
@@ -47,40 +84,214 @@ function(cmakehub_log level message)
     endif()
 endfunction()
 
-function(cmakehub_get_module_info module_name out_var)
+# Parse the modules index at most once per configure into global properties:
+#   CMH_INDEX_MODULES                 module names, in index order
+#   CMH_MODULE_<name>_INFO_JSON       module JSON object
+#   CMH_INDEX_CATEGORIES              categories, in order of first appearance
+#   CMH_CATEGORY_<category>_MODULES   module names in a category
+#   CMH_INDEX_TAGS                    tags, in order of first appearance
+#   CMH_TAG_<tag>_MODULES             module names with a tag
+#   CMH_MODULE_<name>_FIELDS          fields pre-extracted by the compiled index
+# A compiled index (see cmakehub_get_compiled_index_path) sets all of these
+# directly. Otherwise, since string(JSON) re-parses its whole input on every
+# call, modules are visited incrementally: a lookup only advances the scan up
+# to the requested module, and every module is parsed once however many
+# lookups follow. With no stop_name the whole index is scanned. The index is
+# loaded again only if CMAKEHUB_MODULES_INDEX or its timestamp changes.
+#
+# If the index is a shard manifest (see cli/sharded_index.py), a lookup parses
+# only the shard named by the SHA-256 of the module name, and a full scan
+# parses every shard file.
+function(cmakehub_scan_index stop_name)
     if(NOT EXISTS ${CMAKEHUB_MODULES_INDEX})
         message(FATAL_ERROR "CMakeHub modules index not found at: ${CMAKEHUB_MODULES_INDEX}")
     endif()
 
-    file(READ ${CMAKEHUB_MODULES_INDEX} index_content)
-    
-    # JSON parsing
-    string(JSON modules_array GET "${index_content}" modules)
-    
-    set(found FALSE)
-    set(module_obj "")
-    
-    string(JSON modules_length LENGTH "${modules_array}")
-    math(EXPR max_index "${modules_length} - 1")
-    
-    foreach(index RANGE ${max_index})
-        string(JSON current_module_obj GET "${modules_array}" ${index})
-        string(JSON module_name_check GET "${current_module_obj}" name)
-        
-        if(module_name_check STREQUAL module_name)
-            set(found TRUE)
-            set(module_obj "${current_module_obj}")
-            break()
+    file(TIMESTAMP ${CMAKEHUB_MODULES_INDEX} index_timestamp "%s" UTC)
+    set(index_key "${CMAKEHUB_MODULES_INDEX}@${index_timestamp}")
+    get_property(loaded_key GLOBAL PROPERTY CMH_INDEX_LOADED)
+
+    if(NOT loaded_key STREQUAL index_key)
+        # Forget a previously loaded index
+        get_property(old_modules GLOBAL PROPERTY CMH_INDEX_MODULES)
+        get_property(old_categories GLOBAL PROPERTY CMH_INDEX_CATEGORIES)
+        get_property(old_tags GLOBAL PROPERTY CMH_INDEX_TAGS)
+        foreach(name ${old_modules})
+            set_property(GLOBAL PROPERTY "CMH_MODULE_${name}_INFO_JSON" "")
+            set_property(GLOBAL PROPERTY "CMH_MODULE_${name}_FIELDS" "")
+        endforeach()
+        foreach(category ${old_categories})
+            set_property(GLOBAL PROPERTY "CMH_CATEGORY_${category}_MODULES" "")
+        endforeach()
+        foreach(tag ${old_tags})
+            set_property(GLOBAL PROPERTY "CMH_TAG_${tag}_MODULES" "")
+        endforeach()
+        set_property(GLOBAL PROPERTY CMH_INDEX_SHARD_DIR "")
+        set_property(GLOBAL PROPERTY CMH_INDEX_SHARDS_LOADED "")
+
+        # Use the compiled index when it is current, was built from this index
+        # and has the layout this loader reads (COMPILED_INDEX_FORMAT in
+        # cli/cmake_index.py); it returns before setting anything otherwise
+        set(compiled FALSE)
+        set(index_format 1)
+        cmakehub_get_compiled_index_path(compiled_index)
+        if(EXISTS "${compiled_index}" AND "${compiled_index}" IS_NEWER_THAN ${CMAKEHUB_MODULES_INDEX})
+            file(SHA256 ${CMAKEHUB_MODULES_INDEX} index_sha256)
+            unset(CMH_COMPILED_INDEX_FORMAT)
+            unset(CMH_COMPILED_INDEX_SHA256)
+            include("${compiled_index}")
+            if(CMH_COMPILED_INDEX_FORMAT EQUAL index_format AND CMH_COMPILED_INDEX_SHA256 STREQUAL index_sha256)
+                set(compiled TRUE)
+                cmakehub_log(STATUS "Using compiled modules index: ${compiled_index}")
+            endif()
+        endif()
+
+        if(NOT compiled)
+            file(READ ${CMAKEHUB_MODULES_INDEX} index_content)
+            string(JSON modules_array ERROR_VARIABLE modules_error GET "${index_content}" modules)
+            if(modules_error)
+                # A shard manifest: shards are parsed when their modules are needed
+                string(JSON sharding ERROR_VARIABLE sharding_error GET "${index_content}" sharding)
+                if(sharding_error)
+                    message(FATAL_ERROR "Invalid CMakeHub modules index: ${CMAKEHUB_MODULES_INDEX}")
+                endif()
+                string(JSON prefix_length GET "${sharding}" prefix_length)
+                string(JSON shard_directory GET "${sharding}" directory)
+                get_filename_component(index_dir "${CMAKEHUB_MODULES_INDEX}" DIRECTORY)
+                set_property(GLOBAL PROPERTY CMH_INDEX_SHARD_DIR "${index_dir}/${shard_directory}")
+                set_property(GLOBAL PROPERTY CMH_INDEX_SHARD_PREFIX ${prefix_length})
+                set(modules_array "[]")
+            endif()
+            string(JSON modules_length LENGTH "${modules_array}")
+
+            set_property(GLOBAL PROPERTY CMH_INDEX_ARRAY "${modules_array}")
+            set_property(GLOBAL PROPERTY CMH_INDEX_LENGTH ${modules_length})
+            set_property(GLOBAL PROPERTY CMH_INDEX_CURSOR 0)
+            set_property(GLOBAL PROPERTY CMH_INDEX_MODULES "")
+            set_property(GLOBAL PROPERTY CMH_INDEX_CATEGORIES "")
+            set_property(GLOBAL PROPERTY CMH_INDEX_TAGS "")
+        endif()
+        set_property(GLOBAL PROPERTY CMH_INDEX_LOADED "${index_key}")
+    endif()
+
+    if(stop_name)
+        get_property(module_obj GLOBAL PROPERTY "CMH_MODULE_${stop_name}_INFO_JSON")
+        if(module_obj)
+            return()
+        endif()
+    endif()
+
+    get_property(shard_dir GLOBAL PROPERTY CMH_INDEX_SHARD_DIR)
+    if(NOT shard_dir)
+        cmakehub_scan_modules("${stop_name}")
+        return()
+    endif()
+
+    if(stop_name)
+        get_property(prefix_length GLOBAL PROPERTY CMH_INDEX_SHARD_PREFIX)
+        string(SHA256 name_hash "${stop_name}")
+        string(SUBSTRING "${name_hash}" 0 ${prefix_length} shard_key)
+        set(shard_files "${shard_dir}/${shard_key}.json")
+    else()
+        file(GLOB shard_files "${shard_dir}/*.json")
+    endif()
+
+    get_property(loaded_shards GLOBAL PROPERTY CMH_INDEX_SHARDS_LOADED)
+    foreach(shard_file ${shard_files})
+        if(shard_file IN_LIST loaded_shards OR NOT EXISTS "${shard_file}")
+            continue()
         endif()
+        file(READ "${shard_file}" shard_content)
+        string(JSON modules_array GET "${shard_content}" modules)
+        string(JSON modules_length LENGTH "${modules_array}")
+        set_property(GLOBAL PROPERTY CMH_INDEX_ARRAY "${modules_array}")
+        set_property(GLOBAL PROPERTY CMH_INDEX_LENGTH ${modules_length})
+        set_property(GLOBAL PROPERTY CMH_INDEX_CURSOR 0)
+        cmakehub_scan_modules("")
+        list(APPEND loaded_shards "${shard_file}")
     endforeach()
+    set_property(GLOBAL PROPERTY CMH_INDEX_SHARDS_LOADED "${loaded_shards}")
+endfunction()
+
+# Register the modules of CMH_INDEX_ARRAY from CMH_INDEX_CURSOR on, up to and
+# including stop_name (or to the end of the array)
+function(cmakehub_scan_modules stop_name)
+    get_property(cursor GLOBAL PROPERTY CMH_INDEX_CURSOR)
+    get_property(modules_length GLOBAL PROPERTY CMH_INDEX_LENGTH)
+    if(cursor GREATER_EQUAL modules_length)
+        return()
+    endif()
+
+    get_property(modules_array GLOBAL PROPERTY CMH_INDEX_ARRAY)
+    get_property(names GLOBAL PROPERTY CMH_INDEX_MODULES)
+    get_property(categories GLOBAL PROPERTY CMH_INDEX_CATEGORIES)
+    get_property(tags GLOBAL PROPERTY CMH_INDEX_TAGS)
+
+    while(cursor LESS modules_length)
+        string(JSON module_obj GET "${modules_array}" ${cursor})
+        math(EXPR cursor "${cursor} + 1")
+        string(JSON name GET "${module_obj}" name)
+
+        # Keep the first definition of a duplicated name
+        if(name IN_LIST names)
+            continue()
+        endif()
+        list(APPEND names ${name})
+
+        # Stored in properties to avoid semicolon parsing issues
+        set_property(GLOBAL PROPERTY "CMH_MODULE_${name}_INFO_JSON" "${module_obj}")
+
+        string(JSON category ERROR_VARIABLE category_error GET "${module_obj}" category)
+        if(NOT category_error AND category)
+            if(NOT category IN_LIST categories)
+                list(APPEND categories ${category})
+            endif()
+            set_property(GLOBAL APPEND PROPERTY "CMH_CATEGORY_${category}_MODULES" ${name})
+        endif()
+
+        string(JSON tags_json ERROR_VARIABLE tags_error GET "${module_obj}" tags)
+        if(NOT tags_error)
+            cmakehub_parse_list("${tags_json}" module_tags)
+            foreach(tag ${module_tags})
+                if(NOT tag IN_LIST tags)
+                    list(APPEND tags ${tag})
+                endif()
+                set_property(GLOBAL APPEND PROPERTY "CMH_TAG_${tag}_MODULES" ${name})
+            endforeach()
+        endif()
+
+        if(stop_name AND name STREQUAL stop_name)
+            break()
+        endif()
+    endwhile()
+
+    set_property(GLOBAL PROPERTY CMH_INDEX_CURSOR ${cursor})
+    set_property(GLOBAL PROPERTY CMH_INDEX_MODULES "${names}")
+    set_property(GLOBAL PROPERTY CMH_INDEX_CATEGORIES "${categories}")
+    set_property(GLOBAL PROPERTY CMH_INDEX_TAGS "${tags}")
+endfunction()
+
+# Compiled CMake index written by 'cmakehub compile-index' next to the JSON index:
+# <dir>/modules.json -> <dir>/modules_index.cmake
+function(cmakehub_get_compiled_index_path out_var)
+    get_filename_component(index_dir "${CMAKEHUB_MODULES_INDEX}" DIRECTORY)
+    get_filename_component(index_name "${CMAKEHUB_MODULES_INDEX}" NAME_WE)
+    set(${out_var} "${index_dir}/${index_name}_index.cmake" PARENT_SCOPE)
+endfunction()
+
+# Parse the whole modules index (see cmakehub_scan_index)
+function(cmakehub_load_index)
+    cmakehub_scan_index("")
+endfunction()
+
+function(cmakehub_get_module_info module_name out_var)
+    cmakehub_scan_index(${module_name})
+    get_property(module_obj GLOBAL PROPERTY "CMH_MODULE_${module_name}_INFO_JSON")
     
-    if(NOT found)
+    if(NOT module_obj)
         message(FATAL_ERROR "Module '${module_name}' not found in CMakeHub index")
     endif()
     
-    # Store module info in global properties to avoid semicolon parsing issues
-    set_property(GLOBAL PROPERTY "CMH_MODULE_${module_name}_INFO_JSON" "${module_obj}")
-    
     # Set result as boolean success indicator
     set(${out_var} TRUE PARENT_SCOPE)
 endfunction()
@@ -93,6 +304,17 @@ function(cmakehub_get_module_property module_name property out_var)
         message(FATAL_ERROR "Module '${module_name}' info not found. Call cmakehub_get_module_info first.")
     endif()
     
+    # Fields pre-extracted by the compiled index need no JSON parsing
+    get_property(fields GLOBAL PROPERTY "CMH_MODULE_${module_name}_FIELDS")
+    if(fields)
+        set(value "")
+        if(property IN_LIST fields)
+            get_property(value GLOBAL PROPERTY "CMH_MODULE_${module_name}_FIELD_${property}")
+        endif()
+        set(${out_var} "${value}" PARENT_SCOPE)
+        return()
+    endif()
+    
     # Try to get the property, if it fails set to empty string
     string(JSON value ERROR_VARIABLE property_error GET "${module_json}" ${property})
     if(property_error)
@@ -172,6 +394,39 @@ function(cmakehub_check_cpp_standard required_standard)
     endif()
 endfunction()
 
+# Warn if the current platform is not among a module's supported platforms
+function(cmakehub_check_platform module_name platform_list)
+    if(NOT platform_list)
+        return()
+    endif()
+
+    # Detect current platform
+    set(current_platform "")
+    if(CMAKE_SYSTEM_NAME STREQUAL "Windows")
+        set(current_platform "windows")
+    elseif(CMAKE_SYSTEM_NAME STREQUAL "Linux")
+        set(current_platform "linux")
+    elseif(CMAKE_SYSTEM_NAME STREQUAL "Darwin")
+        set(current_platform "macos")
+    elseif(CMAKE_SYSTEM_NAME MATCHES "FreeBSD")
+        set(current_platform "freebsd")
+    elseif(IOS)
+        set(current_platform "ios")
+    elseif(ANDROID)
+        set(current_platform "android")
+    endif()
+
+    if(current_platform AND NOT current_platform IN_LIST platform_list)
+        # Once per module: cmakehub_use_many() checks before cmakehub_use() does
+        get_property(warned GLOBAL PROPERTY CMH_PLATFORM_WARNED)
+        if(module_name IN_LIST warned)
+            return()
+        endif()
+        set_property(GLOBAL APPEND PROPERTY CMH_PLATFORM_WARNED ${module_name})
+        cmakehub_log(WARNING "Module '${module_name}' is not compatible with platform '${current_platform}'. Supported platforms: ${platform_list}")
+    endif()
+endfunction()
+
 function(cmakehub_check_conflicts module_name conflicts_json)
     cmakehub_parse_list("${conflicts_json}" conflict_list)
     
@@ -205,6 +460,684 @@ function(cmakehub_check_dependencies module_name dependencies_json)
     endforeach()
 endfunction()
 
+# Cache-relative path of the checkout shared by all modules from one repository ref:
+# .repos/<first 16 hex digits of SHA1(repository)>/<version>
+function(cmakehub_get_checkout_relpath repository version out_var)
+    string(SHA1 repository_hash "${repository}")
+    string(SUBSTRING "${repository_hash}" 0 16 repository_key)
+    set(${out_var} ".repos/${repository_key}/${version}" PARENT_SCOPE)
+endfunction()
+
+# Lock file serializing downloads into a checkout: .repos/<key>/.<version>.lock
+# (matches cache_layout.get_checkout_lock_path in the CLI)
+function(cmakehub_get_checkout_lock checkout_relpath out_var)
+    get_filename_component(parent "${checkout_relpath}" DIRECTORY)
+    get_filename_component(name "${checkout_relpath}" NAME)
+    set(${out_var} "${CMH_CACHE_DIR}/${parent}/.${name}.lock" PARENT_SCOPE)
+endfunction()
+
+# The metadata is written next to its final name and renamed, so configures
+# checking the entry without the lock never read it half-written
+function(cmakehub_write_module_meta meta_file module_name repository version path checkout sha256 size mtime)
+    string(TIMESTAMP download_timestamp "%Y-%m-%dT%H:%M:%S")
+    string(RANDOM LENGTH 8 tmp_suffix)
+    set(tmp_file "${meta_file}.tmp-${tmp_suffix}")
+    file(WRITE ${tmp_file}
+        "{\n"
+        "  \"module\": \"${module_name}\",\n"
+        "  \"repository\": \"${repository}\",\n"
+        "  \"version\": \"${version}\",\n"
+        "  \"path\": \"${path}\",\n"
+        "  \"checkout\": \"${checkout}\",\n"
+        "  \"downloaded_at\": \"${download_timestamp}\",\n"
+        "  \"sha256\": \"${sha256}\",\n"
+        "  \"size\": ${size},\n"
+        "  \"mtime\": ${mtime}\n"
+        "}"
+    )
+    file(RENAME ${tmp_file} ${meta_file})
+endfunction()
+
+# Cache ledger (see cli/cache_ledger.py): one JSON event per line, appended only
+# once the CLI has started the ledger, so `cmakehub cache info` need not walk the cache.
+# Appends hold .ledger.lock so a compaction by the CLI cannot drop them; an event
+# is still appended if the lock stays busy, since a lost event is repaired by a rescan.
+function(cmakehub_ledger_append event)
+    set(ledger "${CMH_CACHE_DIR}/.ledger.jsonl")
+    if(EXISTS "${ledger}")
+        file(LOCK "${CMH_CACHE_DIR}/.ledger.lock" GUARD FUNCTION TIMEOUT ${CMAKEHUB_LOCK_TIMEOUT} RESULT_VARIABLE lock_result)
+        string(TIMESTAMP now "%s" UTC)
+        file(APPEND "${ledger}" "{${event}, \"time\": ${now}}\n")
+    endif()
+endfunction()
+
+# Record a use served by the cache, or by a read-only layer if one is given
+function(cmakehub_ledger_hit module_name version layer)
+    if(layer)
+        cmakehub_ledger_append("\"op\": \"hit\", \"module\": \"${module_name}\", \"version\": \"${version}\", \"layer\": \"${layer}\"")
+    else()
+        cmakehub_ledger_append("\"op\": \"hit\", \"module\": \"${module_name}\", \"version\": \"${version}\"")
+    endif()
+endfunction()
+
+# Record the size of a checkout that was just downloaded, with its FetchContent sub-build
+function(cmakehub_ledger_record_checkout checkout_relpath)
+    if(NOT EXISTS "${CMH_CACHE_DIR}/.ledger.jsonl")
+        return()
+    endif()
+    set(checkout_dir "${CMH_CACHE_DIR}/${checkout_relpath}")
+    file(GLOB_RECURSE checkout_files LIST_DIRECTORIES false
+        "${checkout_dir}/*" "${checkout_dir}-subbuild/*")
+    list(LENGTH checkout_files files)
+    set(size 0)
+    foreach(checkout_file ${checkout_files})
+        if(NOT IS_SYMLINK "${checkout_file}")
+            file(SIZE "${checkout_file}" file_size)
+            math(EXPR size "${size} + ${file_size}")
+        endif()
+    endforeach()
+    cmakehub_ledger_append("\"op\": \"checkout\", \"checkout\": \"${checkout_relpath}\", \"size\": ${size}, \"files\": ${files}")
+endfunction()
+
+# Content-addressed store: every module file is kept once as
+# .store/blobs/<first 2 hex digits>/<sha256>, and module entries and checkouts
+# are hardlinks to it (copies where links are not supported)
+function(cmakehub_get_blob_path digest out_var)
+    string(SUBSTRING "${digest}" 0 2 prefix)
+    set(${out_var} "${CMH_CACHE_DIR}/.store/blobs/${prefix}/${digest}" PARENT_SCOPE)
+endfunction()
+
+# Add a module file from its checkout to the store, link it into the module
+# entry and write the entry metadata. Sets out_var to the entry's module file.
+function(cmakehub_materialize_module module_name repository version path checkout_relpath out_var)
+    set(checkout_file "${CMH_CACHE_DIR}/${checkout_relpath}/${path}")
+    set(module_cache_dir "${CMH_CACHE_DIR}/${module_name}/${version}")
+    set(entry_file "${module_cache_dir}/${path}")
+
+    file(SHA256 "${checkout_file}" digest)
+    cmakehub_get_blob_path(${digest} blob)
+    if(NOT EXISTS "${blob}")
+        # Copy next to the blob first so it appears atomically
+        get_filename_component(blob_dir "${blob}" DIRECTORY)
+        string(RANDOM LENGTH 8 tmp_suffix)
+        set(tmp_dir "${blob_dir}/.tmp-${tmp_suffix}")
+        file(COPY "${checkout_file}" DESTINATION "${tmp_dir}")
+        get_filename_component(file_name "${checkout_file}" NAME)
+        file(RENAME "${tmp_dir}/${file_name}" "${blob}")
+        file(REMOVE_RECURSE "${tmp_dir}")
+    endif()
+
+    get_filename_component(entry_file_dir "${entry_file}" DIRECTORY)
+    file(MAKE_DIRECTORY "${entry_file_dir}")
+    file(CREATE_LINK "${blob}" "${checkout_file}" COPY_ON_ERROR)
+    file(CREATE_LINK "${blob}" "${entry_file}" COPY_ON_ERROR)
+
+    file(SIZE "${blob}" size)
+    file(TIMESTAMP "${blob}" mtime "%s" UTC)
+    cmakehub_write_module_meta("${module_cache_dir}/.cmh_meta.json" ${module_name} "${repository}" "${version}" "${path}" "${checkout_relpath}" ${digest} ${size} ${mtime})
+
+    # The module file is a hardlink counted with the checkout, so the entry adds its metadata
+    file(SIZE "${module_cache_dir}/.cmh_meta.json" meta_size)
+    string(CONCAT event
+        "\"op\": \"add\", \"module\": \"${module_name}\", \"version\": \"${version}\", "
+        "\"checkout\": \"${checkout_relpath}\", \"sha256\": \"${digest}\", \"file_size\": ${size}, "
+        "\"size\": ${meta_size}, \"files\": 1"
+    )
+    cmakehub_ledger_append("${event}")
+    set(${out_var} "${entry_file}" PARENT_SCOPE)
+endfunction()
+
+# Find an intact entry of a module in the read-only cache layers, optionally
+# with a given digest. Sets out_file to its module file and out_layer to the
+# layer, or both to "". Layers are never written to.
+function(cmakehub_find_layer_entry module_name version path sha256 out_file out_layer)
+    set(${out_file} "" PARENT_SCOPE)
+    set(${out_layer} "" PARENT_SCOPE)
+    foreach(layer ${CMAKEHUB_CACHE_LAYERS})
+        set(meta_file "${layer}/${module_name}/${version}/.cmh_meta.json")
+        set(entry_file "${layer}/${module_name}/${version}/${path}")
+        if(EXISTS "${entry_file}" AND EXISTS "${meta_file}")
+            cmakehub_verify_module_file("${meta_file}" "${entry_file}" intact digest)
+            if(intact AND (NOT sha256 OR digest STREQUAL sha256))
+                set(${out_file} "${entry_file}" PARENT_SCOPE)
+                set(${out_layer} "${layer}" PARENT_SCOPE)
+                return()
+            endif()
+        endif()
+    endforeach()
+endfunction()
+
+# Check a cached module file against the size and mtime recorded when it was
+# materialized, without re-reading it. Entries without a digest (written by
+# older CMakeHub versions) are trusted. Sets out_digest to the recorded digest.
+function(cmakehub_verify_module_file meta_file entry_file out_intact out_digest)
+    set(${out_intact} TRUE PARENT_SCOPE)
+    set(${out_digest} "" PARENT_SCOPE)
+    file(READ ${meta_file} meta)
+    string(JSON digest ERROR_VARIABLE digest_error GET "${meta}" sha256)
+    if(digest_error OR NOT digest)
+        return()
+    endif()
+    set(${out_digest} ${digest} PARENT_SCOPE)
+
+    string(JSON expected_size ERROR_VARIABLE size_error GET "${meta}" size)
+    string(JSON expected_mtime ERROR_VARIABLE mtime_error GET "${meta}" mtime)
+    file(SIZE "${entry_file}" size)
+    file(TIMESTAMP "${entry_file}" mtime "%s" UTC)
+    if(size_error OR mtime_error OR NOT size EQUAL expected_size OR NOT mtime EQUAL expected_mtime)
+        set(${out_intact} FALSE PARENT_SCOPE)
+    endif()
+endfunction()
+
+# Download only the given files of one repository ref: a shallow, blob-less
+# partial fetch with a sparse checkout, so only the selected files' blobs are
+# transferred. Sets out_var to TRUE on success.
+function(cmakehub_sparse_fetch repository version checkout_dir paths out_var)
+    set(${out_var} FALSE PARENT_SCOPE)
+    find_package(Git QUIET)
+    if(NOT GIT_FOUND)
+        return()
+    endif()
+
+    file(MAKE_DIRECTORY "${checkout_dir}")
+    set(sparse_patterns "")
+    foreach(path ${paths})
+        string(APPEND sparse_patterns "/${path}\n")
+    endforeach()
+
+    execute_process(COMMAND ${GIT_EXECUTABLE} init -q
+                    WORKING_DIRECTORY "${checkout_dir}" RESULT_VARIABLE result OUTPUT_QUIET ERROR_QUIET)
+    if(result EQUAL 0)
+        execute_process(COMMAND ${GIT_EXECUTABLE} remote add origin ${repository}
+                        WORKING_DIRECTORY "${checkout_dir}" RESULT_VARIABLE result OUTPUT_QUIET ERROR_QUIET)
+    endif()
+    if(result EQUAL 0)
+        execute_process(COMMAND ${GIT_EXECUTABLE} config core.sparseCheckout true
+                        WORKING_DIRECTORY "${checkout_dir}" RESULT_VARIABLE result OUTPUT_QUIET ERROR_QUIET)
+    endif()
+    if(result EQUAL 0)
+        file(WRITE "${checkout_dir}/.git/info/sparse-checkout" "${sparse_patterns}")
+        execute_process(COMMAND ${GIT_EXECUTABLE} fetch -q --depth 1 --filter=blob:none origin ${version}
+                        WORKING_DIRECTORY "${checkout_dir}" RESULT_VARIABLE result OUTPUT_QUIET ERROR_QUIET)
+    endif()
+    if(result EQUAL 0)
+        execute_process(COMMAND ${GIT_EXECUTABLE} checkout -q FETCH_HEAD
+                        WORKING_DIRECTORY "${checkout_dir}" RESULT_VARIABLE result OUTPUT_QUIET ERROR_QUIET)
+    endif()
+    if(NOT result EQUAL 0)
+        return()
+    endif()
+
+    foreach(path ${paths})
+        if(NOT EXISTS "${checkout_dir}/${path}")
+            return()
+        endif()
+    endforeach()
+    set(${out_var} TRUE PARENT_SCOPE)
+endfunction()
+
+# Add one file to an existing sparse checkout; its blob is fetched on demand.
+# Sets out_var to TRUE on success.
+function(cmakehub_sparse_add_path checkout_dir path out_var)
+    set(${out_var} FALSE PARENT_SCOPE)
+    set(sparse_file "${checkout_dir}/.git/info/sparse-checkout")
+    find_package(Git QUIET)
+    if(NOT GIT_FOUND OR NOT EXISTS "${sparse_file}")
+        return()
+    endif()
+
+    file(APPEND "${sparse_file}" "/${path}\n")
+    execute_process(COMMAND ${GIT_EXECUTABLE} read-tree -mu HEAD
+                    WORKING_DIRECTORY "${checkout_dir}" RESULT_VARIABLE result OUTPUT_QUIET ERROR_QUIET)
+    if(result EQUAL 0 AND EXISTS "${checkout_dir}/${path}")
+        set(${out_var} TRUE PARENT_SCOPE)
+    endif()
+endfunction()
+
+# Files selected by an existing sparse checkout (empty for full clones)
+function(cmakehub_get_sparse_paths checkout_dir out_var)
+    set(paths "")
+    if(EXISTS "${checkout_dir}/.git/info/sparse-checkout")
+        file(STRINGS "${checkout_dir}/.git/info/sparse-checkout" patterns)
+        foreach(pattern ${patterns})
+            string(REGEX REPLACE "^/" "" pattern "${pattern}")
+            if(pattern)
+                list(APPEND paths "${pattern}")
+            endif()
+        endforeach()
+    endif()
+    set(${out_var} "${paths}" PARENT_SCOPE)
+endfunction()
+
+# Look up a module in the lock file, read once per configure. Sets
+# <prefix>_COMMIT, <prefix>_SHA256 and <prefix>_DEPENDENCIES when the module is
+# locked (and requested_version, if given, is its locked version or commit), and
+# <prefix>_FILE when the cache holds the locked file intact. The fields the
+# fast path validates are set as <prefix>_CONFLICTS_JSON, <prefix>_PLATFORM,
+# <prefix>_CMAKE_MINIMUM_REQUIRED and <prefix>_CPP_MINIMUM_REQUIRED; entries
+# written before the lock recorded them never set <prefix>_FILE, so such
+# modules are validated against the index instead.
+function(cmakehub_get_locked_module module_name requested_version prefix)
+    foreach(field COMMIT SHA256 DEPENDENCIES FILE LAYER CONFLICTS_JSON PLATFORM CMAKE_MINIMUM_REQUIRED CPP_MINIMUM_REQUIRED)
+        set(${prefix}_${field} "" PARENT_SCOPE)
+    endforeach()
+
+    get_property(lock_loaded GLOBAL PROPERTY CMH_LOCK_LOADED)
+    if(NOT lock_loaded)
+        set(lock_content "")
+        if(CMAKEHUB_LOCK_FILE AND EXISTS "${CMAKEHUB_LOCK_FILE}")
+            file(READ "${CMAKEHUB_LOCK_FILE}" lock_content)
+            cmakehub_log(STATUS "Using lock file: ${CMAKEHUB_LOCK_FILE}")
+        endif()
+        set_property(GLOBAL PROPERTY CMH_LOCK_JSON "${lock_content}")
+        set_property(GLOBAL PROPERTY CMH_LOCK_LOADED TRUE)
+    endif()
+
+    get_property(lock_content GLOBAL PROPERTY CMH_LOCK_JSON)
+    if(NOT lock_content)
+        return()
+    endif()
+    string(JSON entry ERROR_VARIABLE entry_error GET "${lock_content}" modules ${module_name})
+    if(entry_error)
+        return()
+    endif()
+
+    string(JSON version GET "${entry}" version)
+    string(JSON commit GET "${entry}" commit)
+    string(JSON path GET "${entry}" path)
+    string(JSON sha256 GET "${entry}" sha256)
+    string(JSON dependencies_json GET "${entry}" dependencies)
+    if(requested_version AND NOT requested_version STREQUAL version AND NOT requested_version STREQUAL commit)
+        return()
+    endif()
+
+    cmakehub_parse_list("${dependencies_json}" dependencies)
+    set(${prefix}_COMMIT ${commit} PARENT_SCOPE)
+    set(${prefix}_SHA256 ${sha256} PARENT_SCOPE)
+    set(${prefix}_DEPENDENCIES "${dependencies}" PARENT_SCOPE)
+
+    string(JSON conflicts_json ERROR_VARIABLE validation_error GET "${entry}" conflicts)
+    if(validation_error)
+        return()
+    endif()
+    string(JSON platform_json ERROR_VARIABLE platform_error GET "${entry}" platform)
+    string(JSON cmake_minimum ERROR_VARIABLE cmake_error GET "${entry}" cmake_minimum_required)
+    string(JSON cpp_minimum ERROR_VARIABLE cpp_error GET "${entry}" cpp_minimum_required)
+    cmakehub_parse_list("${platform_json}" platform)
+    set(${prefix}_CONFLICTS_JSON "${conflicts_json}" PARENT_SCOPE)
+    set(${prefix}_PLATFORM "${platform}" PARENT_SCOPE)
+    if(NOT cmake_error)
+        set(${prefix}_CMAKE_MINIMUM_REQUIRED "${cmake_minimum}" PARENT_SCOPE)
+    endif()
+    if(NOT cpp_error)
+        set(${prefix}_CPP_MINIMUM_REQUIRED "${cpp_minimum}" PARENT_SCOPE)
+    endif()
+
+    # Locked modules are cached under their commit
+    set(module_cache_dir "${CMH_CACHE_DIR}/${module_name}/${commit}")
+    set(meta_file "${module_cache_dir}/.cmh_meta.json")
+    set(entry_file "${module_cache_dir}/${path}")
+    if(EXISTS "${entry_file}" AND EXISTS ${meta_file})
+        cmakehub_verify_module_file(${meta_file} "${entry_file}" intact digest)
+        if(intact AND digest STREQUAL sha256)
+            set(${prefix}_FILE "${entry_file}" PARENT_SCOPE)
+            return()
+        endif()
+    endif()
+    cmakehub_find_layer_entry(${module_name} ${commit} "${path}" ${sha256} layer_file layer)
+    set(${prefix}_FILE "${layer_file}" PARENT_SCOPE)
+    set(${prefix}_LAYER "${layer}" PARENT_SCOPE)
+endfunction()
+
+# Set cache variables from a module's config arguments (NAME VALUE pairs)
+function(cmakehub_set_config_variables module_name)
+    set(remaining_args "${ARGN}")
+    if(NOT remaining_args)
+        return()
+    endif()
+
+    cmakehub_log(STATUS "Setting config variables for ${module_name}: ${remaining_args}")
+    list(LENGTH remaining_args remaining_len)
+    math(EXPR remaining_idx_max "${remaining_len} - 1")
+    
+    foreach(idx RANGE 0 ${remaining_idx_max})
+        list(GET remaining_args ${idx} current)
+        math(EXPR next_idx "${idx} + 1")
+        if(next_idx LESS_EQUAL remaining_idx_max)
+            list(GET remaining_args ${next_idx} next_val)
+            if(next_val STREQUAL "ON" OR next_val STREQUAL "OFF" OR next_val STREQUAL "TRUE" OR next_val STREQUAL "FALSE" OR next_val MATCHES "^[0-9]+$" OR next_val MATCHES "^\".*\"$" OR next_val MATCHES "^'.*'$")
+                # This is a value, set the variable
+                string(REPLACE "\"" "" clean_key "${current}")
+                set(${clean_key} ${next_val} CACHE BOOL "" FORCE)
+                cmakehub_log(STATUS "  Set ${clean_key} = ${next_val}")
+                # Skip the next iteration since we consumed the value
+                math(EXPR idx "${idx} + 1")
+            endif()
+        endif()
+    endforeach()
+endfunction()
+
+# Make a module's file available in the cache and set out_var to it. Modules
+# that share a repository ref share one checkout under .repos/; the
+# per-module entry only records where the module file lives.
+#
+# The cache is searched first, then the read-only CMAKEHUB_CACHE_LAYERS, and
+# only the cache is ever written. Reusing an intact entry works without a
+# lock. Anything else holds the checkout's lock file (see cli/file_lock.py),
+# so parallel configures download each ref once: a configure that had to wait
+# finds the winner's entry or checkout and reuses it. New checkouts are
+# downloaded into a temporary directory and renamed into place once complete.
+function(cmakehub_fetch_module module_name repository version path out_var)
+    cmakehub_get_checkout_relpath("${repository}" "${version}" checkout_relpath)
+    set(checkout_dir "${CMH_CACHE_DIR}/${checkout_relpath}")
+    set(checkout_marker "${checkout_dir}/.cmh_checkout.json")
+
+    set(module_cache_dir "${CMH_CACHE_DIR}/${module_name}/${version}")
+    set(meta_file "${module_cache_dir}/.cmh_meta.json")
+    set(entry_file "${module_cache_dir}/${path}")
+
+    set(entry_intact FALSE)
+    if(EXISTS "${entry_file}" AND EXISTS ${meta_file})
+        cmakehub_verify_module_file(${meta_file} "${entry_file}" entry_intact entry_digest)
+    endif()
+
+    if(NOT entry_intact)
+        # A read-only layer is used as it is; nothing is copied into the cache
+        cmakehub_find_layer_entry(${module_name} ${version} "${path}" "" layer_file layer)
+        if(layer_file)
+            cmakehub_log(STATUS "Using cached module: ${module_name} (from ${layer})")
+            cmakehub_ledger_hit(${module_name} ${version} "${layer}")
+            set(${out_var} "${layer_file}" PARENT_SCOPE)
+            return()
+        endif()
+
+        cmakehub_get_checkout_lock("${checkout_relpath}" lock_file)
+        file(LOCK "${lock_file}" GUARD FUNCTION TIMEOUT ${CMAKEHUB_LOCK_TIMEOUT} RESULT_VARIABLE lock_result)
+        if(NOT lock_result EQUAL 0)
+            message(FATAL_ERROR "Failed to lock ${lock_file} to download module '${module_name}': ${lock_result}")
+        endif()
+
+        # Another configure may have finished the entry while this one waited
+        if(EXISTS "${entry_file}" AND EXISTS ${meta_file})
+            cmakehub_verify_module_file(${meta_file} "${entry_file}" entry_intact entry_digest)
+            if(NOT entry_intact)
+                # The file is hardlinked to its blob and checkout copy, so all of them changed
+                cmakehub_log(WARNING "Cached file of module '${module_name}' was modified, downloading it again")
+                cmakehub_get_blob_path(${entry_digest} entry_blob)
+                file(REMOVE "${entry_file}" ${meta_file} "${entry_blob}" ${checkout_marker})
+            endif()
+        endif()
+    endif()
+
+    if(entry_intact)
+        # Materialized entry, or one from an older CMakeHub holding its own full clone
+        cmakehub_log(STATUS "Using cached module: ${module_name}")
+        set(module_file "${entry_file}")
+        cmakehub_ledger_hit(${module_name} ${version} "")
+
+    elseif(EXISTS "${checkout_dir}/${path}" AND EXISTS ${checkout_marker})
+        # First use of this module from a checkout another module downloaded
+        cmakehub_log(STATUS "Using cached module: ${module_name}")
+        cmakehub_materialize_module(${module_name} "${repository}" "${version}" "${path}" "${checkout_relpath}" module_file)
+
+    else()
+        cmakehub_log(STATUS "Downloading module: ${module_name}")
+        cmakehub_ledger_append("\"op\": \"miss\", \"module\": \"${module_name}\", \"version\": \"${version}\"")
+        set(downloaded FALSE)
+        set(download_dir "${checkout_dir}")
+
+        if(EXISTS ${checkout_marker})
+            # A sparse checkout made for other modules of this repository ref
+            cmakehub_sparse_add_path("${checkout_dir}" "${path}" downloaded)
+        endif()
+
+        if(NOT downloaded)
+            # Download again, keeping the files the other modules rely on
+            cmakehub_get_sparse_paths("${checkout_dir}" sparse_paths)
+            list(APPEND sparse_paths "${path}")
+            list(REMOVE_DUPLICATES sparse_paths)
+
+            get_filename_component(checkout_parent "${checkout_dir}" DIRECTORY)
+            string(RANDOM LENGTH 8 tmp_suffix)
+            set(download_dir "${checkout_parent}/.tmp-${tmp_suffix}")
+        endif()
+
+        if(NOT downloaded AND CMAKEHUB_FETCH_MODE STREQUAL "SPARSE")
+            cmakehub_sparse_fetch("${repository}" "${version}" "${download_dir}" "${sparse_paths}" downloaded)
+            if(NOT downloaded)
+                cmakehub_log(STATUS "Sparse fetch failed, cloning the full repository")
+                file(REMOVE_RECURSE "${download_dir}")
+            endif()
+        endif()
+
+        if(NOT downloaded)
+            file(REMOVE_RECURSE "${checkout_dir}-subbuild")
+
+            # Download using FetchContent, named after the repository ref so modules
+            # sharing it are populated once per configure
+            include(FetchContent)
+            string(MAKE_C_IDENTIFIER "cmh_${checkout_relpath}" content_name)
+
+            if(CMAKE_SCRIPT_MODE_FILE)
+                # Script mode (e.g. a cmakehub_use_many() worker) cannot add subdirectories
+                FetchContent_Populate(
+                    ${content_name}
+                    QUIET
+                    GIT_REPOSITORY ${repository}
+                    GIT_TAG ${version}
+                    SOURCE_DIR ${download_dir}
+                    SUBBUILD_DIR "${checkout_dir}-subbuild"
+                    BINARY_DIR "${checkout_dir}-subbuild/build"
+                )
+                set(populated TRUE)
+            else()
+                FetchContent_Declare(
+                    ${content_name}
+                    GIT_REPOSITORY ${repository}
+                    GIT_TAG ${version}
+                    SOURCE_DIR ${download_dir}
+                    SUBBUILD_DIR "${checkout_dir}-subbuild"
+                )
+
+                # Check if already populated
+                FetchContent_GetProperties(${content_name} POPULATED populated)
+                if(NOT populated)
+                    # Try to download and populate
+                    FetchContent_MakeAvailable(${content_name})
+                endif()
+
+                # Verify population was successful
+                FetchContent_GetProperties(${content_name} POPULATED populated)
+            endif()
+            if(NOT populated OR NOT EXISTS "${download_dir}/${path}")
+                file(REMOVE_RECURSE "${download_dir}")
+                message(FATAL_ERROR "Failed to download module '${module_name}' from ${repository}")
+            endif()
+        endif()
+
+        # Mark the checkout as complete and move it into place
+        string(TIMESTAMP download_timestamp "%Y-%m-%dT%H:%M:%S")
+        file(WRITE "${download_dir}/.cmh_checkout.json"
+            "{\n"
+            "  \"repository\": \"${repository}\",\n"
+            "  \"version\": \"${version}\",\n"
+            "  \"downloaded_at\": \"${download_timestamp}\"\n"
+            "}"
+        )
+        if(NOT download_dir STREQUAL checkout_dir)
+            file(REMOVE_RECURSE "${checkout_dir}")
+            file(RENAME "${download_dir}" "${checkout_dir}")
+        endif()
+        cmakehub_ledger_record_checkout("${checkout_relpath}")
+        cmakehub_materialize_module(${module_name} "${repository}" "${version}" "${path}" "${checkout_relpath}" module_file)
+
+        cmakehub_log(STATUS "Module downloaded successfully")
+    endif()
+
+    set(${out_var} "${module_file}" PARENT_SCOPE)
+endfunction()
+
+# Whether a module can be loaded without downloading anything: its entry is
+# intact, a read-only layer holds it, or its shared checkout has the file
+function(cmakehub_is_module_cached module_name repository version path out_var)
+    set(${out_var} TRUE PARENT_SCOPE)
+    set(meta_file "${CMH_CACHE_DIR}/${module_name}/${version}/.cmh_meta.json")
+    set(entry_file "${CMH_CACHE_DIR}/${module_name}/${version}/${path}")
+    if(EXISTS "${entry_file}" AND EXISTS ${meta_file})
+        cmakehub_verify_module_file(${meta_file} "${entry_file}" intact digest)
+        if(intact)
+            return()
+        endif()
+    endif()
+
+    cmakehub_find_layer_entry(${module_name} ${version} "${path}" "" layer_file layer)
+    cmakehub_get_checkout_relpath("${repository}" "${version}" checkout_relpath)
+    set(checkout_dir "${CMH_CACHE_DIR}/${checkout_relpath}")
+    if(NOT layer_file AND NOT (EXISTS "${checkout_dir}/${path}" AND EXISTS "${checkout_dir}/.cmh_checkout.json"))
+        set(${out_var} FALSE PARENT_SCOPE)
+    endif()
+endfunction()
+
+# Add a module and its dependencies to the batch of cmakehub_use_many(), in
+# load order (dependencies first), as global properties:
+#   CMH_BATCH_MODULES     module names
+#   CMH_BATCH_CONFLICTS   <module>|<conflicting module> pairs
+#   CMH_BATCH_DOWNLOADS   <module>|<repository>|<version>|<path> of modules not cached
+# Modules are resolved like cmakehub_use() does: from the lock file if it pins
+# them to a cached file, otherwise from the index. Either way their conflicts
+# are recorded and their platforms checked before anything is downloaded.
+function(cmakehub_resolve_batch_module module_name)
+    get_property(batch GLOBAL PROPERTY CMH_BATCH_MODULES)
+    get_property(visited GLOBAL PROPERTY CMH_BATCH_VISITED)
+    if(module_name IN_LIST batch OR module_name IN_LIST visited)
+        return()
+    endif()
+    set_property(GLOBAL APPEND PROPERTY CMH_BATCH_VISITED ${module_name})
+
+    cmakehub_get_locked_module(${module_name} "" LOCKED)
+    if(LOCKED_FILE)
+        set(dependencies ${LOCKED_DEPENDENCIES})
+        set(conflicts_json "${LOCKED_CONFLICTS_JSON}")
+        set(platform_list "${LOCKED_PLATFORM}")
+    else()
+        cmakehub_get_module_info(${module_name} success)
+        cmakehub_get_module_property(${module_name} repository repository)
+        cmakehub_get_module_property(${module_name} path path)
+        cmakehub_get_module_property(${module_name} version version)
+        cmakehub_get_module_property(${module_name} dependencies dependencies_json)
+        cmakehub_get_module_property(${module_name} conflicts conflicts_json)
+        cmakehub_get_module_property(${module_name} platform platform_json)
+        if(NOT version)
+            set(version "main")
+        endif()
+        if(LOCKED_COMMIT)
+            set(version ${LOCKED_COMMIT})
+        endif()
+        cmakehub_parse_list("${dependencies_json}" dependencies)
+        cmakehub_parse_list("${platform_json}" platform_list)
+    endif()
+
+    cmakehub_parse_list("${conflicts_json}" conflicts)
+    foreach(conflict ${conflicts})
+        set_property(GLOBAL APPEND PROPERTY CMH_BATCH_CONFLICTS "${module_name}|${conflict}")
+    endforeach()
+    cmakehub_check_platform(${module_name} "${platform_list}")
+
+    if(NOT LOCKED_FILE)
+        cmakehub_is_module_cached(${module_name} "${repository}" "${version}" "${path}" cached)
+        if(NOT cached)
+            set_property(GLOBAL APPEND PROPERTY CMH_BATCH_DOWNLOADS "${module_name}|${repository}|${version}|${path}")
+        endif()
+    endif()
+
+    foreach(dep ${dependencies})
+        cmakehub_resolve_batch_module(${dep})
+    endforeach()
+    set_property(GLOBAL APPEND PROPERTY CMH_BATCH_MODULES ${module_name})
+endfunction()
+
+# Download modules in parallel: their repository refs are spread over up to
+# `jobs` worker processes (cmake -P on this file, see the end of it), each of
+# which downloads its refs one after another with cmakehub_fetch_module().
+# The checkout locks keep the workers and other configures from downloading a
+# ref twice. Each worker's result is reported; a failed worker is not an
+# error, since cmakehub_use() then downloads what is still missing itself and
+# reports the error.
+function(cmakehub_fetch_many downloads jobs)
+    set(refs "")
+    foreach(download ${downloads})
+        string(REPLACE "|" ";" fields "${download}")
+        list(GET fields 1 repository)
+        list(GET fields 2 version)
+        list(FIND refs "${repository}|${version}" ref_index)
+        if(ref_index EQUAL -1)
+            list(LENGTH refs ref_index)
+            list(APPEND refs "${repository}|${version}")
+        endif()
+        math(EXPR worker "${ref_index} % ${jobs}")
+        if(DEFINED worker_${worker})
+            string(APPEND worker_${worker} "|${download}")
+        else()
+            set(worker_${worker} "${download}")
+        endif()
+    endforeach()
+
+    list(LENGTH downloads download_count)
+    list(LENGTH refs ref_count)
+    if(ref_count LESS jobs)
+        set(jobs ${ref_count})
+    endif()
+    cmakehub_log(STATUS "Downloading ${download_count} module(s) from ${ref_count} repository ref(s) with ${jobs} job(s)")
+
+    string(RANDOM LENGTH 8 run_id)
+    set(log_dir "${CMH_CACHE_DIR}/.fetch-${run_id}")
+    file(MAKE_DIRECTORY "${log_dir}")
+
+    # The commands of one execute_process() run concurrently but form a
+    # pipeline, so each one only launches a worker with output files of its
+    # own and records its exit code (CMAKEHUB_FETCH_LOG, see the end of this file)
+    set(commands "")
+    math(EXPR last_worker "${jobs} - 1")
+    foreach(worker RANGE ${last_worker})
+        list(APPEND commands COMMAND ${CMAKE_COMMAND}
+            "-DCMAKEHUB_VERBOSE=OFF"
+            "-DCMH_CACHE_DIR=${CMH_CACHE_DIR}"
+            "-DCMAKEHUB_FETCH_MODE=${CMAKEHUB_FETCH_MODE}"
+            "-DCMAKEHUB_LOCK_TIMEOUT=${CMAKEHUB_LOCK_TIMEOUT}"
+            "-DCMAKEHUB_FETCH_WORKER=${worker_${worker}}"
+            "-DCMAKEHUB_FETCH_LOG=${log_dir}/worker-${worker}"
+            -P "${CMAKEHUB_LOADER_FILE}"
+        )
+    endforeach()
+    execute_process(${commands} OUTPUT_QUIET ERROR_QUIET)
+
+    foreach(worker RANGE ${last_worker})
+        set(modules "")
+        string(REPLACE "|" ";" fields "${worker_${worker}}")
+        while(fields)
+            list(POP_FRONT fields module_name repository version path)
+            list(APPEND modules ${module_name})
+        endwhile()
+        string(REPLACE ";" ", " modules "${modules}")
+
+        set(log "${log_dir}/worker-${worker}")
+        set(result "did not finish")
+        if(EXISTS "${log}.result")
+            file(READ "${log}.result" result)
+        endif()
+        if(result STREQUAL "0")
+            cmakehub_log(STATUS "Download worker ${worker} fetched ${modules}")
+        else()
+            set(errors "")
+            if(EXISTS "${log}.err")
+                file(READ "${log}.err" errors)
+            endif()
+            cmakehub_log(STATUS "Download worker ${worker} failed (${result}) for ${modules}, retrying them one at a time:\n${errors}")
+        endif()
+    endforeach()
+    file(REMOVE_RECURSE "${log_dir}")
+endfunction()
+
 # =============================================================================
 # Core API Functions
 # =============================================================================
@@ -220,6 +1153,27 @@ function(cmakehub_use module_name)
     
     # Capture additional config arguments (everything after VERSION)
     set(remaining_args "${USE_UNPARSED_ARGUMENTS}")
+
+    # Locked fast path: a cached file matching the lock file needs neither the
+    # module index nor the network
+    cmakehub_get_locked_module(${module_name} "${USE_VERSION}" LOCKED)
+    if(LOCKED_FILE)
+        cmakehub_log(STATUS "Using locked module: ${module_name} (${LOCKED_COMMIT})")
+        # The lock records what the index would be checked for
+        cmakehub_check_cmake_version("${LOCKED_CMAKE_MINIMUM_REQUIRED}")
+        cmakehub_check_cpp_standard("${LOCKED_CPP_MINIMUM_REQUIRED}")
+        cmakehub_check_platform(${module_name} "${LOCKED_PLATFORM}")
+        cmakehub_check_conflicts(${module_name} "${LOCKED_CONFLICTS_JSON}")
+        cmakehub_ledger_hit(${module_name} ${LOCKED_COMMIT} "${LOCKED_LAYER}")
+        foreach(dep ${LOCKED_DEPENDENCIES})
+            cmakehub_use(${dep})
+        endforeach()
+        cmakehub_set_config_variables(${module_name} ${remaining_args})
+        include(${LOCKED_FILE})
+        cmakehub_log(STATUS "Module '${module_name}' loaded successfully")
+        set_property(GLOBAL APPEND PROPERTY CMAKEHUB_USED_MODULES ${module_name})
+        return()
+    endif()
     
     # Get module information
     cmakehub_get_module_info(${module_name} success)
@@ -250,6 +1204,11 @@ function(cmakehub_use module_name)
         set(VERSION "main")
     endif()
     
+    # Locked modules are downloaded at their pinned commit
+    if(LOCKED_COMMIT)
+        set(VERSION ${LOCKED_COMMIT})
+    endif()
+    
     if(NOT DEPENDENCIES_JSON OR DEPENDENCIES_JSON STREQUAL "")
         set(DEPENDENCIES_JSON "[]")
     endif()
@@ -265,37 +1224,7 @@ function(cmakehub_use module_name)
     # Platform compatibility check
     cmakehub_get_module_property(${module_name} platform PLATFORM_JSON)
     cmakehub_parse_list("${PLATFORM_JSON}" platform_list)
-    
-    if(platform_list)
-        # Detect current platform
-        set(current_platform "")
-        if(CMAKE_SYSTEM_NAME STREQUAL "Windows")
-            set(current_platform "windows")
-        elseif(CMAKE_SYSTEM_NAME STREQUAL "Linux")
-            set(current_platform "linux")
-        elseif(CMAKE_SYSTEM_NAME STREQUAL "Darwin")
-            set(current_platform "macos")
-        elseif(CMAKE_SYSTEM_NAME MATCHES "FreeBSD")
-            set(current_platform "freebsd")
-        elseif(IOS)
-            set(current_platform "ios")
-        elseif(ANDROID)
-            set(current_platform "android")
-        endif()
-        
-        # Check if current platform is in the list
-        set(platform_compatible FALSE)
-        foreach(p ${platform_list})
-            if(p STREQUAL current_platform)
-                set(platform_compatible TRUE)
-                break()
-            endif()
-        endforeach()
-        
-        if(NOT platform_compatible AND current_platform)
-            cmakehub_log(WARNING "Module '${module_name}' is not compatible with platform '${current_platform}'. Supported platforms: ${platform_list}")
-        endif()
-    endif()
+    cmakehub_check_platform(${module_name} "${platform_list}")
     
     # Check conflicts
     cmakehub_check_conflicts(${module_name} "${CONFLICTS_JSON}")
@@ -303,87 +1232,22 @@ function(cmakehub_use module_name)
     # Resolve dependencies
     cmakehub_check_dependencies(${module_name} "${DEPENDENCIES_JSON}")
 
-    # Setup cache directory with version to avoid conflicts
-    set(module_cache_dir "${CMH_CACHE_DIR}/${module_name}/${VERSION}")
-    file(MAKE_DIRECTORY ${module_cache_dir})
-    
-    # Check if module is already cached
-    set(module_file "${module_cache_dir}/${PATH}")
-    set(meta_file "${module_cache_dir}/.cmh_meta.json")
-    
-    if(EXISTS ${module_file} AND EXISTS ${meta_file})
-        cmakehub_log(STATUS "Using cached module: ${module_name}")
-        
-        # Verify metadata
-        file(READ ${meta_file} meta_content)
-        # In production, verify that the cached version matches expected version
-        
-    else()
-        cmakehub_log(STATUS "Downloading module: ${module_name}")
-
-        # Download using FetchContent
-        include(FetchContent)
-
-        FetchContent_Declare(
-            ${module_name}
-            GIT_REPOSITORY ${REPOSITORY}
-            GIT_TAG ${VERSION}
-            SOURCE_DIR ${module_cache_dir}
-            SUBBUILD_DIR "${module_cache_dir}-subbuild"
-        )
-
-        # Check if already populated
-        FetchContent_GetProperties(${module_name} POPULATED populated)
-        if(NOT populated)
-            # Try to download and populate
-            FetchContent_MakeAvailable(${module_name})
-        endif()
+    cmakehub_fetch_module(${module_name} "${REPOSITORY}" "${VERSION}" "${PATH}" module_file)
 
-        # Verify population was successful
-        FetchContent_GetProperties(${module_name} POPULATED populated)
-        if(NOT populated)
-            message(FATAL_ERROR "Failed to download module '${module_name}' from ${REPOSITORY}")
+    if(LOCKED_SHA256 AND EXISTS ${module_file})
+        file(SHA256 ${module_file} module_digest)
+        if(NOT module_digest STREQUAL LOCKED_SHA256)
+            message(FATAL_ERROR
+                "Module '${module_name}' at ${LOCKED_COMMIT} does not match ${CMAKEHUB_LOCK_FILE}\n"
+                "Expected SHA-256 ${LOCKED_SHA256}, got ${module_digest}. Run 'cmakehub lock' to update it."
+            )
         endif()
-        
-        # Write metadata
-        string(TIMESTAMP download_timestamp "%Y-%m-%dT%H:%M:%S")
-        file(WRITE ${meta_file}
-            "{\n"
-            "  \"module\": \"${module_name}\",\n"
-            "  \"repository\": \"${REPOSITORY}\",\n"
-            "  \"version\": \"${VERSION}\",\n"
-            "  \"path\": \"${PATH}\",\n"
-            "  \"downloaded_at\": \"${download_timestamp}\"\n"
-            "}"
-        )
-        
-        cmakehub_log(STATUS "Module downloaded successfully")
     endif()
-    
+
     # Include the module file
     if(EXISTS ${module_file})
         # Set config variables from remaining arguments (CONFIG穿透)
-        if(remaining_args)
-            cmakehub_log(STATUS "Setting config variables for ${module_name}: ${remaining_args}")
-            list(LENGTH remaining_args remaining_len)
-            math(EXPR remaining_idx_max "${remaining_len} - 1")
-            
-            foreach(idx RANGE 0 ${remaining_idx_max})
-                list(GET remaining_args ${idx} current)
-                math(EXPR next_idx "${idx} + 1")
-                if(next_idx LESS_EQUAL remaining_idx_max)
-                    list(GET remaining_args ${next_idx} next_val)
-                    if(next_val STREQUAL "ON" OR next_val STREQUAL "OFF" OR next_val STREQUAL "TRUE" OR next_val STREQUAL "FALSE" OR next_val MATCHES "^[0-9]+$" OR next_val MATCHES "^\".*\"$" OR next_val MATCHES "^'.*'$")
-                        # This is a value, set the variable
-                        string(REPLACE "\"" "" clean_key "${current}")
-                        set(${clean_key} ${next_val} CACHE BOOL "" FORCE)
-                        cmakehub_log(STATUS "  Set ${clean_key} = ${next_val}")
-                        # Skip the next iteration since we consumed the value
-                        math(EXPR idx "${idx} + 1")
-                    endif()
-                endif()
-            endforeach()
-        endif()
+        cmakehub_set_config_variables(${module_name} ${remaining_args})
         
         include(${module_file})
         cmakehub_log(STATUS "Module '${module_name}' loaded successfully")
@@ -398,32 +1262,66 @@ function(cmakehub_use module_name)
     set_property(GLOBAL APPEND PROPERTY CMAKEHUB_USED_MODULES ${module_name})
 endfunction()
 
+# Load several modules at once: the whole set, with dependencies, is resolved
+# and checked for conflicts first, every module missing from the cache is
+# downloaded in parallel (up to JOBS repository refs at a time, default
+# CMAKEHUB_FETCH_JOBS), and then the modules are included in order, each
+# after its dependencies. Modules are loaded at their index version with no
+# config arguments; load a module that needs VERSION or config arguments with
+# its own cmakehub_use() call instead.
+#
+#   cmakehub_use_many(sanitizers coverage cotire [JOBS 4])
+function(cmakehub_use_many)
+    cmake_parse_arguments(MANY "" "JOBS" "" ${ARGN})
+    set(requested ${MANY_UNPARSED_ARGUMENTS})
+    if(NOT MANY_JOBS)
+        set(MANY_JOBS ${CMAKEHUB_FETCH_JOBS})
+    endif()
+    if(NOT requested)
+        return()
+    endif()
+
+    # Resolve the set before downloading anything
+    foreach(property MODULES VISITED CONFLICTS DOWNLOADS)
+        set_property(GLOBAL PROPERTY CMH_BATCH_${property} "")
+    endforeach()
+    foreach(module_name ${requested})
+        cmakehub_resolve_batch_module(${module_name})
+    endforeach()
+    get_property(batch GLOBAL PROPERTY CMH_BATCH_MODULES)
+    get_property(conflicts GLOBAL PROPERTY CMH_BATCH_CONFLICTS)
+    get_property(downloads GLOBAL PROPERTY CMH_BATCH_DOWNLOADS)
+    cmakehub_log(STATUS "Loading ${batch}")
+
+    get_property(used_modules GLOBAL PROPERTY CMAKEHUB_USED_MODULES)
+    foreach(pair ${conflicts})
+        string(REPLACE "|" ";" pair "${pair}")
+        list(GET pair 0 module_name)
+        list(GET pair 1 conflict)
+        if(conflict IN_LIST batch OR conflict IN_LIST used_modules)
+            message(FATAL_ERROR "Module '${module_name}' conflicts with module '${conflict}'")
+        endif()
+    endforeach()
+
+    # A single ref gains nothing from a worker process
+    list(LENGTH downloads download_count)
+    if(download_count GREATER 1 AND MANY_JOBS GREATER 1)
+        cmakehub_fetch_many("${downloads}" ${MANY_JOBS})
+    endif()
+
+    foreach(module_name ${requested})
+        cmakehub_use(${module_name})
+    endforeach()
+endfunction()
+
 function(cmakehub_use_category category_name)
     cmakehub_log(STATUS "Loading all modules in category: ${category_name}")
     
-    if(NOT EXISTS ${CMAKEHUB_MODULES_INDEX})
-        message(FATAL_ERROR "CMakeHub modules index not found at: ${CMAKEHUB_MODULES_INDEX}")
-    endif()
-    
-    file(READ ${CMAKEHUB_MODULES_INDEX} index_content)
-    string(JSON modules_array GET "${index_content}" modules)
-    
-    string(JSON modules_length LENGTH "${modules_array}")
-    math(EXPR max_index "${modules_length} - 1")
+    cmakehub_load_index()
+    get_property(category_modules GLOBAL PROPERTY "CMH_CATEGORY_${category_name}_MODULES")
     
-    set(loaded_count 0)
-    
-    foreach(index RANGE ${max_index})
-        string(JSON module_obj GET "${modules_array}" ${index})
-        string(JSON module_category GET "${module_obj}" category)
-        string(JSON module_name GET "${module_obj}" name)
-        
-        if(module_category STREQUAL category_name)
-            cmakehub_log(STATUS "Loading module: ${module_name}")
-            cmakehub_use(${module_name})
-            math(EXPR loaded_count "${loaded_count} + 1")
-        endif()
-    endforeach()
+    cmakehub_use_many(${category_modules})
+    list(LENGTH category_modules loaded_count)
     
     cmakehub_log(STATUS "Loaded ${loaded_count} module(s) from category '${category_name}'")
 endfunction()
@@ -467,15 +1365,8 @@ endfunction()
 function(cmakehub_list_compatible_modules)
     cmakehub_log(STATUS "Listing modules compatible with CMake ${CMAKE_VERSION}...")
     
-    if(NOT EXISTS ${CMAKEHUB_MODULES_INDEX})
-        message(FATAL_ERROR "CMakeHub modules index not found at: ${CMAKEHUB_MODULES_INDEX}")
-    endif()
-    
-    file(READ ${CMAKEHUB_MODULES_INDEX} index_content)
-    string(JSON modules_array GET "${index_content}" modules)
-    
-    string(JSON modules_length LENGTH "${modules_array}")
-    math(EXPR max_index "${modules_length} - 1")
+    cmakehub_load_index()
+    get_property(module_names GLOBAL PROPERTY CMH_INDEX_MODULES)
     
     message(STATUS "")
     message(STATUS "Compatible Modules (CMake ${CMAKE_VERSION}):")
@@ -484,9 +1375,8 @@ function(cmakehub_list_compatible_modules)
     set(compatible_count 0)
     set(incompatible_count 0)
     
-    foreach(index RANGE ${max_index})
-        string(JSON module_obj GET "${modules_array}" ${index})
-        string(JSON module_name GET "${module_obj}" name)
+    foreach(module_name ${module_names})
+        get_property(module_obj GLOBAL PROPERTY "CMH_MODULE_${module_name}_INFO_JSON")
         string(JSON module_description GET "${module_obj}" description)
         
         # Check version requirement - try to get the property, if it fails set to empty
@@ -602,23 +1492,16 @@ endfunction()
 function(cmakehub_list)
     cmakehub_log(STATUS "Listing all available modules...")
     
-    if(NOT EXISTS ${CMAKEHUB_MODULES_INDEX})
-        message(FATAL_ERROR "CMakeHub modules index not found at: ${CMAKEHUB_MODULES_INDEX}")
-    endif()
-    
-    file(READ ${CMAKEHUB_MODULES_INDEX} index_content)
-    string(JSON modules_array GET "${index_content}" modules)
-    
-    string(JSON modules_length LENGTH "${modules_array}")
-    math(EXPR max_index "${modules_length} - 1")
+    cmakehub_load_index()
+    get_property(module_names GLOBAL PROPERTY CMH_INDEX_MODULES)
+    list(LENGTH module_names modules_length)
     
     message(STATUS "")
     message(STATUS "Available Modules (${modules_length}):")
     message(STATUS "========================")
     
-    foreach(index RANGE ${max_index})
-        string(JSON module_obj GET "${modules_array}" ${index})
-        string(JSON module_name GET "${module_obj}" name)
+    foreach(module_name ${module_names})
+        get_property(module_obj GLOBAL PROPERTY "CMH_MODULE_${module_name}_INFO_JSON")
         string(JSON module_desc GET "${module_obj}" description)
         string(JSON module_cat GET "${module_obj}" category)
         string(JSON module_lic GET "${module_obj}" license)
@@ -633,15 +1516,8 @@ endfunction()
 function(cmakehub_search search_term)
     cmakehub_log(STATUS "Searching for modules matching: ${search_term}")
     
-    if(NOT EXISTS ${CMAKEHUB_MODULES_INDEX})
-        message(FATAL_ERROR "CMakeHub modules index not found at: ${CMAKEHUB_MODULES_INDEX}")
-    endif()
-    
-    file(READ ${CMAKEHUB_MODULES_INDEX} index_content)
-    string(JSON modules_array GET "${index_content}" modules)
-    
-    string(JSON modules_length LENGTH "${modules_array}")
-    math(EXPR max_index "${modules_length} - 1")
+    cmakehub_load_index()
+    get_property(module_names GLOBAL PROPERTY CMH_INDEX_MODULES)
     
     message(STATUS "")
     message(STATUS "Search Results for '${search_term}':")
@@ -650,9 +1526,8 @@ function(cmakehub_search search_term)
     set(found_count 0)
     string(TOLOWER "${search_term}" search_lower)
     
-    foreach(index RANGE ${max_index})
-        string(JSON module_obj GET "${modules_array}" ${index})
-        string(JSON module_name GET "${module_obj}" name)
+    foreach(module_name ${module_names})
+        get_property(module_obj GLOBAL PROPERTY "CMH_MODULE_${module_name}_INFO_JSON")
         string(JSON module_desc GET "${module_obj}" description)
         string(JSON module_cat GET "${module_obj}" category)
         string(JSON module_tags_json GET "${module_obj}" tags)
@@ -703,7 +1578,25 @@ function(cmakehub_cache_clear module_name)
         # Clear all cache
         cmakehub_log(STATUS "Clearing entire CMakeHub cache at: ${CMH_CACHE_DIR}")
         if(EXISTS ${CMH_CACHE_DIR})
-            file(REMOVE_RECURSE ${CMH_CACHE_DIR})
+            # Wait for downloads into any checkout to finish, as cmakehub_fetch_module
+            # holds the checkout's lock while it writes
+            file(GLOB checkout_dirs LIST_DIRECTORIES true "${CMH_CACHE_DIR}/.repos/*/*")
+            foreach(checkout_dir ${checkout_dirs})
+                get_filename_component(checkout_name "${checkout_dir}" NAME)
+                if(IS_DIRECTORY "${checkout_dir}" AND NOT checkout_name MATCHES "^\\.|-subbuild$")
+                    file(RELATIVE_PATH checkout "${CMH_CACHE_DIR}" "${checkout_dir}")
+                    cmakehub_get_checkout_lock("${checkout}" lock_file)
+                    file(LOCK "${lock_file}" GUARD FUNCTION TIMEOUT ${CMAKEHUB_LOCK_TIMEOUT} RESULT_VARIABLE lock_result)
+                    if(NOT lock_result EQUAL 0)
+                        message(FATAL_ERROR "Failed to lock ${lock_file} to clear the cache: ${lock_result}")
+                    endif()
+                endif()
+            endforeach()
+            # Keep the lock files, which other configures may be waiting on
+            file(GLOB cache_items LIST_DIRECTORIES true "${CMH_CACHE_DIR}/*" "${CMH_CACHE_DIR}/.repos/*/*")
+            list(FILTER cache_items EXCLUDE REGEX "/\\.[^/]*\\.lock$")
+            list(REMOVE_ITEM cache_items "${CMH_CACHE_DIR}/.repos")
+            file(REMOVE_RECURSE ${cache_items})
             message(STATUS "Cache cleared successfully")
         else()
             message(STATUS "Cache directory does not exist")
@@ -713,7 +1606,42 @@ function(cmakehub_cache_clear module_name)
         cmakehub_log(STATUS "Clearing cache for module: ${module_name}")
         set(module_cache_dir "${CMH_CACHE_DIR}/${module_name}")
         if(EXISTS ${module_cache_dir})
+            # Also drop the shared checkouts the module's entries point into,
+            # unless an entry of another module still points into them
+            set(module_checkouts "")
+            set(used_checkouts "")
+            file(GLOB entry_meta_files "${CMH_CACHE_DIR}/*/*/.cmh_meta.json")
+            foreach(entry_meta_file ${entry_meta_files})
+                file(READ ${entry_meta_file} entry_meta)
+                string(JSON checkout ERROR_VARIABLE checkout_error GET "${entry_meta}" checkout)
+                if(NOT checkout_error AND checkout)
+                    get_filename_component(entry_dir "${entry_meta_file}" DIRECTORY)
+                    get_filename_component(owner_dir "${entry_dir}" DIRECTORY)
+                    get_filename_component(owner "${owner_dir}" NAME)
+                    if(owner STREQUAL module_name)
+                        list(APPEND module_checkouts "${checkout}")
+                    else()
+                        list(APPEND used_checkouts "${checkout}")
+                    endif()
+                endif()
+            endforeach()
+            list(REMOVE_DUPLICATES module_checkouts)
+            # Wait for downloads into the checkouts to finish before removing anything
+            foreach(checkout ${module_checkouts})
+                cmakehub_get_checkout_lock("${checkout}" lock_file)
+                file(LOCK "${lock_file}" GUARD FUNCTION TIMEOUT ${CMAKEHUB_LOCK_TIMEOUT} RESULT_VARIABLE lock_result)
+                if(NOT lock_result EQUAL 0)
+                    message(FATAL_ERROR "Failed to lock ${lock_file} to clear module '${module_name}': ${lock_result}")
+                endif()
+            endforeach()
+            foreach(checkout ${module_checkouts})
+                if(NOT checkout IN_LIST used_checkouts)
+                    file(REMOVE_RECURSE "${CMH_CACHE_DIR}/${checkout}" "${CMH_CACHE_DIR}/${checkout}-subbuild")
+                    cmakehub_ledger_append("\"op\": \"remove_checkout\", \"checkout\": \"${checkout}\"")
+                endif()
+            endforeach()
             file(REMOVE_RECURSE ${module_cache_dir})
+            cmakehub_ledger_append("\"op\": \"remove\", \"module\": \"${module_name}\"")
             message(STATUS "Cache for '${module_name}' cleared successfully")
         else()
             message(STATUS "No cache found for '${module_name}'")
@@ -769,13 +1697,8 @@ function(cmakehub_dependency_graph_all output_file)
     # Generate dependency graph for ALL modules (not just loaded ones)
     cmakehub_log(STATUS "Generating dependency graph for ALL modules...")
     
-    # Read modules.json
-    if(NOT EXISTS ${CMAKEHUB_MODULES_INDEX})
-        message(FATAL_ERROR "Modules index not found: ${CMAKEHUB_MODULES_INDEX}")
-    endif()
-    
-    file(READ ${CMAKEHUB_MODULES_INDEX} index_content)
-    string(JSON modules_json GET ${index_content} modules)
+    cmakehub_load_index()
+    get_property(module_names GLOBAL PROPERTY CMH_INDEX_MODULES)
     
     # Generate DOT format graph with category grouping
     set(dot_content "digraph CMakeHub_Dependencies {\n")
@@ -791,14 +1714,9 @@ function(cmakehub_dependency_graph_all output_file)
     set(categories "")
     set(modules_by_category "")
     
-    # Parse all modules
-    string(JSON modules_count LENGTH ${modules_json})
-    math(EXPR max_index "${modules_count} - 1")
-    
-    foreach(idx RANGE ${max_index})
-        string(JSON module_json GET ${modules_json} ${idx})
-        string(JSON name GET ${module_json} name)
-        string(JSON category GET ${module_json} category)
+    foreach(name ${module_names})
+        get_property(module_json GLOBAL PROPERTY "CMH_MODULE_${name}_INFO_JSON")
+        string(JSON category GET "${module_json}" category)
         
         # Set default category
         if("${category}" STREQUAL "")
@@ -1031,4 +1949,34 @@ endfunction()
 cmakehub_log(STATUS "CMakeHub initialized")
 cmakehub_log(STATUS "Cache directory: ${CMH_CACHE_DIR}")
 cmakehub_log(STATUS "Modules index: ${CMAKEHUB_MODULES_INDEX}")
-cmakehub_log(STATUS "Version check mode: ${CMAKEHUB_VERSION_CHECK_MODE}")
\ No newline at end of file
+cmakehub_log(STATUS "Version check mode: ${CMAKEHUB_VERSION_CHECK_MODE}")
+
+# Worker process of cmakehub_fetch_many(): downloads the modules given as
+# <module>|<repository>|<version>|<path>|... into the cache. Launched with
+# CMAKEHUB_FETCH_LOG=<prefix>, it runs itself again without it, writing the
+# output to <prefix>.out and <prefix>.err and the exit code to <prefix>.result.
+if(CMAKE_SCRIPT_MODE_FILE STREQUAL CMAKE_CURRENT_LIST_FILE AND DEFINED CMAKEHUB_FETCH_WORKER)
+    if(DEFINED CMAKEHUB_FETCH_LOG)
+        execute_process(
+            COMMAND ${CMAKE_COMMAND}
+                "-DCMH_CACHE_DIR=${CMH_CACHE_DIR}"
+                "-DCMAKEHUB_CACHE_LAYERS="
+                "-DCMAKEHUB_LOCK_FILE="
+                "-DCMAKEHUB_FETCH_MODE=${CMAKEHUB_FETCH_MODE}"
+                "-DCMAKEHUB_LOCK_TIMEOUT=${CMAKEHUB_LOCK_TIMEOUT}"
+                "-DCMAKEHUB_FETCH_WORKER=${CMAKEHUB_FETCH_WORKER}"
+                -P "${CMAKE_CURRENT_LIST_FILE}"
+            RESULT_VARIABLE result
+            OUTPUT_FILE "${CMAKEHUB_FETCH_LOG}.out"
+            ERROR_FILE "${CMAKEHUB_FETCH_LOG}.err"
+        )
+        file(WRITE "${CMAKEHUB_FETCH_LOG}.result" "${result}")
+        return()
+    endif()
+
+    string(REPLACE "|" ";" fields "${CMAKEHUB_FETCH_WORKER}")
+    while(fields)
+        list(POP_FRONT fields module_name repository version path)
+        cmakehub_fetch_module(${module_name} "${repository}" "${version}" "${path}" module_file)
+    endwhile()
+endif()
\ No newline at end of file
@@ -14,6 +14,10 @@ import json
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli import sharded_index  # noqa: E402
+
 
 def validate_url(url):
     """Validate GitHub repository URL"""
@@ -46,9 +50,13 @@ def add_module(args):
     modules_json_path = Path(__file__).parent.parent / "modules.json"
     with open(modules_json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
+    sharded = sharded_index.is_sharded(data)
 
     # Check if module already exists
-    existing = next((m for m in data["modules"] if m["name"] == args.name), None)
+    if sharded:
+        existing = sharded_index.find_module(modules_json_path, data, args.name)
+    else:
+        existing = next((m for m in data["modules"] if m["name"] == args.name), None)
     if existing:
         print(f"Error: Module '{args.name}' already exists!")
         return 1
@@ -72,6 +80,13 @@ def add_module(args):
         "tags": args.tags.split(",") if args.tags else [],
     }
 
+    # A sharded index only rewrites the module's shard and the manifest
+    if sharded:
+        sharded_index.add_module(modules_json_path, data, new_module)
+        print(f"Successfully added module: {args.name}")
+        print(f"Total modules: {sum(len(s['modules']) for s in data['shards'].values())}")
+        return 0
+
     # Add module
     data["modules"].append(new_module)
 
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark modules.json loading: cold JSON parse vs. warm compiled snapshot
+
+Generates synthetic indexes of the requested sizes in a temporary directory
+and times each loading path.
+
+Usage:
+    python benchmark_index.py [--sizes 50 5000 500000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Allow importing the CLI package when run from a source checkout
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+CATEGORIES = [
+    "code_quality",
+    "build_optimization",
+    "debugging",
+    "dependency",
+    "platform",
+    "testing",
+    "utils",
+    "packaging",
+    "gui",
+]
+LICENSES = ["MIT", "Apache-2.0", "BSD-3-Clause", "BSL-1.0", "LGPL-3.0"]
+PLATFORMS = ["windows", "linux", "macos", "freebsd", "ios", "android"]
+WORDS = [
+    "sanitizer", "coverage", "compiler", "warnings", "cache", "launcher", "format",
+    "tidy", "static", "analysis", "test", "fuzz", "package", "install", "export",
+    "shader", "toolchain", "android", "ios", "qt", "gtk", "sdl", "opengl", "cuda",
+    "doxygen", "version", "git", "header", "precompiled", "unity", "link", "optimize",
+]
+
+
+def generate_module(index, rng):
+    """Generate one synthetic module entry shaped like a real modules.json entry"""
+    words = rng.sample(WORDS, 4)
+    return {
+        "name": f"{words[0]}_{words[1]}_{index}",
+        "description": " ".join(rng.sample(WORDS, 8)).capitalize(),
+        "category": rng.choice(CATEGORIES),
+        "author": f"author{index % 997}",
+        "repository": f"https://github.com/org{index % 211}/cmake-modules-{index % 1009}.git",
+        "path": f"cmake/{words[2].capitalize()}{index}.cmake",
+        "license": rng.choice(LICENSES),
+        "stars": rng.randint(0, 5000),
+        "last_updated": "2024-01-01",
+        "version": rng.choice(["master", "main", "v1.0.0"]),
+        "cmake_minimum_required": rng.choice(["3.10", "3.14", "3.19"]),
+        "cpp_minimum_required": rng.choice(["", "11", "17"]),
+        "dependencies": [],
+        "conflicts": [],
+        "tags": words[:3],
+        "platform": rng.sample(PLATFORMS, rng.randint(1, len(PLATFORMS))),
+    }
+
+
+def generate_index(path, count, seed=0):
+    """Write a synthetic modules.json with `count` modules, one entry at a time"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{\n  "schema_version": "1.0",\n  "modules": [\n')
+        for index in range(count):
+            if index:
+                f.write(",\n")
+            f.write("    " + json.dumps(generate_module(index, rng)))
+        f.write("\n  ],\n")
+        f.write('  "categories": ' + json.dumps({c: c for c in CATEGORIES}) + "\n}\n")
+
+
+def best_of(repeat, func):
+    """Return the best wall time of `repeat` calls to func"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_size(work_dir, count, repeat):
+    """Benchmark one index size, returning (file size, cold, first run, warm) timings"""
+    from cli.index_cache import load_snapshot
+    from cli.package_data import parse_modules_json
+
+    index_path = os.path.join(work_dir, f"modules_{count}.json")
+    generate_index(index_path, count)
+
+    cold = best_of(repeat, lambda: parse_modules_json(index_path))
+
+    snapshot_name = f"bench{count}"
+    start = time.perf_counter()
+    load_snapshot(snapshot_name, index_path, parse_modules_json)
+    first = time.perf_counter() - start
+
+    warm = best_of(repeat, lambda: load_snapshot(snapshot_name, index_path, parse_modules_json))
+
+    size = os.path.getsize(index_path)
+    os.remove(index_path)
+    return size, cold, first, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark modules.json snapshot loading")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[50, 5000, 500000], help="Index sizes"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="cmakehub-bench-") as work_dir:
+        os.environ["CMH_CACHE_DIR"] = os.path.join(work_dir, "cache")
+        os.environ.pop("CMH_NO_INDEX_CACHE", None)
+
+        print("=" * 80)
+        print("modules.json load benchmark (best of {})".format(args.repeat))
+        print("=" * 80)
+        print(f"{'Modules':>10}  {'JSON size':>12}  {'Cold parse':>12}  {'First run':>12}  "
+              f"{'Warm':>12}  {'Speedup':>8}")
+
+        for count in args.sizes:
+            size, cold, first, warm = benchmark_size(work_dir, count, args.repeat)
+            print(f"{count:>10,}  {size / (1024 * 1024):>9.2f} MB  {cold * 1000:>9.2f} ms  "
+                  f"{first * 1000:>9.2f} ms  {warm * 1000:>9.2f} ms  {cold / warm:>7.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark loader.cmake: configure time of a project using 1, 20 and all modules
+
+Every module is pre-populated in a temporary cache with an empty module file,
+so the timings measure the loader itself (index lookups, checks, includes)
+rather than downloads. Each count is timed twice: parsing modules.json with
+string(JSON), and including the precompiled modules_index.cmake.
+
+Usage:
+    python benchmark_loader.py [--counts 1 20 all] [--repeat 3]
+                               [--synthetic 500] [--loader path/to/loader.cmake]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from cli.cmake_index import compile_index, get_compiled_index_path  # noqa: E402
+
+
+def select_modules(modules, count):
+    """The first count modules of the index, skipping ones that conflict with earlier picks"""
+    selected = []
+    names = set()
+    for module in modules:
+        if len(selected) >= count:
+            break
+        if names.intersection(module.get("conflicts", [])):
+            continue
+        selected.append(module)
+        names.add(module["name"])
+    return selected
+
+
+def populate_cache(cache_dir, modules):
+    """Create a cache entry with an empty module file for every module"""
+    for module in modules:
+        version = module.get("version") or "main"
+        entry_dir = os.path.join(cache_dir, module["name"], version)
+        module_file = os.path.join(entry_dir, *module["path"].split("/"))
+        os.makedirs(os.path.dirname(module_file), exist_ok=True)
+        with open(module_file, "w") as f:
+            f.write(f"# {module['name']}\n")
+        with open(os.path.join(entry_dir, ".cmh_meta.json"), "w") as f:
+            json.dump({"module": module["name"], "version": version, "path": module["path"]}, f)
+
+
+def write_project(project_dir, loader, index_path, cache_dir, modules):
+    """Write a CMakeLists.txt that loads the given modules"""
+    os.makedirs(project_dir, exist_ok=True)
+    lines = [
+        "cmake_minimum_required(VERSION 3.19)",
+        "project(cmakehub_benchmark NONE)",
+        f'set(CMH_CACHE_DIR "{Path(cache_dir).as_posix()}")',
+        'set(CMAKEHUB_VERSION_CHECK_MODE "SILENT")',
+        f'include("{Path(loader).as_posix()}")',
+        f'set(CMAKEHUB_MODULES_INDEX "{Path(index_path).as_posix()}")',
+    ]
+    lines += [f"cmakehub_use({module['name']})" for module in modules]
+    with open(os.path.join(project_dir, "CMakeLists.txt"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def time_configure(project_dir, build_dir, repeat):
+    """Best-of-repeat wall time of a fresh configure"""
+    best = None
+    for _ in range(repeat):
+        shutil.rmtree(build_dir, ignore_errors=True)
+        start = time.perf_counter()
+        result = subprocess.run(
+            ["cmake", "-S", project_dir, "-B", build_dir], capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(f"configure failed:\n{result.stdout}\n{result.stderr}")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CMakeHub loader configure time")
+    parser.add_argument(
+        "--counts", nargs="+", default=["1", "20", "all"], help="Module counts ('all' = every module)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    parser.add_argument(
+        "--synthetic", type=int, help="Use a synthetic index with this many modules"
+    )
+    parser.add_argument(
+        "--loader", default=str(ROOT_DIR / "cmake" / "hub" / "loader.cmake"), help="Loader to time"
+    )
+    args = parser.parse_args()
+
+    if not shutil.which("cmake"):
+        print("Error: cmake not found in PATH", file=sys.stderr)
+        return 1
+
+    work_dir = tempfile.mkdtemp(prefix="cmakehub-loader-bench-")
+    try:
+        # A private copy of the index, so only this benchmark decides whether it is compiled
+        index_path = os.path.join(work_dir, "modules.json")
+        if args.synthetic:
+            sys.path.insert(0, str(Path(__file__).parent))
+            from benchmark_index import generate_index
+
+            generate_index(index_path, args.synthetic)
+        else:
+            shutil.copyfile(ROOT_DIR / "modules.json", index_path)
+
+        with open(index_path, "r", encoding="utf-8") as f:
+            modules = json.load(f)["modules"]
+
+        cache_dir = os.path.join(work_dir, "cache")
+        populate_cache(cache_dir, modules)
+
+        print("=" * 80)
+        print(f"Loader configure benchmark ({len(modules)} modules in index, best of {args.repeat})")
+        print(f"  Loader: {args.loader}")
+        print("=" * 80)
+        print(f"  {'Modules':>7}  {'JSON index':>12}  {'Compiled index':>14}  {'Speedup':>7}")
+
+        compiled_path = get_compiled_index_path(index_path)
+        for count in args.counts:
+            selected = select_modules(modules, len(modules) if count == "all" else int(count))
+            project_dir = os.path.join(work_dir, f"project-{count}")
+            build_dir = os.path.join(project_dir, "build")
+            write_project(project_dir, args.loader, index_path, cache_dir, selected)
+
+            if os.path.exists(compiled_path):
+                os.remove(compiled_path)
+            json_elapsed = time_configure(project_dir, build_dir, args.repeat)
+            compile_index(index_path)
+            compiled_elapsed = time_configure(project_dir, build_dir, args.repeat)
+
+            print(
+                f"  {len(selected):>7}  {json_elapsed * 1000:>9.1f} ms  "
+                f"{compiled_elapsed * 1000:>11.1f} ms  {json_elapsed / compiled_elapsed:>6.1f}x"
+            )
+
+        return 0
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark module records: raw index dicts vs. slotted Module records
+
+Builds a synthetic index in memory and compares the memory held by the
+modules (tracemalloc) and the time of reading their fields.
+
+Usage:
+    python benchmark_module.py [--count 100000] [--repeat 3]
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Allow importing the CLI package when run from a source checkout
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_index import generate_module  # noqa: E402
+from cli.module import Module  # noqa: E402
+
+
+def generate_entries_text(count, seed=0):
+    """Synthetic modules array as JSON text, so every load starts from a parse"""
+    rng = random.Random(seed)
+    return json.dumps([generate_module(index, rng) for index in range(count)])
+
+
+def measure_memory(build):
+    """Bytes still allocated by build() once it returns"""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def best_of(repeat, func):
+    """Return the best wall time of `repeat` calls to func"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def read_dicts(modules):
+    total = 0
+    for module in modules:
+        total += len(module["name"]) + len(module.get("tags", [])) + (module.get("stars") or 0)
+        if module.get("category") == "testing" and "linux" in module.get("platform", []):
+            total += 1
+    return total
+
+
+def read_records(modules):
+    total = 0
+    for module in modules:
+        total += len(module.name) + len(module.tags) + (module.stars or 0)
+        if module.category == "testing" and "linux" in module.platform:
+            total += 1
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Module records against raw dicts")
+    parser.add_argument("--count", type=int, default=100000, help="Modules in the synthetic index")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per timing")
+    args = parser.parse_args()
+
+    text = generate_entries_text(args.count)
+    dict_bytes = measure_memory(lambda: json.loads(text))
+    record_bytes = measure_memory(lambda: [Module.from_dict(m) for m in json.loads(text)])
+
+    dicts = json.loads(text)
+    records = [Module.from_dict(m) for m in dicts]
+    dict_read = best_of(args.repeat, lambda: read_dicts(dicts))
+    record_read = best_of(args.repeat, lambda: read_records(records))
+
+    print("=" * 72)
+    print(f"{args.count:,} modules (best of {args.repeat})")
+    print("=" * 72)
+    print(f"{'':<10}  {'Memory':>12}  {'Per module':>12}  {'Field reads':>12}")
+    for label, size, seconds in (("dict", dict_bytes, dict_read), ("Module", record_bytes, record_read)):
+        print(f"{label:<10}  {size / (1024 * 1024):>9.1f} MB  {size / args.count:>10.0f} B  "
+              f"{seconds * 1000:>9.1f} ms")
+    print(f"Module records use {record_bytes / dict_bytes:.0%} of the memory, "
+          f"field reads take {record_read / dict_read:.0%} of the time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark the full-text search index on synthetic module catalogs
+
+Measures index build time, snapshot load time and per-query latency for
+exact, prefix, AND and OR queries.
+
+Usage:
+    python benchmark_search.py [--sizes 1000 10000 100000] [--repeat 5]
+"""
+
+import argparse
+import marshal
+import random
+import sys
+import time
+from pathlib import Path
+
+# Allow importing the CLI package when run from a source checkout
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_index import best_of, generate_module
+
+QUERIES = [
+    "sanitizer",
+    "cov",
+    "static analysis",
+    "qt OR gtk OR sdl",
+    "android toolchain",
+    "precompiled_header_42",
+]
+
+
+def main():
+    from cli.index_cache import gc_paused
+    from cli.module import Module
+    from cli.search_index import SearchIndex
+
+    parser = argparse.ArgumentParser(description="Benchmark the CMakeHub search index")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Catalog sizes"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Search index benchmark (best of {})".format(args.repeat))
+    print("=" * 80)
+
+    for count in args.sizes:
+        rng = random.Random(0)
+        modules = [Module.from_dict(generate_module(index, rng)) for index in range(count)]
+
+        start = time.perf_counter()
+        index = SearchIndex(modules)
+        build = time.perf_counter() - start
+
+        snapshot = marshal.dumps(index.to_snapshot())
+
+        def load_snapshot():
+            with gc_paused():
+                SearchIndex.from_snapshot(marshal.loads(snapshot))
+
+        load = best_of(args.repeat, load_snapshot)
+
+        print()
+        print(f"{count:,} modules: {len(index.terms):,} terms, {len(index.doc_ids):,} postings")
+        print(f"  Build:          {build * 1000:>9.2f} ms")
+        print(f"  Snapshot load:  {load * 1000:>9.2f} ms ({len(snapshot) / 1024:,.0f} KB)")
+
+        for query in QUERIES:
+            hits = len(index.search(query))
+            latency = best_of(args.repeat, lambda: index.search(query, limit=20))
+            print(f"  {query!r:<28} {latency * 1000:>9.3f} ms  ({hits:,} hits)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
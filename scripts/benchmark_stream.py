@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of reading modules.json: json.load vs. streaming iter_modules
+
+Generates a synthetic index of the requested size and, in a fresh process per
+method, walks every module once while recording peak RSS.
+
+Usage:
+    python benchmark_stream.py [--size-mb 1024] [--methods load stream]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Allow importing the CLI package when run from a source checkout
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_index import generate_index  # noqa: E402
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Run in a child process so each method starts from the same baseline
+CHILD_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, sys.argv[3])
+from cli.package_data import iter_modules
+
+start = time.perf_counter()
+if sys.argv[1] == "load":
+    with open(sys.argv[2], "r", encoding="utf-8") as f:
+        count = sum(1 for module in json.load(f)["modules"])
+else:
+    count = sum(1 for module in iter_modules(sys.argv[2]))
+elapsed = time.perf_counter() - start
+
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    peak //= 1024
+print(count, elapsed, peak)
+"""
+
+# Approximate size of one generated module entry
+BYTES_PER_MODULE = 530
+
+
+def measure(method, index_path):
+    """(module count, seconds, peak RSS in KiB) for one method"""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, method, index_path, str(ROOT_DIR)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    count, elapsed, peak = result.stdout.split()
+    return int(count), float(elapsed), int(peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming modules.json reads")
+    parser.add_argument("--size-mb", type=int, default=1024, help="Index size in MB (default: 1024)")
+    parser.add_argument(
+        "--methods", nargs="+", default=["load", "stream"], choices=["load", "stream"],
+        help="Reading methods to compare",
+    )
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        print("Error: peak RSS measurement requires the resource module (Unix)", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix="cmakehub-stream-bench-") as work_dir:
+        index_path = os.path.join(work_dir, "modules.json")
+        count = args.size_mb * 1024 * 1024 // BYTES_PER_MODULE
+        print(f"Generating {count} modules...")
+        start = time.perf_counter()
+        generate_index(index_path, count)
+        size_mb = os.path.getsize(index_path) / (1024 * 1024)
+        print(f"  {size_mb:.0f} MB in {time.perf_counter() - start:.1f}s")
+
+        print("=" * 80)
+        print(f"{'Method':<10} {'Modules':>10} {'Time':>10} {'Peak RSS':>12}")
+        print("-" * 80)
+        for method in args.methods:
+            modules, elapsed, peak = measure(method, index_path)
+            print(f"{method:<10} {modules:>10} {elapsed:>9.1f}s {peak / 1024:>9.1f} MB")
+        print("=" * 80)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark the transfer scheduler against a local stand-in HTTP server
+
+Starts a keep-alive HTTP server on localhost that adds latency to every
+response and answers a share of first attempts with 429 Too Many Requests,
+then downloads the same files serially with urllib and concurrently with
+cli.transfer.Transfer.
+
+Usage:
+    python benchmark_transfer.py [--files 200] [--size-kb 16] [--latency-ms 20]
+                                 [--jobs 16] [--per-host 8] [--throttle 0.1]
+                                 [--bandwidth 0]
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+
+# Allow importing the CLI package when run from a source checkout
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli.transfer import Transfer, parse_rate  # noqa: E402
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, size, latency, throttle):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.payload = b"x" * size
+        self.latency = latency
+        self.throttle = throttle
+        self.attempts = {}
+        self.lock = threading.Lock()
+        self.max_active = 0
+        self.active = 0
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; do not hold the body back for an ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def respond(self, head):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            attempt = server.attempts.get(self.path, 0)
+            server.attempts[self.path] = attempt + 1
+        try:
+            time.sleep(server.latency)
+            # Rate-limit a deterministic share of first attempts
+            number = int(self.path.rsplit("/", 1)[-1] or 0)
+            if attempt == 0 and server.throttle and number % round(1 / server.throttle) == 0:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(server.payload)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(server.payload)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+def fetch_serial(urls):
+    """Download each URL in turn with urllib, retrying 429s once; returns bytes received"""
+    received = 0
+    for url in urls:
+        for _ in range(2):
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    received += len(response.read())
+                break
+            except urllib.error.HTTPError as e:
+                if e.code != 429:
+                    raise
+    return received
+
+
+def fetch_concurrent(urls, jobs, per_host, bandwidth):
+    """Download all URLs through one Transfer; returns (bytes received, metrics)"""
+    transfer = Transfer(jobs=jobs, per_host=per_host, bandwidth=bandwidth)
+
+    async def fetch_all():
+        responses = await asyncio.gather(*(transfer.request("GET", url) for url in urls))
+        return sum(len(response.raise_for_status().body) for response in responses)
+
+    return transfer.run(fetch_all()), transfer.metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cli.transfer against a local server")
+    parser.add_argument("--files", type=int, default=200, help="Files to download")
+    parser.add_argument("--size-kb", type=int, default=16, help="Size of each file")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Server latency per request")
+    parser.add_argument("--jobs", type=int, default=16, help="Total concurrent requests")
+    parser.add_argument("--per-host", type=int, default=8, help="Concurrent requests per host")
+    parser.add_argument("--throttle", type=float, default=0.1, help="Share of first attempts answered 429")
+    parser.add_argument("--bandwidth", default="0", help="Bandwidth limit, e.g. 2M (0: none)")
+    args = parser.parse_args()
+
+    server = StandInServer(args.size_kb * 1024, args.latency_ms / 1000, args.throttle)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/file"
+    urls = [f"{base}/{i + 1}" for i in range(args.files)]
+
+    try:
+        print("=" * 80)
+        print(
+            f"{args.files} files of {args.size_kb} KiB, {args.latency_ms:.0f} ms latency, "
+            f"{args.throttle:.0%} of first attempts throttled"
+        )
+        print("=" * 80)
+
+        start = time.perf_counter()
+        received = fetch_serial(urls)
+        serial = time.perf_counter() - start
+        print(f"{'urllib, serial':<28} {serial:>7.2f} s  {received / serial / 1024:>9.0f} KiB/s")
+
+        server.attempts.clear()
+        server.max_active = 0
+        start = time.perf_counter()
+        received, metrics = fetch_concurrent(
+            urls, args.jobs, args.per_host, parse_rate(args.bandwidth)
+        )
+        concurrent = time.perf_counter() - start
+        label = f"transfer, {args.jobs} jobs/{args.per_host} per host"
+        print(f"{label:<28} {concurrent:>7.2f} s  {received / concurrent / 1024:>9.0f} KiB/s")
+        print(f"  {metrics.summary()}")
+        print(f"  At most {server.max_active} request(s) in flight at the server")
+        print(f"Speedup: {serial / concurrent:.1f}x")
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Build modules.delta.json for incremental `cmakehub update-index --delta`
+
+The delta document lets clients holding an earlier modules.json download only
+the modules that changed since. Pass the earlier revisions to support, e.g.
+the index as of the last few releases:
+
+    git show v0.1.0:modules.json > /tmp/v0.1.0.json
+    python scripts/build_index_delta.py /tmp/v0.1.0.json [...] -o modules.delta.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli.index_delta import make_delta_document, serialize_index  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build modules.delta.json")
+    parser.add_argument("bases", nargs="+", help="Earlier modules.json files to build deltas from")
+    parser.add_argument(
+        "--index", "-i", default="modules.json", help="Current index (default: modules.json)"
+    )
+    parser.add_argument(
+        "--output", "-o", default="modules.delta.json", help="Output (default: modules.delta.json)"
+    )
+    args = parser.parse_args()
+
+    try:
+        with open(args.index, "r", encoding="utf-8") as f:
+            current = json.load(f)
+        bases = []
+        for base_path in args.bases:
+            with open(base_path, "r", encoding="utf-8") as f:
+                bases.append(json.load(f))
+
+        document = make_delta_document(current, bases)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(serialize_index(document))
+
+        for base_path, delta in zip(args.bases, document["deltas"]):
+            print(
+                f"✓ {base_path}: {len(delta['updated'])} updated, "
+                f"{len(delta['removed'])} removed module(s)"
+            )
+        print(f"✓ Wrote {args.output}")
+        return 0
+
+    except Exception as e:
+        print(f"Error building delta: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Check CLI startup cost with `python -X importtime`
+
+Runs quick commands in fresh interpreters and fails if their total import
+time exceeds the budget, or if they import modules that only other commands
+need (main.py imports a command's module only when that command runs).
+
+Usage:
+    python check_startup.py [--budget-ms 60] [--runs 5]
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Commands run by shell completion and hooks, which must start fast
+COMMANDS = [
+    ["--help"],
+    ["--version"],
+    ["list", "--compact"],
+]
+
+# Heavy modules none of the COMMANDS need
+FORBIDDEN_MODULES = [
+    "subprocess",
+    "concurrent.futures",
+    "urllib.request",
+    "http.client",
+    "ssl",
+    "pickle",
+    "socket",
+    "cli.commands.cache",
+    "cli.cache_ledger",
+    "cli.content_store",
+]
+
+
+def measure(command):
+    """Run the CLI once under -X importtime; return (total import time in us, imported modules)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "cli.main"] + command,
+        cwd=str(PROJECT_ROOT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        total += int(fields[0])
+        modules.add(fields[2].strip())
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI startup import time")
+    parser.add_argument(
+        "--budget-ms", type=float, default=60.0, help="Import time budget per command (default: 60)"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command; the best counts")
+    args = parser.parse_args()
+
+    failed = False
+    for command in COMMANDS:
+        timings = []
+        imported = set()
+        for _ in range(max(1, args.runs)):
+            total, modules = measure(command)
+            timings.append(total)
+            imported |= modules
+
+        best_ms = min(timings) / 1000
+        forbidden = sorted(m for m in FORBIDDEN_MODULES if m in imported)
+        ok = best_ms <= args.budget_ms and not forbidden
+        failed = failed or not ok
+
+        label = "cmakehub " + " ".join(command)
+        print(f"{'✓' if ok else '✗'} {label:<28} {best_ms:>7.1f} ms (budget {args.budget_ms:.0f} ms)")
+        if forbidden:
+            print(f"  imports {', '.join(forbidden)}")
+
+    if failed:
+        print("\n✗ CLI startup regressed; keep command dependencies out of main.py's imports")
+        return 1
+    print("\n✓ CLI startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
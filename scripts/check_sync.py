@@ -9,6 +9,10 @@ the data files in the CLI package directory.
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli.sharded_index import load_shard_manifest  # noqa: E402
+
 
 def check_sync(source_path, dest_path, name):
     """Check if two files are in sync"""
@@ -35,6 +39,24 @@ def check_sync(source_path, dest_path, name):
     return True
 
 
+def get_shard_checks(source_index, dest_index):
+    """Checks for the shard files of a sharded index, plus stale shards in the destination"""
+    manifest = load_shard_manifest(source_index)
+    if manifest is None:
+        return [], []
+
+    source_dir = source_index.parent / manifest["sharding"]["directory"]
+    dest_dir = dest_index.parent / manifest["sharding"]["directory"]
+    checks = [
+        (source_dir / f"{key}.json", dest_dir / f"{key}.json", f"modules.json shard {key}")
+        for key in sorted(manifest["shards"])
+    ]
+    stale = [
+        item for item in dest_dir.glob("*.json") if item.stem not in manifest["shards"]
+    ] if dest_dir.exists() else []
+    return checks, stale
+
+
 def main():
     """Main check function"""
     repo_root = Path(__file__).parent.parent
@@ -51,7 +73,16 @@ def main():
          "loader.cmake"),
     ]
 
+    shard_checks, stale_shards = get_shard_checks(
+        repo_root / "modules.json", repo_root / "cli" / "data" / "modules.json"
+    )
+    checks.extend(shard_checks)
+
     results = [check_sync(*check) for check in checks]
+    for item in stale_shards:
+        print(f"✗ Stale shard: {item}")
+        print(f"  → Run: python scripts/sync_data.py")
+        results.append(False)
 
     if not all(results):
         print()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Check the transfer scheduler's HTTP client against local servers
+
+Runs cli.transfer.Transfer against http.server instances on localhost and
+checks chunked bodies (and that truncated or malformed ones are rejected),
+keep-alive reuse, the retry of a pooled connection the server closed, the
+urllib fallback through a proxy, and that timeouts apply to each read rather
+than to the whole request.
+
+Usage:
+    python check_transfer.py
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+
+# Allow importing the CLI package when run from a source checkout
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli.transfer import Transfer, TransferError  # noqa: E402
+
+CHUNKS = [b"first chunk;", b"x" * 70000, b";last chunk"]
+SLOW_PARTS = 5
+
+
+class LocalServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.requests = []
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, close=False):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        # Drop the connection without announcing it, as an idle timeout would
+        self.close_connection = close
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in CHUNKS:
+                self.wfile.write(f"{len(chunk):x};ext=1\r\n".encode("ascii") + chunk + b"\r\n")
+            self.wfile.write(b"0\r\nX-Trailer: done\r\n\r\n")
+        elif self.path in ("/chunked-truncated", "/chunked-malformed"):
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chunk = CHUNKS[0]
+            self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+            if self.path == "/chunked-malformed":
+                self.wfile.write(b"zz\r\n")
+            # End the connection without the last chunk
+            self.close_connection = True
+        elif self.path == "/close-after":
+            self.send_body(b"closing", close=True)
+        elif self.path == "/slow":
+            # Steady progress: every part arrives well within the timeout
+            self.send_response(200)
+            self.send_header("Content-Length", str(SLOW_PARTS))
+            self.end_headers()
+            for _ in range(SLOW_PARTS):
+                time.sleep(0.3)
+                self.wfile.write(b"x")
+                self.wfile.flush()
+        elif self.path == "/stalled":
+            self.send_response(200)
+            self.send_header("Content-Length", "10")
+            self.end_headers()
+            self.wfile.write(b"x")
+            self.wfile.flush()
+            time.sleep(2)
+        else:
+            self.send_body(f"path={self.path}".encode("utf-8"))
+
+
+class ProxyHandler(LocalHandler):
+    """Answers absolute-URI requests itself, as a forward proxy would"""
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        self.send_body(f"proxied {self.path}".encode("utf-8"))
+
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fetch(urls, **options):
+    """GET each URL in turn through one Transfer; returns (bodies, metrics)"""
+    transfer = Transfer(**options)
+
+    async def fetch_all():
+        bodies = []
+        for url in urls:
+            response = await transfer.request("GET", url)
+            bodies.append(response.raise_for_status().body)
+        return bodies
+
+    return transfer.run(fetch_all()), transfer.metrics
+
+
+def check_chunked(server):
+    bodies, metrics = fetch([server.base + "/chunked", server.base + "/after-chunked"])
+    assert bodies[0] == b"".join(CHUNKS), f"chunked body of {len(bodies[0])} bytes"
+    assert bodies[1] == b"path=/after-chunked", bodies[1]
+    assert metrics.connections_reused == 1, "connection not reused after a chunked body"
+
+
+def check_chunked_errors(server):
+    for path in ("/chunked-truncated", "/chunked-malformed"):
+        try:
+            bodies, _ = fetch([server.base + path], retries=0)
+        except TransferError:
+            continue
+        raise AssertionError(f"{path} was accepted as a body of {len(bodies[0])} bytes")
+
+
+def check_keep_alive(server):
+    bodies, metrics = fetch([f"{server.base}/file/{i}" for i in range(5)])
+    assert bodies == [f"path=/file/{i}".encode("utf-8") for i in range(5)], bodies
+    assert metrics.connections_opened == 1, f"{metrics.connections_opened} connections opened"
+    assert metrics.connections_reused == 4, f"{metrics.connections_reused} connections reused"
+
+
+def check_stale_connection(server):
+    bodies, metrics = fetch([server.base + "/close-after", server.base + "/next"])
+    assert bodies == [b"closing", b"path=/next"], bodies
+    assert metrics.connections_opened == 2, f"{metrics.connections_opened} connections opened"
+    assert metrics.retries == 0, "a stale connection counted as a retry"
+
+
+def check_proxy():
+    proxy = start(LocalServer(ProxyHandler))
+    saved = {name: os.environ.pop(name, None) for name in ("no_proxy", "NO_PROXY", "http_proxy")}
+    os.environ["http_proxy"] = proxy.base
+    try:
+        # The host does not resolve, so only the proxy can answer
+        bodies, _ = fetch(["http://cmakehub.invalid/via-proxy"])
+    finally:
+        os.environ.pop("http_proxy")
+        os.environ.update({name: value for name, value in saved.items() if value is not None})
+        proxy.shutdown()
+    assert bodies == [b"proxied http://cmakehub.invalid/via-proxy"], bodies
+
+
+def check_read_timeout(server):
+    # The body takes longer than the timeout, but no single read does
+    bodies, _ = fetch([server.base + "/slow"], timeout=1, retries=0)
+    assert bodies == [b"x" * SLOW_PARTS], bodies
+
+    start_time = time.perf_counter()
+    try:
+        fetch([server.base + "/stalled"], timeout=0.5, retries=0)
+    except TransferError:
+        pass
+    else:
+        raise AssertionError("a stalled body did not time out")
+    elapsed = time.perf_counter() - start_time
+    assert elapsed < 1.5, f"timed out after {elapsed:.1f}s"
+
+
+CHECKS = [
+    ("chunked transfer encoding", check_chunked),
+    ("truncated and malformed chunked bodies rejected", check_chunked_errors),
+    ("keep-alive connection reuse", check_keep_alive),
+    ("stale pooled connection retried", check_stale_connection),
+    ("proxy fallback through urllib", lambda server: check_proxy()),
+    ("timeouts per read, not per request", check_read_timeout),
+]
+
+
+def main():
+    server = start(LocalServer(LocalHandler))
+    failed = False
+    try:
+        for label, check in CHECKS:
+            try:
+                check(server)
+                print(f"✓ {label}")
+            except (AssertionError, OSError, asyncio.TimeoutError) as e:
+                failed = True
+                print(f"✗ {label}: {e}")
+    finally:
+        server.shutdown()
+
+    if failed:
+        print("\n✗ Transfer checks failed")
+        return 1
+    print("\n✓ Transfer checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,18 +3,21 @@
 Generate documentation for all CMakeHub modules
 """
 
-import json
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli.sharded_index import load_index_data  # noqa: E402
+
 
 def generate_module_docs(modules_json_path, output_dir):
     """Generate markdown documentation for all modules"""
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Read modules.json
-    with open(modules_json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # Read modules.json (every shard of a sharded index)
+    data = load_index_data(modules_json_path)
 
     # Generate index
     index_content = """# CMakeHub Module Documentation
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Convert modules.json between the monolithic and the sharded layout
+
+A sharded index replaces modules.json with a small manifest and stores the
+modules in hash-bucketed files under modules.d/, so the CLI and loader.cmake
+only parse the shards they need (see cli/sharded_index.py).
+
+Usage:
+    python shard_index.py [--index modules.json] [--prefix-length 2]
+    python shard_index.py --merge [--index modules.json]
+"""
+
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli import sharded_index  # noqa: E402
+from cli.fs_utils import write_atomic  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shard or merge a modules.json index")
+    parser.add_argument(
+        "--index", "-i", default="modules.json", help="Index to convert in place (default: modules.json)"
+    )
+    parser.add_argument(
+        "--prefix-length",
+        "-p",
+        type=int,
+        help="Hex digits of the name hash per shard key (default: sized for ~64 modules per shard)",
+    )
+    parser.add_argument("--merge", action="store_true", help="Merge a sharded index back into one file")
+    args = parser.parse_args()
+
+    try:
+        manifest = sharded_index.load_shard_manifest(args.index)
+
+        if args.merge:
+            if manifest is None:
+                print(f"{args.index} is not sharded")
+                return 0
+            data = sharded_index.load_index_data(args.index)
+            data["modules"].sort(key=lambda x: x["name"])
+            write_atomic(args.index, sharded_index.serialize(data))
+            shutil.rmtree(sharded_index.get_shard_dir(args.index, manifest))
+            print(f"✓ Merged {len(data['modules'])} modules into {args.index}")
+            return 0
+
+        data = sharded_index.load_index_data(args.index)
+        manifest = sharded_index.shard_index(data, args.index, args.prefix_length)
+        print(
+            f"✓ Sharded {len(data['modules'])} modules into {len(manifest['shards'])} shards "
+            f"under {sharded_index.get_shard_dir(args.index, manifest)}"
+        )
+        return 0
+
+    except Exception as e:
+        print(f"Error converting index: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
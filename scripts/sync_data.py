@@ -3,7 +3,7 @@
 Synchronize data files from repository root to CLI package data directory
 
 This script ensures that:
-- modules.json is synced to cli/data/modules.json
+- modules.json is synced to cli/data/modules.json (with its shards, if sharded)
 - THIRD_PARTY_LICENSES.md is synced to cli/data/THIRD_PARTY_LICENSES.md
 - loader.cmake is synced to cli/data/cmake/hub/loader.cmake
 """
@@ -13,6 +13,10 @@ import sys
 import shutil
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli.sharded_index import load_shard_manifest  # noqa: E402
+
 
 def sync_file(source_path, dest_path, description):
     """Sync a single file from source to destination"""
@@ -69,6 +73,24 @@ def sync_directory(source_dir, dest_dir, description):
     return True
 
 
+def sync_index_shards(source_index, dest_index):
+    """Sync the shard files of a sharded index, removing shards that no longer exist"""
+    manifest = load_shard_manifest(source_index)
+    if manifest is None:
+        return True
+
+    source_dir = source_index.parent / manifest["sharding"]["directory"]
+    dest_dir = dest_index.parent / manifest["sharding"]["directory"]
+    if not sync_directory(source_dir, dest_dir, "modules.json shards"):
+        return False
+
+    for item in dest_dir.glob("*.json"):
+        if not (source_dir / item.name).exists():
+            item.unlink()
+            print(f"✓ Removed stale shard: {item.name}")
+    return True
+
+
 def main():
     """Main sync function"""
     # Get repository root
@@ -89,6 +111,10 @@ def main():
         repo_root / "cli" / "data" / "modules.json",
         "modules.json"
     ))
+    results.append(sync_index_shards(
+        repo_root / "modules.json",
+        repo_root / "cli" / "data" / "modules.json"
+    ))
 
     # 2. THIRD_PARTY_LICENSES.md
     results.append(sync_file(
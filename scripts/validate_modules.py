@@ -2,28 +2,50 @@
 """
 Enhanced module validation script
 Checks all modules for validity, accessibility, and completeness
+
+Module files are probed concurrently with HEAD requests. Files found
+accessible are remembered in a cache file for --ttl-hours, so repeated runs
+(e.g. in CI) only probe new, changed and previously failing modules.
+
+Usage:
+    python validate_modules.py [modules.json] [--jobs 16] [--deadline 300]
+                               [--ttl-hours 24] [--cache FILE] [--no-cache]
+                               [--json FILE]
 """
 
+import argparse
+import asyncio
 import json
-import requests
+import os
 import sys
+import time
 from pathlib import Path
-from urllib.parse import urljoin
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli.module import Module  # noqa: E402
+from cli.package_data import iter_modules  # noqa: E402
+from cli.fs_utils import write_atomic  # noqa: E402
+from cli.transfer import Transfer, TransferError  # noqa: E402
+
+# Concurrent HEAD requests for the accessibility check
+ACCESSIBILITY_JOBS = 16
+DEFAULT_DEADLINE = 300
+DEFAULT_TTL_HOURS = 24
+CACHE_FILE = ".accessibility.json"
 
 
 def validate_module(module):
     """Validate a single module"""
     results = {"name": module["name"], "valid": True, "issues": [], "warnings": []}
 
-    # Check required fields
-    required_fields = ["name", "description", "category", "repository", "path", "license"]
-    for field in required_fields:
-        if field not in module or not module[field]:
-            results["valid"] = False
-            results["issues"].append(f"Missing required field: {field}")
+    # Check required fields and field types against the Module schema
+    for issue in Module.check(module):
+        results["valid"] = False
+        results["issues"].append(issue)
 
     # Check repository URL format
-    repo = module.get("repository", "")
+    repo = str(module.get("repository", ""))
     if not repo.startswith("https://github.com/"):
         results["valid"] = False
         results["issues"].append(f"Invalid repository URL: {repo}")
@@ -32,15 +54,10 @@ def validate_module(module):
         results["issues"].append(f"Repository URL must end with .git: {repo}")
 
     # Check path format
-    path = module.get("path", "")
+    path = str(module.get("path", ""))
     if not path.endswith(".cmake"):
         results["warnings"].append(f"Module path should end with .cmake: {path}")
 
-    # Check stars is a number
-    stars = module.get("stars")
-    if stars is not None and not isinstance(stars, int):
-        results["warnings"].append(f"Stars should be an integer: {stars}")
-
     # Check version
     version = module.get("version", "")
     if not version:
@@ -49,47 +66,156 @@ def validate_module(module):
     return results
 
 
-def check_module_accessibility(module, timeout=10):
-    """Check if module file is accessible"""
-    results = {"name": module["name"], "accessible": False, "status_code": None, "error": None}
+def has_file(module):
+    """Whether a module names the repository and path of its file"""
+    return bool(module.get("repository") and module.get("path"))
 
+
+def get_raw_url(module):
+    """URL of a module file on raw.githubusercontent.com"""
     repo = module["repository"].replace(".git", "")
-    path = module["path"]
-    raw_url = f"https://raw.githubusercontent.com/{repo.split('/')[-2]}/{repo.split('/')[-1]}/{module.get('version', 'master')}/{path}"
+    owner, name = repo.split("/")[-2:]
+    return f"https://raw.githubusercontent.com/{owner}/{name}/{module.get('version', 'master')}/{module['path']}"
+
 
+def get_default_cache_path():
+    """Accessibility cache in the CMakeHub cache directory"""
+    from cli.cache_dirs import get_cache_dir
+
+    return os.path.join(get_cache_dir(), CACHE_FILE)
+
+
+def load_accessibility_cache(cache_path, ttl):
+    """{url: checked timestamp} of files found accessible less than ttl seconds ago"""
     try:
-        response = requests.head(raw_url, timeout=timeout)
-        results["status_code"] = response.status_code
-        results["accessible"] = response.status_code == 200
-
-        if response.status_code != 200:
-            results["error"] = f"HTTP {response.status_code}"
-    except requests.exceptions.Timeout:
-        results["error"] = "Timeout"
-    except requests.exceptions.RequestException as e:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {
+        url: checked
+        for url, checked in entries.items()
+        if isinstance(checked, (int, float)) and 0 <= now - checked < ttl
+    }
+
+
+def save_accessibility_cache(cache_path, cache, results):
+    """Record the files found accessible in this run (failures are always probed again)"""
+    now = time.time()
+    for result in results:
+        if result["accessible"] and not result["cached"]:
+            cache[result["url"]] = now
+    try:
+        write_atomic(cache_path, json.dumps(cache, indent=2, sort_keys=True) + "\n")
+    except OSError as e:
+        print(f"⚠ Could not save the accessibility cache: {e}")
+
+
+def accessibility_result(module, accessible=False, status_code=None, error=None, cached=False):
+    """Accessibility of one module file"""
+    return {
+        "name": module["name"],
+        "url": get_raw_url(module) if has_file(module) else None,
+        "accessible": accessible,
+        "status_code": status_code,
+        "error": error,
+        "cached": cached,
+    }
+
+
+async def check_module_accessibility(transfer, module):
+    """Check if module file is accessible"""
+    results = accessibility_result(module)
+
+    try:
+        response = await transfer.request("HEAD", results["url"])
+        results["status_code"] = response.status
+        results["accessible"] = response.status == 200
+
+        if response.status != 200:
+            results["error"] = f"HTTP {response.status}"
+    except TransferError as e:
         results["error"] = str(e)
 
     return results
 
 
-def validate_all_modules(modules_json_path):
+def check_all_accessibility(modules, jobs=ACCESSIBILITY_JOBS, deadline=None, cache=None):
+    """
+    Check every module concurrently, skipping URLs in cache. Modules without
+    a repository or path, and checks still running after `deadline` seconds,
+    are reported as failed.
+    Returns (results in module order, transfer metrics).
+    """
+    cache = cache or {}
+    transfer = Transfer.from_environment(jobs=jobs, timeout=10)
+
+    async def check_all():
+        # One check per module with a file that is not in the cache, in module order
+        checks = [
+            asyncio.ensure_future(check_module_accessibility(transfer, module))
+            if has_file(module) and get_raw_url(module) not in cache
+            else None
+            for module in modules
+        ]
+        started = [check for check in checks if check is not None]
+        if started:
+            _, pending = await asyncio.wait(started, timeout=deadline)
+            for check in pending:
+                check.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for module, check in zip(modules, checks):
+            if not has_file(module):
+                results.append(accessibility_result(module, error="missing repository/path"))
+            elif check is None:
+                results.append(accessibility_result(module, True, 200, cached=True))
+            elif check.cancelled():
+                results.append(accessibility_result(module, error="Deadline exceeded"))
+            else:
+                results.append(check.result())
+        return results
+
+    return transfer.run(check_all()), transfer.metrics
+
+
+def validate_all_modules(
+    modules_json_path,
+    jobs=ACCESSIBILITY_JOBS,
+    deadline=DEFAULT_DEADLINE,
+    cache_path=None,
+    ttl_hours=DEFAULT_TTL_HOURS,
+    json_path=None,
+):
     """Validate all modules in modules.json"""
     print(f"Reading modules from: {modules_json_path}")
 
-    with open(modules_json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    modules = data["modules"]
-    print(f"Found {len(modules)} modules")
+    # The structure check streams the modules; the accessibility check below
+    # needs them all at once to run concurrently
+    fields = {}
+    module_count = 0
+    valid_count = 0
+    seen_names = set()
+    duplicates = set()
+    categories = set()
+    structure = {}
 
     # Validate module structure
     print("\n=== Module Structure Validation ===")
-    validation_results = []
-    for module in modules:
-        result = validate_module(module)
-        validation_results.append(result)
+    for module in iter_modules(modules_json_path, fields):
+        module_count += 1
+        if module["name"] in seen_names:
+            duplicates.add(module["name"])
+        seen_names.add(module["name"])
+        categories.add(module["category"])
 
+        result = validate_module(module)
+        if json_path:
+            structure[module["name"]] = result
         if result["valid"]:
+            valid_count += 1
             print(f"✓ {result['name']}")
         else:
             print(f"✗ {result['name']}")
@@ -102,41 +228,40 @@ def validate_all_modules(modules_json_path):
 
     # Check accessibility
     print("\n=== Module Accessibility Check ===")
-    print("Checking module file accessibility (this may take a while)...")
-    accessibility_results = []
-
-    for module in modules:
-        result = check_module_accessibility(module)
-        accessibility_results.append(result)
+    print(f"Checking module file accessibility with {jobs} job(s)...")
+    accessible_count = 0
 
+    cache = load_accessibility_cache(cache_path, ttl_hours * 3600) if cache_path else {}
+    modules = list(iter_modules(modules_json_path))
+    results, metrics = check_all_accessibility(modules, jobs, deadline, cache)
+    for result in results:
         if result["accessible"]:
-            print(f"✓ {result['name']}")
+            accessible_count += 1
+            print(f"✓ {result['name']}" + (" (cached)" if result["cached"] else ""))
         else:
             status_info = result["error"] if result["error"] else f"HTTP {result['status_code']}"
             print(f"✗ {result['name']} - {status_info}")
+    cached_count = sum(1 for r in results if r["cached"])
+    print(f"({metrics.summary()}; {cached_count} from cache)")
+    if cache_path:
+        save_accessibility_cache(cache_path, cache, results)
 
     # Summary
-    valid_count = sum(1 for r in validation_results if r["valid"])
-    accessible_count = sum(1 for r in accessibility_results if r["accessible"])
-
     print("\n=== Summary ===")
-    print(f"Total modules: {len(modules)}")
-    print(f"Valid structure: {valid_count}/{len(modules)}")
-    print(f"Accessible: {accessible_count}/{len(modules)}")
+    print(f"Total modules: {module_count}")
+    print(f"Valid structure: {valid_count}/{module_count}")
+    print(f"Accessible: {accessible_count}/{module_count}")
 
     # Check for duplicate modules
     print("\n=== Duplicate Check ===")
-    module_names = [m["name"] for m in modules]
-    duplicates = [name for name in set(module_names) if module_names.count(name) > 1]
     if duplicates:
-        print(f"✗ Found duplicate modules: {', '.join(duplicates)}")
+        print(f"✗ Found duplicate modules: {', '.join(sorted(duplicates))}")
     else:
         print("✓ No duplicate modules found")
 
     # Check for missing categories
     print("\n=== Category Check ===")
-    categories = set(m["category"] for m in modules)
-    defined_categories = set(data.get("categories", {}).keys())
+    defined_categories = set(fields.get("categories", {}).keys())
     missing_categories = categories - defined_categories
     if missing_categories:
         print(f"⚠ Modules use undefined categories: {', '.join(missing_categories)}")
@@ -145,25 +270,81 @@ def validate_all_modules(modules_json_path):
 
     # Overall result
     print("\n=== Overall Result ===")
-    all_valid = valid_count == len(modules) and accessible_count == len(modules)
+    all_valid = valid_count == module_count and accessible_count == module_count
+
+    if json_path:
+        write_report(json_path, structure, results, duplicates, missing_categories, all_valid)
 
     if all_valid:
         print("✓ All modules are valid and accessible")
         return 0
     else:
-        print(f"✗ Validation failed: {len(modules)} total, {valid_count} valid structure, {accessible_count} accessible")
-        if accessible_count < len(modules):
-            print(f"  ⚠️  {len(modules) - accessible_count} modules have inaccessible files")
+        print(f"✗ Validation failed: {module_count} total, {valid_count} valid structure, {accessible_count} accessible")
+        if accessible_count < module_count:
+            print(f"  ⚠️  {module_count - accessible_count} modules have inaccessible files")
         return 1
 
 
-if __name__ == "__main__":
+def write_report(json_path, structure, accessibility, duplicates, missing_categories, ok):
+    """Write the results of a run as JSON"""
+    modules = {name: dict(result) for name, result in structure.items()}
+    for result in accessibility:
+        entry = modules.setdefault(result["name"], {"name": result["name"]})
+        entry["accessibility"] = {key: value for key, value in result.items() if key != "name"}
+
+    report = {
+        "ok": ok,
+        "modules": list(modules.values()),
+        "duplicates": sorted(duplicates),
+        "undefined_categories": sorted(missing_categories),
+    }
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"Wrote JSON report to {json_path}")
+
+
+def main():
     project_root = Path(__file__).parent.parent
-    modules_json = project_root / "modules.json"
 
-    if not modules_json.exists():
-        print(f"Error: modules.json not found at {modules_json}")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Validate the modules in modules.json")
+    parser.add_argument(
+        "modules_json", nargs="?", default=str(project_root / "modules.json"), help="Index to check"
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=ACCESSIBILITY_JOBS, help="Concurrent accessibility checks"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=DEFAULT_DEADLINE,
+        help=f"Seconds the accessibility check may take in total (default: {DEFAULT_DEADLINE})",
+    )
+    parser.add_argument(
+        "--ttl-hours",
+        type=float,
+        default=DEFAULT_TTL_HOURS,
+        help=f"How long an accessible file is not probed again (default: {DEFAULT_TTL_HOURS})",
+    )
+    parser.add_argument("--cache", help=f"Accessibility cache file (default: {CACHE_FILE} in the cache directory)")
+    parser.add_argument("--no-cache", action="store_true", help="Probe every module file")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.modules_json):
+        print(f"Error: modules.json not found at {args.modules_json}")
+        return 1
+
+    cache_path = None if args.no_cache else (args.cache or get_default_cache_path())
+    return validate_all_modules(
+        args.modules_json,
+        jobs=max(1, args.jobs),
+        deadline=args.deadline if args.deadline > 0 else None,
+        cache_path=cache_path,
+        ttl_hours=args.ttl_hours,
+        json_path=args.json,
+    )
 
-    result = validate_all_modules(modules_json)
-    sys.exit(result)
+
+if __name__ == "__main__":
+    sys.exit(main())
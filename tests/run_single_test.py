@@ -43,6 +43,9 @@ def main():
         print("  - test_version_check")
         print("  - test_dependencies")
         print("  - test_conflicts")
+        print("  - test_sharded_index")
+        print("  - test_concurrency")
+        print("  - test_use_many")
         sys.exit(1)
     
     test_name = sys.argv[1]
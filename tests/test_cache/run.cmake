@@ -79,6 +79,117 @@ else()
     message(FATAL_ERROR "✗ Timestamp format is incorrect: ${current_timestamp} (length: ${timestamp_length})")
 endif()
 
+# Test 5: Content-addressed store
+message(STATUS "")
+message(STATUS "Test 5: Content-addressed store...")
+cmakehub_get_checkout_relpath("https://github.com/sakra/cotire.git" "master" checkout_relpath)
+set(checkout_file "${CMH_CACHE_DIR}/${checkout_relpath}/CMake/cotire.cmake")
+file(WRITE ${checkout_file} "# cotire\n")
+file(SHA256 ${checkout_file} expected_digest)
+
+cmakehub_materialize_module(cotire "https://github.com/sakra/cotire.git" "master" "CMake/cotire.cmake" "${checkout_relpath}" module_file)
+cmakehub_get_blob_path(${expected_digest} blob)
+if(EXISTS ${blob} AND module_file STREQUAL "${expected_cache_path}/CMake/cotire.cmake" AND EXISTS ${module_file})
+    message(STATUS "✓ Module file stored as ${expected_digest}")
+else()
+    message(FATAL_ERROR "✗ Module file was not added to the store")
+endif()
+
+cmakehub_verify_module_file(${meta_file} ${module_file} intact digest)
+if(intact AND digest STREQUAL expected_digest)
+    message(STATUS "✓ Stored digest verifies the cached file")
+else()
+    message(FATAL_ERROR "✗ Cached file failed verification")
+endif()
+
+# Rewrite the file with a different size, as an in-place edit would
+file(APPEND ${module_file} "# modified\n")
+cmakehub_verify_module_file(${meta_file} ${module_file} intact digest)
+if(NOT intact)
+    message(STATUS "✓ Modified file detected")
+else()
+    message(FATAL_ERROR "✗ Modified file was not detected")
+endif()
+
+# Test 6: Cache ledger
+message(STATUS "")
+message(STATUS "Test 6: Cache ledger...")
+set(ledger "${CMH_CACHE_DIR}/.ledger.jsonl")
+file(WRITE ${ledger} "")
+cmakehub_materialize_module(cotire "https://github.com/sakra/cotire.git" "master" "CMake/cotire.cmake" "${checkout_relpath}" module_file)
+cmakehub_ledger_append("\"op\": \"hit\", \"module\": \"cotire\", \"version\": \"master\"")
+file(STRINGS ${ledger} ledger_lines)
+list(LENGTH ledger_lines ledger_line_count)
+list(GET ledger_lines 0 add_event)
+string(JSON event_op GET "${add_event}" op)
+string(JSON event_checkout GET "${add_event}" checkout)
+if(ledger_line_count EQUAL 2 AND event_op STREQUAL "add" AND event_checkout STREQUAL checkout_relpath)
+    message(STATUS "✓ Download and hit recorded in the ledger")
+else()
+    message(FATAL_ERROR "✗ Unexpected ledger contents: ${ledger_lines}")
+endif()
+
+# Test 7: Read-only cache layer
+message(STATUS "")
+message(STATUS "Test 7: Read-only cache layer...")
+set(cache_dir ${CMH_CACHE_DIR})
+set(layer_dir "${CMAKE_CURRENT_BINARY_DIR}/cmakehub_test_layer")
+set(CMH_CACHE_DIR ${layer_dir})
+file(WRITE "${layer_dir}/${checkout_relpath}/CMake/cotire.cmake" "# cotire from a layer\n")
+cmakehub_materialize_module(cotire "https://github.com/sakra/cotire.git" "master" "CMake/cotire.cmake" "${checkout_relpath}" layer_file)
+set(CMH_CACHE_DIR ${cache_dir})
+set(CMAKEHUB_CACHE_LAYERS "${CMAKE_CURRENT_BINARY_DIR}/missing_layer;${layer_dir}")
+
+# The cache's own entry is gone, so the module is served by the layer without a download
+file(REMOVE_RECURSE ${expected_cache_path})
+file(WRITE ${ledger} "")
+cmakehub_fetch_module(cotire "https://github.com/sakra/cotire.git" "master" "CMake/cotire.cmake" module_file)
+file(STRINGS ${ledger} ledger_lines)
+if(module_file STREQUAL layer_file AND NOT EXISTS ${expected_cache_path} AND ledger_lines MATCHES "\"layer\": \"${layer_dir}\"")
+    message(STATUS "✓ Module served by the layer and the hit recorded")
+else()
+    message(FATAL_ERROR "✗ Module not served by the layer: ${module_file} (${ledger_lines})")
+endif()
+
+# Test 8: Clearing one module keeps a checkout another module uses
+message(STATUS "")
+message(STATUS "Test 8: Clearing a module with a shared checkout...")
+unset(CMAKEHUB_CACHE_LAYERS)
+set(checkout_dir "${CMH_CACHE_DIR}/${checkout_relpath}")
+cmakehub_materialize_module(moda "https://github.com/sakra/cotire.git" "master" "CMake/cotire.cmake" "${checkout_relpath}" moda_file)
+cmakehub_materialize_module(modb "https://github.com/sakra/cotire.git" "master" "CMake/cotire.cmake" "${checkout_relpath}" modb_file)
+file(REMOVE_RECURSE "${CMH_CACHE_DIR}/cotire")
+cmakehub_cache_clear(moda)
+if(NOT EXISTS "${CMH_CACHE_DIR}/moda" AND EXISTS "${checkout_dir}/CMake/cotire.cmake" AND EXISTS ${modb_file})
+    message(STATUS "✓ Shared checkout kept for modb")
+else()
+    message(FATAL_ERROR "✗ Clearing moda removed the checkout modb uses")
+endif()
+cmakehub_cache_clear(modb)
+if(NOT EXISTS "${CMH_CACHE_DIR}/modb" AND NOT EXISTS ${checkout_dir})
+    message(STATUS "✓ Checkout removed with its last module")
+else()
+    message(FATAL_ERROR "✗ Checkout left behind after its last module was cleared")
+endif()
+
+# Test 9: Clearing the whole cache keeps the checkout locks other configures wait on
+message(STATUS "")
+message(STATUS "Test 9: Clearing the whole cache...")
+file(WRITE "${checkout_dir}/CMake/cotire.cmake" "# cotire\n")
+cmakehub_materialize_module(moda "https://github.com/sakra/cotire.git" "master" "CMake/cotire.cmake" "${checkout_relpath}" moda_file)
+cmakehub_get_checkout_lock("${checkout_relpath}" lock_file)
+file(TOUCH ${lock_file})
+cmakehub_cache_clear("")
+file(GLOB_RECURSE remaining LIST_DIRECTORIES false "${CMH_CACHE_DIR}/*")
+list(FILTER remaining EXCLUDE REGEX "/\\.[^/]*\\.lock$")
+if(EXISTS ${lock_file} AND NOT remaining)
+    message(STATUS "✓ Cache cleared and checkout lock kept")
+else()
+    message(FATAL_ERROR "✗ Unexpected cache contents after clearing: ${remaining}")
+endif()
+
+file(REMOVE_RECURSE ${CMH_CACHE_DIR} ${layer_dir})
+
 message(STATUS "")
 message(STATUS "=== Test Passed ===")
 message(STATUS "Note: Actual caching behavior is tested in project mode")
@@ -0,0 +1,156 @@
+# Test 7: Concurrent downloads into one cache
+# Spawn parallel cmake -P processes using the same modules against an empty
+# cache, and verify that every one succeeds and each module is downloaded once
+
+cmake_minimum_required(VERSION 3.19)
+
+# Disable verbose output
+set(CMAKEHUB_VERBOSE OFF CACHE BOOL "")
+
+# Get test directory
+get_filename_component(TEST_DIR "${CMAKE_CURRENT_LIST_DIR}" ABSOLUTE)
+get_filename_component(PROJECT_ROOT "${TEST_DIR}/../.." ABSOLUTE)
+
+if(NOT DEFINED WORK_DIR)
+    set(WORK_DIR "${CMAKE_CURRENT_BINARY_DIR}/cmakehub_concurrency_test")
+endif()
+set(CMH_CACHE_DIR "${WORK_DIR}/cache")
+set(CMAKEHUB_MODULES_INDEX "${WORK_DIR}/modules.json")
+set(CMAKEHUB_LOCK_FILE "")
+
+# Three modules share one repository ref, one has a repository of its own
+set(STRESS_MODULES alpha beta gamma delta)
+set(STRESS_PROCESSES 32)
+
+# Child process: use every module, starting at a different one in each process
+if(DEFINED STRESS_CHILD)
+    include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+    math(EXPR first "${STRESS_CHILD} % 4")
+    list(SUBLIST STRESS_MODULES ${first} -1 order)
+    list(SUBLIST STRESS_MODULES 0 ${first} rest)
+    foreach(module ${order} ${rest})
+        cmakehub_use(${module})
+        get_property(loaded GLOBAL PROPERTY CMH_STRESS_${module})
+        if(NOT loaded STREQUAL "${module}")
+            message(FATAL_ERROR "Module '${module}' was not loaded in process ${STRESS_CHILD}")
+        endif()
+    endforeach()
+    return()
+endif()
+
+message(STATUS "=== Test: Concurrent Downloads ===")
+message(STATUS "")
+
+find_package(Git QUIET)
+if(NOT GIT_FOUND)
+    message(STATUS "⚠ Git not found, skipping")
+    return()
+endif()
+
+# Local repositories, so the test needs no network
+file(REMOVE_RECURSE "${WORK_DIR}")
+function(make_repository name)
+    set(repo_dir "${WORK_DIR}/repos/${name}")
+    file(MAKE_DIRECTORY "${repo_dir}")
+    foreach(module ${ARGN})
+        file(WRITE "${repo_dir}/cmake/${module}.cmake" "set_property(GLOBAL PROPERTY CMH_STRESS_${module} ${module})\n")
+    endforeach()
+    foreach(step "init;-q" "symbolic-ref;HEAD;refs/heads/master" "add;." "-c;user.name=test;-c;user.email=test@example.com;commit;-q;-m;modules")
+        execute_process(COMMAND ${GIT_EXECUTABLE} ${step} WORKING_DIRECTORY "${repo_dir}" RESULT_VARIABLE result OUTPUT_QUIET ERROR_QUIET)
+        if(NOT result EQUAL 0)
+            message(FATAL_ERROR "✗ Failed to create test repository ${name}: git ${step}")
+        endif()
+    endforeach()
+endfunction()
+make_repository(shared alpha beta gamma)
+make_repository(single delta)
+
+set(index_modules "")
+foreach(module ${STRESS_MODULES})
+    if(module STREQUAL "delta")
+        set(repository "file://${WORK_DIR}/repos/single")
+    else()
+        set(repository "file://${WORK_DIR}/repos/shared")
+    endif()
+    if(index_modules)
+        string(APPEND index_modules ",\n")
+    endif()
+    string(APPEND index_modules
+        "    {\"name\": \"${module}\", \"category\": \"testing\", \"repository\": \"${repository}\", "
+        "\"path\": \"cmake/${module}.cmake\", \"version\": \"master\", \"dependencies\": [], \"conflicts\": []}"
+    )
+endforeach()
+file(WRITE "${CMAKEHUB_MODULES_INDEX}" "{\n  \"modules\": [\n${index_modules}\n  ]\n}\n")
+
+# An empty ledger, so the processes record what they downloaded
+file(MAKE_DIRECTORY "${CMH_CACHE_DIR}")
+file(WRITE "${CMH_CACHE_DIR}/.ledger.jsonl" "")
+
+# Test 1: Parallel processes all succeed
+message(STATUS "Test 1: Running ${STRESS_PROCESSES} processes in parallel...")
+set(commands "")
+math(EXPR last "${STRESS_PROCESSES} - 1")
+foreach(i RANGE ${last})
+    list(APPEND commands COMMAND ${CMAKE_COMMAND} -DSTRESS_CHILD=${i} "-DWORK_DIR=${WORK_DIR}" -P "${CMAKE_CURRENT_LIST_FILE}")
+endforeach()
+# The commands of one execute_process() run concurrently
+execute_process(${commands}
+    WORKING_DIRECTORY "${WORK_DIR}"
+    RESULTS_VARIABLE results
+    OUTPUT_VARIABLE output
+    ERROR_VARIABLE errors
+)
+foreach(result ${results})
+    if(NOT result EQUAL 0)
+        message(FATAL_ERROR "✗ A process failed (exit codes: ${results}):\n${errors}")
+    endif()
+endforeach()
+message(STATUS "✓ All ${STRESS_PROCESSES} processes loaded every module")
+
+# Test 2: Every entry is complete and no download was left behind
+message(STATUS "")
+message(STATUS "Test 2: Checking the cache...")
+foreach(module ${STRESS_MODULES})
+    set(entry_dir "${CMH_CACHE_DIR}/${module}/master")
+    if(NOT EXISTS "${entry_dir}/.cmh_meta.json" OR NOT EXISTS "${entry_dir}/cmake/${module}.cmake")
+        message(FATAL_ERROR "✗ Cache entry of '${module}' is incomplete")
+    endif()
+endforeach()
+file(GLOB leftovers LIST_DIRECTORIES true "${CMH_CACHE_DIR}/.repos/*/.tmp-*" "${CMH_CACHE_DIR}/*/master/.cmh_meta.json.tmp-*")
+if(leftovers)
+    message(FATAL_ERROR "✗ Temporary files left behind: ${leftovers}")
+endif()
+file(GLOB checkouts LIST_DIRECTORIES true "${CMH_CACHE_DIR}/.repos/*/master")
+list(LENGTH checkouts checkout_count)
+if(NOT checkout_count EQUAL 2)
+    message(FATAL_ERROR "✗ Expected 2 checkouts, found: ${checkouts}")
+endif()
+message(STATUS "✓ Every entry is complete, with one checkout per repository")
+
+# Test 3: Each module was materialized once and the other processes reused it
+message(STATUS "")
+message(STATUS "Test 3: Checking the ledger...")
+set(ledger "${CMH_CACHE_DIR}/.ledger.jsonl")
+file(STRINGS "${ledger}" adds REGEX "\"op\": \"add\"")
+file(STRINGS "${ledger}" hits REGEX "\"op\": \"hit\"")
+list(LENGTH adds add_count)
+list(LENGTH hits hit_count)
+list(LENGTH STRESS_MODULES module_count)
+math(EXPR expected_hits "${STRESS_PROCESSES} * ${module_count} - ${module_count}")
+if(NOT add_count EQUAL module_count OR NOT hit_count EQUAL expected_hits)
+    message(FATAL_ERROR "✗ Expected ${module_count} downloads and ${expected_hits} cache hits, got ${add_count} and ${hit_count}")
+endif()
+# The repository holding a single module is never extended, so it was downloaded once
+include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+cmakehub_get_checkout_relpath("file://${WORK_DIR}/repos/single" master single_relpath)
+file(STRINGS "${ledger}" single_checkouts REGEX "\"op\": \"checkout\", \"checkout\": \"${single_relpath}\"")
+list(LENGTH single_checkouts single_count)
+if(NOT single_count EQUAL 1)
+    message(FATAL_ERROR "✗ Expected ${single_relpath} to be downloaded once, got ${single_count} downloads")
+endif()
+message(STATUS "✓ ${add_count} module(s) downloaded once, ${hit_count} uses reused them")
+
+file(REMOVE_RECURSE "${WORK_DIR}")
+
+message(STATUS "")
+message(STATUS "=== All concurrency tests passed ===")
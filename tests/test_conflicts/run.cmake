@@ -10,6 +10,19 @@ set(CMAKEHUB_VERBOSE OFF CACHE BOOL "")
 get_filename_component(TEST_DIR "${CMAKE_CURRENT_LIST_DIR}" ABSOLUTE)
 get_filename_component(PROJECT_ROOT "${TEST_DIR}/../.." ABSOLUTE)
 
+set(LOCK_WORK_DIR "${CMAKE_CURRENT_BINARY_DIR}/cmakehub_conflicts_test")
+
+# Child process: load two locked modules that conflict, from the cache only
+if(DEFINED LOCK_CHILD)
+    set(CMH_CACHE_DIR "${LOCK_WORK_DIR}/cache")
+    set(CMAKEHUB_LOCK_FILE "${LOCK_WORK_DIR}/cmakehub.lock")
+    set(CMAKEHUB_MODULES_INDEX "${LOCK_WORK_DIR}/missing.json")
+    include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+    cmakehub_use(locked_x)
+    cmakehub_use(locked_y)
+    return()
+endif()
+
 # Include CMakeHub loader
 include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
 
@@ -101,6 +114,49 @@ else()
     message(FATAL_ERROR "✗ sanitizers should have no conflicts: ${conflicts4}")
 endif()
 
+# Test 6: A lock file does not skip conflict detection
+message(STATUS "")
+message(STATUS "Test 6: Verifying conflicts between locked modules...")
+
+# Cached entries matching the lock, so both modules take the locked fast path
+file(REMOVE_RECURSE "${LOCK_WORK_DIR}")
+set(lock_entries "")
+foreach(pair "locked_x;locked_y" "locked_y;locked_x")
+    list(GET pair 0 module)
+    list(GET pair 1 conflict)
+    set(entry_dir "${LOCK_WORK_DIR}/cache/${module}/c0ffee")
+    file(WRITE "${entry_dir}/${module}.cmake" "set(LOADED_${module} ON)\n")
+    file(SHA256 "${entry_dir}/${module}.cmake" digest)
+    file(SIZE "${entry_dir}/${module}.cmake" size)
+    file(TIMESTAMP "${entry_dir}/${module}.cmake" mtime "%s" UTC)
+    file(WRITE "${entry_dir}/.cmh_meta.json"
+        "{\"module\": \"${module}\", \"version\": \"c0ffee\", \"path\": \"${module}.cmake\", "
+        "\"checkout\": \"\", \"sha256\": \"${digest}\", \"size\": ${size}, \"mtime\": ${mtime}}"
+    )
+    if(lock_entries)
+        string(APPEND lock_entries ",\n")
+    endif()
+    string(APPEND lock_entries
+        "    \"${module}\": {\"repository\": \"https://example.com/${module}.git\", \"version\": \"master\", "
+        "\"commit\": \"c0ffee\", \"path\": \"${module}.cmake\", \"sha256\": \"${digest}\", "
+        "\"dependencies\": [], \"conflicts\": [\"${conflict}\"], \"cmake_minimum_required\": \"\", "
+        "\"cpp_minimum_required\": \"\", \"platform\": []}"
+    )
+endforeach()
+file(WRITE "${LOCK_WORK_DIR}/cmakehub.lock" "{\n  \"lock_version\": 1,\n  \"modules\": {\n${lock_entries}\n  }\n}\n")
+
+execute_process(
+    COMMAND ${CMAKE_COMMAND} -DLOCK_CHILD=ON -P "${CMAKE_CURRENT_LIST_FILE}"
+    RESULT_VARIABLE result
+    OUTPUT_QUIET
+    ERROR_VARIABLE errors
+)
+file(REMOVE_RECURSE "${LOCK_WORK_DIR}")
+if(result EQUAL 0 OR NOT errors MATCHES "conflicts with already loaded module 'locked_x'")
+    message(FATAL_ERROR "✗ Locked modules loaded despite their conflict:\n${errors}")
+endif()
+message(STATUS "✓ Conflict detected on the locked fast path")
+
 message(STATUS "")
 message(STATUS "=== Test Passed ===")
 message(STATUS "Note: Actual conflict enforcement with FetchContent is tested in project mode")
@@ -76,6 +76,34 @@ else()
     message(FATAL_ERROR "✗ Non-empty array parsing failed")
 endif()
 
+# Test 6: A compiled index in another format is ignored
+message(STATUS "")
+message(STATUS "Test 6: Ignoring a compiled index of another format...")
+set(format_dir "${CMAKE_CURRENT_BINARY_DIR}/cmakehub_loader_basic_test")
+file(REMOVE_RECURSE "${format_dir}")
+file(WRITE "${format_dir}/modules.json"
+    "{\"modules\": [{\"name\": \"format_probe\", \"repository\": \"https://example.com/probe.git\", \"path\": \"probe.cmake\"}]}\n"
+)
+file(SHA256 "${format_dir}/modules.json" probe_sha256)
+# As a later format would be written: its guard returns before setting anything
+file(WRITE "${format_dir}/modules_index.cmake"
+    "set(CMH_COMPILED_INDEX_FORMAT 999)\n"
+    "set(CMH_COMPILED_INDEX_SHA256 \"${probe_sha256}\")\n"
+    "if(NOT CMH_COMPILED_INDEX_SHA256 STREQUAL index_sha256 OR NOT CMH_COMPILED_INDEX_FORMAT EQUAL index_format)\n"
+    "    return()\n"
+    "endif()\n"
+)
+set(saved_index "${CMAKEHUB_MODULES_INDEX}")
+set(CMAKEHUB_MODULES_INDEX "${format_dir}/modules.json")
+cmakehub_get_module_info(format_probe probe_found)
+cmakehub_get_module_property(format_probe path probe_path)
+set(CMAKEHUB_MODULES_INDEX "${saved_index}")
+file(REMOVE_RECURSE "${format_dir}")
+if(NOT probe_found OR NOT probe_path STREQUAL "probe.cmake")
+    message(FATAL_ERROR "✗ The index was not parsed from JSON")
+endif()
+message(STATUS "✓ Fell back to the JSON index")
+
 message(STATUS "")
 message(STATUS "=== Test Passed ===")
 message(STATUS "Note: Actual module downloading is tested in project mode")
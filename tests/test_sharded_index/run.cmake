@@ -0,0 +1,72 @@
+# Test 6: Sharded modules index
+# Verify that lookups parse only the module's shard and a full load reads every shard
+
+cmake_minimum_required(VERSION 3.19)
+
+# Disable verbose output
+set(CMAKEHUB_VERBOSE OFF CACHE BOOL "")
+
+# Get test directory
+get_filename_component(TEST_DIR "${CMAKE_CURRENT_LIST_DIR}" ABSOLUTE)
+get_filename_component(PROJECT_ROOT "${TEST_DIR}/../.." ABSOLUTE)
+
+# Use the fixture index (written by scripts/shard_index.py --prefix-length 1)
+set(CMAKEHUB_MODULES_INDEX "${TEST_DIR}/index/modules.json")
+
+# Include CMakeHub loader
+include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+
+message(STATUS "=== Test: Sharded Index ===")
+message(STATUS "")
+
+# Test 1: A lookup parses only the module's shard
+message(STATUS "Test 1: Looking up a module...")
+cmakehub_get_module_info(cpm success1)
+cmakehub_get_module_property(cpm path cpm_path)
+get_property(loaded_shards GLOBAL PROPERTY CMH_INDEX_SHARDS_LOADED)
+list(LENGTH loaded_shards loaded_count)
+
+if(NOT success1 OR NOT cpm_path STREQUAL "cmake/CPM.cmake")
+    message(FATAL_ERROR "✗ cpm not found in sharded index (path: ${cpm_path})")
+endif()
+if(NOT loaded_count EQUAL 1 OR NOT loaded_shards MATCHES "/8\\.json$")
+    message(FATAL_ERROR "✗ Expected only shard 8 to be parsed, got: ${loaded_shards}")
+endif()
+message(STATUS "✓ cpm found by parsing a single shard")
+
+# Test 2: Modules sharing the shard need no further parsing
+message(STATUS "")
+message(STATUS "Test 2: Looking up a module in the same shard...")
+cmakehub_get_module_info(conan success2)
+cmakehub_get_module_property(conan conflicts conan_conflicts_json)
+cmakehub_parse_list("${conan_conflicts_json}" conan_conflicts)
+get_property(loaded_shards GLOBAL PROPERTY CMH_INDEX_SHARDS_LOADED)
+list(LENGTH loaded_shards loaded_count)
+
+if(NOT "cpm" IN_LIST conan_conflicts)
+    message(FATAL_ERROR "✗ conan conflicts are incorrect: ${conan_conflicts}")
+endif()
+if(NOT loaded_count EQUAL 1)
+    message(FATAL_ERROR "✗ Expected shard 8 to be reused, got: ${loaded_shards}")
+endif()
+message(STATUS "✓ conan read from the already parsed shard")
+
+# Test 3: Loading the whole index reads every shard
+message(STATUS "")
+message(STATUS "Test 3: Loading the whole index...")
+cmakehub_load_index()
+get_property(all_modules GLOBAL PROPERTY CMH_INDEX_MODULES)
+list(LENGTH all_modules module_count)
+
+if(NOT module_count EQUAL 6)
+    message(FATAL_ERROR "✗ Expected 6 modules, got ${module_count}: ${all_modules}")
+endif()
+foreach(name cotire cpm conan sanitizers coverage_cg gcov)
+    if(NOT name IN_LIST all_modules)
+        message(FATAL_ERROR "✗ ${name} missing from the loaded index")
+    endif()
+endforeach()
+message(STATUS "✓ All 6 modules loaded from 5 shards")
+
+message(STATUS "")
+message(STATUS "=== Test Passed ===")
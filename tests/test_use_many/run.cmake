@@ -0,0 +1,244 @@
+# Test 8: Batch loading with cmakehub_use_many
+# Load several modules from different repositories at once, and verify that
+# dependencies come first, that missing modules are downloaded by parallel
+# workers before anything is included, that each worker's result is reported,
+# and that conflicts (locked modules' too) fail up front
+
+cmake_minimum_required(VERSION 3.19)
+
+# Disable verbose output
+set(CMAKEHUB_VERBOSE OFF CACHE BOOL "")
+
+# Get test directory
+get_filename_component(TEST_DIR "${CMAKE_CURRENT_LIST_DIR}" ABSOLUTE)
+get_filename_component(PROJECT_ROOT "${TEST_DIR}/../.." ABSOLUTE)
+
+if(NOT DEFINED WORK_DIR)
+    set(WORK_DIR "${CMAKE_CURRENT_BINARY_DIR}/cmakehub_use_many_test")
+endif()
+set(CMH_CACHE_DIR "${WORK_DIR}/cache")
+set(CMAKEHUB_MODULES_INDEX "${WORK_DIR}/modules.json")
+set(CMAKEHUB_LOCK_FILE "")
+
+# Child processes: load modules that conflict with each other, modules whose
+# download fails, a module for another platform, and conflicting locked modules
+if(DEFINED CONFLICT_CHILD)
+    include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+    cmakehub_use_many(beta epsilon)
+    return()
+endif()
+if(DEFINED BROKEN_CHILD)
+    set(CMAKEHUB_VERBOSE ON CACHE BOOL "" FORCE)
+    include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+    cmakehub_use_many(zeta broken)
+    return()
+endif()
+if(DEFINED PLATFORM_CHILD)
+    set(CMAKE_SYSTEM_NAME Linux)
+    set(CMAKEHUB_VERBOSE ON CACHE BOOL "" FORCE)
+    include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+    cmakehub_use_many(eta)
+    return()
+endif()
+if(DEFINED LOCK_CHILD)
+    set(CMAKEHUB_LOCK_FILE "${WORK_DIR}/cmakehub.lock")
+    include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+    cmakehub_use_many(locked_x locked_y)
+    return()
+endif()
+
+message(STATUS "=== Test: Batch Loading ===")
+message(STATUS "")
+
+find_package(Git QUIET)
+if(NOT GIT_FOUND)
+    message(STATUS "⚠ Git not found, skipping")
+    return()
+endif()
+
+# Local repositories, so the test needs no network
+file(REMOVE_RECURSE "${WORK_DIR}")
+function(make_repository name)
+    set(repo_dir "${WORK_DIR}/repos/${name}")
+    file(MAKE_DIRECTORY "${repo_dir}")
+    foreach(module ${ARGN})
+        file(WRITE "${repo_dir}/cmake/${module}.cmake" "set_property(GLOBAL APPEND PROPERTY CMH_MANY_LOADED ${module})\n")
+    endforeach()
+    foreach(step "init;-q" "symbolic-ref;HEAD;refs/heads/master" "add;." "-c;user.name=test;-c;user.email=test@example.com;commit;-q;-m;modules")
+        execute_process(COMMAND ${GIT_EXECUTABLE} ${step} WORKING_DIRECTORY "${repo_dir}" RESULT_VARIABLE result OUTPUT_QUIET ERROR_QUIET)
+        if(NOT result EQUAL 0)
+            message(FATAL_ERROR "✗ Failed to create test repository ${name}: git ${step}")
+        endif()
+    endforeach()
+endfunction()
+make_repository(shared alpha beta)
+make_repository(one gamma)
+make_repository(two delta)
+make_repository(three epsilon)
+make_repository(four zeta)
+make_repository(five eta)
+
+# alpha depends on gamma, epsilon conflicts with beta, broken cannot be
+# downloaded and eta only supports Windows
+set(index_modules "")
+foreach(spec "alpha;shared;\"gamma\";;" "beta;shared;;;" "gamma;one;;;" "delta;two;;;" "epsilon;three;;\"beta\";"
+             "zeta;four;;;" "broken;missing;;;" "eta;five;;;\"windows\"")
+    list(GET spec 0 module)
+    list(GET spec 1 repository)
+    list(GET spec 2 dependencies)
+    list(GET spec 3 conflicts)
+    list(GET spec 4 platforms)
+    if(index_modules)
+        string(APPEND index_modules ",\n")
+    endif()
+    string(APPEND index_modules
+        "    {\"name\": \"${module}\", \"category\": \"testing\", \"repository\": \"file://${WORK_DIR}/repos/${repository}\", "
+        "\"path\": \"cmake/${module}.cmake\", \"version\": \"master\", "
+        "\"dependencies\": [${dependencies}], \"conflicts\": [${conflicts}], \"platform\": [${platforms}]}"
+    )
+endforeach()
+file(WRITE "${CMAKEHUB_MODULES_INDEX}" "{\n  \"modules\": [\n${index_modules}\n  ]\n}\n")
+
+# An empty ledger, so the test can see what was downloaded and reused
+file(MAKE_DIRECTORY "${CMH_CACHE_DIR}")
+file(WRITE "${CMH_CACHE_DIR}/.ledger.jsonl" "")
+set(ledger "${CMH_CACHE_DIR}/.ledger.jsonl")
+
+include(${PROJECT_ROOT}/cmake/hub/loader.cmake)
+
+# Test 1: Every module is loaded, dependencies first
+message(STATUS "Test 1: Loading alpha, beta and delta...")
+cmakehub_use_many(alpha beta delta)
+get_property(loaded GLOBAL PROPERTY CMH_MANY_LOADED)
+if(NOT loaded STREQUAL "gamma;alpha;beta;delta")
+    message(FATAL_ERROR "✗ Expected gamma;alpha;beta;delta to be loaded in order, got: ${loaded}")
+endif()
+message(STATUS "✓ Loaded ${loaded}")
+
+# Test 2: The downloads happened before the first include, so every include was a cache hit
+message(STATUS "")
+message(STATUS "Test 2: Checking the downloads...")
+file(STRINGS "${ledger}" misses REGEX "\"op\": \"miss\"")
+file(STRINGS "${ledger}" hits REGEX "\"op\": \"hit\"")
+list(LENGTH misses miss_count)
+list(LENGTH hits hit_count)
+if(NOT miss_count EQUAL 4 OR NOT hit_count EQUAL 4)
+    message(FATAL_ERROR "✗ Expected 4 downloads and 4 cache hits, got ${miss_count} and ${hit_count}")
+endif()
+file(GLOB checkouts LIST_DIRECTORIES true "${CMH_CACHE_DIR}/.repos/*/master")
+list(LENGTH checkouts checkout_count)
+if(NOT checkout_count EQUAL 3)
+    message(FATAL_ERROR "✗ Expected 3 checkouts, found: ${checkouts}")
+endif()
+message(STATUS "✓ ${miss_count} module(s) downloaded in parallel before loading")
+
+# Test 3: A second batch downloads nothing
+message(STATUS "")
+message(STATUS "Test 3: Loading the same modules again...")
+cmakehub_use_many(alpha beta delta)
+file(STRINGS "${ledger}" misses REGEX "\"op\": \"miss\"")
+list(LENGTH misses miss_count)
+if(NOT miss_count EQUAL 4)
+    message(FATAL_ERROR "✗ Cached modules were downloaded again")
+endif()
+message(STATUS "✓ Served from the cache")
+
+# Test 4: Conflicts fail before anything is downloaded
+message(STATUS "")
+message(STATUS "Test 4: Loading conflicting modules...")
+execute_process(
+    COMMAND ${CMAKE_COMMAND} -DCONFLICT_CHILD=ON "-DWORK_DIR=${WORK_DIR}" -P "${CMAKE_CURRENT_LIST_FILE}"
+    RESULT_VARIABLE result
+    OUTPUT_QUIET
+    ERROR_VARIABLE errors
+)
+if(result EQUAL 0 OR NOT errors MATCHES "conflicts with module 'beta'")
+    message(FATAL_ERROR "✗ Expected the conflict to be reported:\n${errors}")
+endif()
+if(EXISTS "${CMH_CACHE_DIR}/epsilon")
+    message(FATAL_ERROR "✗ A conflicting module was downloaded")
+endif()
+message(STATUS "✓ Conflict reported before downloading")
+
+# Test 5: Each worker's result is reported, and a failed download still fails the load
+message(STATUS "")
+message(STATUS "Test 5: Loading a module that cannot be downloaded...")
+execute_process(
+    COMMAND ${CMAKE_COMMAND} -DBROKEN_CHILD=ON "-DWORK_DIR=${WORK_DIR}" -P "${CMAKE_CURRENT_LIST_FILE}"
+    RESULT_VARIABLE result
+    OUTPUT_VARIABLE output
+    ERROR_VARIABLE errors
+)
+if(result EQUAL 0)
+    message(FATAL_ERROR "✗ Loading a module that cannot be downloaded succeeded")
+endif()
+if(NOT output MATCHES "Download worker [0-9]+ fetched zeta" OR NOT output MATCHES "Download worker [0-9]+ failed \\(1\\) for broken")
+    message(FATAL_ERROR "✗ Expected a result for each worker:\n${output}")
+endif()
+file(GLOB logs "${CMH_CACHE_DIR}/.fetch-*")
+if(logs)
+    message(FATAL_ERROR "✗ Worker output files were left behind: ${logs}")
+endif()
+message(STATUS "✓ Worker results reported")
+
+# Test 6: Platforms are checked once, while resolving, before the module is loaded
+message(STATUS "")
+message(STATUS "Test 6: Loading a module for another platform...")
+execute_process(
+    COMMAND ${CMAKE_COMMAND} -DPLATFORM_CHILD=ON "-DWORK_DIR=${WORK_DIR}" -P "${CMAKE_CURRENT_LIST_FILE}"
+    RESULT_VARIABLE result
+    OUTPUT_VARIABLE output
+    ERROR_VARIABLE output
+)
+string(REGEX MATCHALL "not compatible with platform 'linux'" warnings "${output}")
+list(LENGTH warnings warning_count)
+if(NOT result EQUAL 0 OR NOT warning_count EQUAL 1 OR NOT output MATCHES "not compatible with platform 'linux'.*Loading module: eta")
+    message(FATAL_ERROR "✗ Expected one platform warning before loading, got ${warning_count}:\n${output}")
+endif()
+message(STATUS "✓ Platform warning reported once")
+
+# Test 7: Conflicts between locked modules fail before anything is included
+message(STATUS "")
+message(STATUS "Test 7: Loading conflicting locked modules...")
+set(lock_entries "")
+foreach(pair "locked_x;locked_y" "locked_y;locked_x")
+    list(GET pair 0 module)
+    list(GET pair 1 conflict)
+    set(entry_dir "${CMH_CACHE_DIR}/${module}/c0ffee")
+    file(WRITE "${entry_dir}/${module}.cmake" "file(WRITE \"${WORK_DIR}/${module}.loaded\" \"\")\n")
+    file(SHA256 "${entry_dir}/${module}.cmake" digest)
+    file(SIZE "${entry_dir}/${module}.cmake" size)
+    file(TIMESTAMP "${entry_dir}/${module}.cmake" mtime "%s" UTC)
+    file(WRITE "${entry_dir}/.cmh_meta.json"
+        "{\"module\": \"${module}\", \"version\": \"c0ffee\", \"path\": \"${module}.cmake\", "
+        "\"checkout\": \"\", \"sha256\": \"${digest}\", \"size\": ${size}, \"mtime\": ${mtime}}"
+    )
+    if(lock_entries)
+        string(APPEND lock_entries ",\n")
+    endif()
+    string(APPEND lock_entries
+        "    \"${module}\": {\"repository\": \"https://example.com/${module}.git\", \"version\": \"master\", "
+        "\"commit\": \"c0ffee\", \"path\": \"${module}.cmake\", \"sha256\": \"${digest}\", "
+        "\"dependencies\": [], \"conflicts\": [\"${conflict}\"], \"cmake_minimum_required\": \"\", "
+        "\"cpp_minimum_required\": \"\", \"platform\": []}"
+    )
+endforeach()
+file(WRITE "${WORK_DIR}/cmakehub.lock" "{\n  \"lock_version\": 1,\n  \"modules\": {\n${lock_entries}\n  }\n}\n")
+execute_process(
+    COMMAND ${CMAKE_COMMAND} -DLOCK_CHILD=ON "-DWORK_DIR=${WORK_DIR}" -P "${CMAKE_CURRENT_LIST_FILE}"
+    RESULT_VARIABLE result
+    OUTPUT_QUIET
+    ERROR_VARIABLE errors
+)
+if(result EQUAL 0 OR NOT errors MATCHES "Module 'locked_x' conflicts with module 'locked_y'")
+    message(FATAL_ERROR "✗ Expected the locked modules' conflict to be reported:\n${errors}")
+endif()
+if(EXISTS "${WORK_DIR}/locked_x.loaded")
+    message(FATAL_ERROR "✗ A conflicting locked module was included")
+endif()
+message(STATUS "✓ Locked conflict reported before loading")
+
+file(REMOVE_RECURSE "${WORK_DIR}")
+
+message(STATUS "")
+message(STATUS "=== All batch loading tests passed ===")